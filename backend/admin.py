@@ -0,0 +1,16 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+ADMIN_API_TOKEN = os.environ.get("ADMIN_API_TOKEN", "").strip()
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Guard for bulk and maintenance endpoints; disabled until ADMIN_API_TOKEN is set."""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled")
+    # Constant-time compare so response timing does not leak the token prefix
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_API_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
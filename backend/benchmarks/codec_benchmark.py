@@ -0,0 +1,109 @@
+"""Compression ratio and CPU cost of the generated-text storage codec.
+
+    python benchmarks/codec_benchmark.py              # synthetic itineraries
+    python benchmarks/codec_benchmark.py --from-db    # sample real documents
+
+Dictionaries are trained on one half of the corpus and measured on the other.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import codec  # noqa: E402
+
+PLACES = ["Baga Beach", "Fort Aguada", "Dudhsagar Falls", "Mysore Palace", "Hampi Bazaar", "Abbey Falls", "Om Beach"]
+FOODS = ["fish curry rice", "bebinca", "masala dosa", "Mysore pak", "pandi curry", "xacuti", "neer dosa"]
+
+
+def synthetic_itinerary(rng: random.Random) -> str:
+    days = rng.randint(3, 7)
+    lines = [f"🌟 Your {days}-Day Adventure in {rng.choice(['Goa', 'Karnataka', 'Coorg', 'Hampi'])}! ✨", ""]
+    for day in range(1, days + 1):
+        lines += [
+            f"📍 DAY {day}: Exploring {rng.choice(PLACES)}",
+            f"🌅 Morning: Start your day at {rng.choice(PLACES)} and enjoy the sunrise views.",
+            f"🍽️ Lunch: Try authentic {rng.choice(FOODS)} at a local restaurant (₹{rng.randint(2, 9)}00-{rng.randint(10, 20)}00).",
+            f"🚗 Transportation: Hire a scooter (₹{rng.randint(3, 6)}00/day) or take a local bus.",
+            f"🌆 Evening: Sunset at {rng.choice(PLACES)}, followed by dinner with {rng.choice(FOODS)}.",
+            "💡 Local Insider Tip: Visit early in the morning to avoid crowds and get the best photos!",
+            "",
+        ]
+    lines += [
+        "💰 COST BREAKDOWN:",
+        f"- Accommodation: ₹{rng.randint(10, 40)}00/night",
+        f"- Food: ₹{rng.randint(5, 15)}00/day",
+        "🛡️ SAFETY TIPS: Stay hydrated, respect local customs, and keep emergency numbers handy.",
+        "Have an unforgettable journey! 🙏✨",
+    ]
+    return "\n".join(lines)
+
+
+async def sample_db(limit: int):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+    try:
+        await codec.load_dictionaries(db)
+        texts = []
+        for collection, fields in codec.COMPRESSED_FIELDS.items():
+            docs = await db[collection].aggregate([{"$sample": {"size": limit}}]).to_list(limit)
+            await codec.decode_many(db, docs, fields)
+            texts += [doc[f] for doc in docs for f in fields if isinstance(doc.get(f), str)]
+        return texts
+    finally:
+        client.close()
+
+
+def measure(name, texts, algorithm, dictionary):
+    payloads = [text.encode("utf-8") for text in texts]
+    started = time.perf_counter()
+    compressed = [codec._compress(p, algorithm, dictionary) for p in payloads]
+    compress_s = time.perf_counter() - started
+    started = time.perf_counter()
+    for blob in compressed:
+        codec._decompress(blob, algorithm, dictionary)
+    decompress_s = time.perf_counter() - started
+
+    raw = sum(len(p) for p in payloads)
+    packed = sum(len(c) for c in compressed)
+    print(
+        f"{name:<16} ratio {raw / packed:5.2f}x   "
+        f"avg {raw / len(payloads) / 1024:5.1f} KB -> {packed / len(payloads) / 1024:5.1f} KB   "
+        f"compress {compress_s / len(payloads) * 1e6:7.1f} µs/doc   "
+        f"decompress {decompress_s / len(payloads) * 1e6:6.1f} µs/doc"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-db", action="store_true", help="sample stored documents instead of synthetic text")
+    parser.add_argument("--samples", type=int, default=400)
+    args = parser.parse_args()
+
+    if args.from_db:
+        texts = asyncio.run(sample_db(args.samples))
+    else:
+        rng = random.Random(42)
+        texts = [synthetic_itinerary(rng) for _ in range(args.samples)]
+    if len(texts) < 2:
+        sys.exit("Not enough documents to benchmark")
+    training, corpus = texts[: len(texts) // 2], texts[len(texts) // 2:]
+    print(f"{len(corpus)} documents, dictionaries trained on {len(training)}\n")
+
+    algorithms = ["zlib"] + (["zstd"] if codec.zstandard else [])
+    for algorithm in algorithms:
+        measure(algorithm, corpus, algorithm, None)
+        measure(f"{algorithm}+dict", corpus, algorithm, codec.train_dictionary(training, algorithm))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Per-request CPU of the JSON response path, before and after the fast path.
+
+    python benchmarks/serialization_benchmark.py
+    python benchmarks/serialization_benchmark.py --iterations 5000
+
+"before" is what FastAPI did for a plain dict/list return value:
+``jsonable_encoder`` followed by Starlette's ``JSONResponse``. "after" is
+``FastJSONResponse`` returned directly, and for static payloads a
+``PrebuiltJSON`` response encoded once.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+import responses  # noqa: E402
+
+DESTINATIONS = {
+    "destinations": [
+        {
+            "name": name,
+            "type": "Heritage City",
+            "highlights": ["Royal palaces", "Silk sarees", "Yoga centers", "Classical architecture"],
+            "best_time": "October to March",
+            "avg_budget": "₹1,200-3,000/day",
+            "image_hint": "palace, heritage architecture",
+        }
+        for name in ("Goa", "Bangalore", "Mysore", "Coorg", "Hampi", "Gokarna")
+    ],
+    "total_count": 6,
+    "featured_states": ["Goa", "Karnataka"],
+    "travel_tip": "🌟 Each destination offers unique experiences - from beach relaxation to cultural immersion!",
+}
+
+
+def offer_cards(rng: random.Random, count: int = 50) -> list:
+    now = datetime.utcnow()
+    return [
+        {
+            "id": f"offer-{i}",
+            "vendor_name": f"Vendor {i}",
+            "title": f"Sunset cruise {i}",
+            "description": "Enjoy a relaxing evening on the backwaters with snacks and live music. " * 3,
+            "category": rng.choice(["tours", "food", "accommodation"]),
+            "location": "Panaji, North Goa",
+            "price": round(rng.uniform(500, 5000), 2),
+            "currency": "INR",
+            "discount_percentage": rng.choice([None, 10, 20]),
+            "valid_until": now + timedelta(days=rng.randint(1, 90)),
+            "contact_info": "+91 98765 43210",
+            "images": [],
+            "tags": ["cruise", "sunset", "family"],
+        }
+        for i in range(count)
+    ]
+
+
+def cpu_us(fn, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    cards = offer_cards(random.Random(7))
+    prebuilt = responses.PrebuiltJSON(DESTINATIONS)
+    cases = [
+        ("destinations", DESTINATIONS, prebuilt.response),
+        ("50 offer cards", cards, None),
+    ]
+    print(f"JSON encoder: {'orjson' if responses.orjson else 'stdlib json'}")
+    print(f"{'payload':<16} {'before µs':>10} {'after µs':>10} {'prebuilt µs':>12}")
+    for name, payload, static in cases:
+        before = cpu_us(lambda: JSONResponse(jsonable_encoder(payload)), args.iterations)
+        after = cpu_us(lambda: responses.FastJSONResponse(payload), args.iterations)
+        prebuilt_us = f"{cpu_us(static, args.iterations):>12.1f}" if static else f"{'-':>12}"
+        print(f"{name:<16} {before:>10.1f} {after:>10.1f} {prebuilt_us}")
+
+
+if __name__ == "__main__":
+    main()
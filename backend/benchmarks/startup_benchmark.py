@@ -0,0 +1,88 @@
+"""Cold-start cost of the API: module import time and what it pulls in.
+
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --top 30 --runs 5
+
+Runs ``python -X importtime -c "import server"`` in fresh interpreters and
+reports the median wall time plus the slowest modules by cumulative import
+time. The "deferred" section imports the dependencies that server.py loads
+lazily (the LLM client stack and geopy) on their own, which is roughly what a
+worker would pay before serving if they were imported eagerly.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+DEFERRED = ["emergentintegrations.llm.chat", "litellm", "geopy.geocoders", "geopy.distance"]
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def run_importtime(statement: str) -> tuple:
+    env = dict(os.environ)
+    # Constructing the Mongo client does not connect, so any URL will do
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "startup_benchmark")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=BACKEND,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return elapsed, modules
+
+
+def report_server(runs: int, top: int):
+    timings, modules = [], []
+    for _ in range(runs):
+        elapsed, modules = run_importtime("import server")
+        timings.append(elapsed)
+    print(f"import server: median {statistics.median(timings) * 1000:.0f}ms over {runs} runs (interpreter start included)")
+    own = next((cumulative for name, _, cumulative, _ in modules if name == "server"), 0)
+    print(f"server module cumulative import time: {own / 1000:.1f}ms\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative, depth in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>9.1f}  {'  ' * depth}{name}")
+    loaded = {name for name, _, _, _ in modules}
+    eager = [name for name in DEFERRED if name in loaded]
+    print(f"\ndeferred dependencies imported at startup: {', '.join(eager) if eager else 'none'}")
+
+
+def report_deferred():
+    print("\ndeferred dependencies imported on their own:")
+    for name in DEFERRED:
+        try:
+            _, modules = run_importtime(f"import {name}")
+        except RuntimeError as e:
+            print(f"{'':>14}  {name}: not importable ({e})")
+            continue
+        cumulative = next((c for module, _, c, _ in modules if module == name), 0)
+        print(f"{cumulative / 1000:>14.1f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    report_server(args.runs, args.top)
+    report_deferred()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import catalogue
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "500"))
+MAX_LINE_BYTES = int(os.environ.get("IMPORT_MAX_LINE_BYTES", str(16 * 1024 * 1024)))
+MAX_REPORTED_ERRORS = 1000
+# Upper bound on bytes inflated from one gzip chunk before it is split into lines.
+DECOMPRESS_STEP = 1024 * 1024
+
+# Derived rating fields only overwrite a stored vendor when the row sets its ratings.
+RATING_INPUTS = ("rating", "total_reviews")
+
+
+async def _decompressed(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(wbits=31)
+    async for chunk in chunks:
+        data = chunk
+        while data:
+            yield decompressor.decompress(data, DECOMPRESS_STEP)
+            data = decompressor.unconsumed_tail
+    yield decompressor.flush()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], gzip: bool = False, max_line_bytes: int = MAX_LINE_BYTES):
+    """Yield ``(line_number, line)`` from a byte stream, holding at most one line in memory.
+
+    Lines longer than ``max_line_bytes`` are yielded as ``None`` and their
+    remaining bytes discarded.
+    """
+    if gzip:
+        chunks = _decompressed(chunks)
+    buffer = bytearray()
+    line_number = 0
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        oversized = True
+                        buffer.clear()
+                break
+            line_number += 1
+            if not oversized:
+                buffer += chunk[start:end]
+            if oversized or len(buffer) > max_line_bytes:
+                yield line_number, None
+            else:
+                yield line_number, bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = end + 1
+    if oversized or len(buffer) > max_line_bytes:
+        yield line_number + 1, None
+    elif buffer.strip():
+        yield line_number + 1, bytes(buffer)
+
+
+def upsert_operation(collection: str, model: BaseModel) -> UpdateOne:
+    """Upsert on ``id``: explicit fields are overwritten, defaults only fill new documents."""
+    full = model.dict()
+    explicit = model.dict(exclude_unset=True)
+    derived = catalogue.derived_fields(collection, full)
+
+    update = {key: value for key, value in explicit.items() if key != "id"}
+    update["updated_at"] = explicit.get("updated_at", datetime.utcnow())
+    on_insert = {}
+    for key, value in derived.items():
+        if collection == "vendors" and key in ("rating_sum", "ranking_score") and not any(
+            field in explicit for field in RATING_INPUTS
+        ):
+            on_insert[key] = value
+        else:
+            update[key] = value
+    for key, value in full.items():
+        if key != "id" and key not in update:
+            on_insert[key] = value
+    return UpdateOne({"id": model.id}, {"$set": update, "$setOnInsert": on_insert}, upsert=True)
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+    )
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def _write_batch(db, collection: str, operations: list, line_numbers: list, report: ImportReport):
+    try:
+        result = await db[collection].bulk_write(operations, ordered=False)
+        report.inserted += result.upserted_count
+        report.updated += result.matched_count
+    except BulkWriteError as e:
+        details = e.details
+        report.inserted += details.get("nUpserted", 0)
+        report.updated += details.get("nMatched", 0)
+        for error in details.get("writeErrors", []):
+            report.error(line_numbers[error["index"]], error.get("errmsg", "write failed"))
+
+
+async def import_ndjson(
+    db,
+    collection: str,
+    model: Type[BaseModel],
+    chunks: AsyncIterator[bytes],
+    gzip: bool = False,
+    batch_size: int = BATCH_SIZE,
+    max_line_bytes: Optional[int] = None,
+) -> dict:
+    """Validate NDJSON rows against ``model`` and upsert them in unordered batches.
+
+    Rows are parsed as they arrive, so memory is bounded by one batch rather
+    than by the size of the upload. Invalid rows are reported by line number
+    and skipped; they never abort the import.
+    """
+    report = ImportReport()
+    operations = []
+    line_numbers = []
+    async for line_number, line in iter_lines(chunks, gzip, max_line_bytes or MAX_LINE_BYTES):
+        if line is None:
+            report.processed += 1
+            report.error(line_number, f"Line exceeds {max_line_bytes or MAX_LINE_BYTES} bytes")
+            continue
+        if not line.strip():
+            continue
+        report.processed += 1
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Each line must be a JSON object")
+            operations.append(upsert_operation(collection, model(**row)))
+            line_numbers.append(line_number)
+        except ValidationError as e:
+            report.error(line_number, _validation_message(e))
+            continue
+        except (TypeError, ValueError) as e:
+            # Includes values the model accepts but derived fields cannot use
+            report.error(line_number, str(e))
+            continue
+        if len(operations) >= batch_size:
+            await _write_batch(db, collection, operations, line_numbers, report)
+            operations, line_numbers = [], []
+    if operations:
+        await _write_batch(db, collection, operations, line_numbers, report)
+
+    if report.inserted or report.updated:
+        await catalogue.after_bulk_write(db, [collection])
+    logger.info(
+        f"📥 Imported into {collection}: {report.inserted} inserted, "
+        f"{report.updated} updated, {report.failed} failed"
+    )
+    return report.as_dict()
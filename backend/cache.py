@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+_registry: List["TTLCache"] = []
+
+
+class TTLCache:
+    """Small in-process cache with per-entry TTL and single-flight loading.
+
+    Each cache declares the collections its entries are derived from, so
+    writers only have to call ``invalidate_collections`` with what they
+    touched. A generation counter stops a load that started before an
+    invalidation from repopulating the cache with stale data.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, collections: Iterable[str]):
+        self.name = name
+        self.ttl = ttl_seconds
+        self.collections = frozenset(collections)
+        self.generation = 0
+        self.invalidated_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Any, Tuple[float, Any]] = {}
+        self._inflight: Dict[Any, asyncio.Future] = {}
+        _registry.append(self)
+
+    async def get_or_load(self, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        while key in self._inflight:
+            inflight = self._inflight[key]
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only the loading caller was cancelled (e.g. its client went
+                # away): take over the load instead of failing this request.
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        generation = self.generation
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark the exception retrieved when nobody else was waiting on it.
+                future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if generation == self.generation:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self):
+        self.generation += 1
+        self.invalidated_at = time.monotonic()
+        self._entries.clear()
+
+    def invalidated_within(self, seconds: float) -> bool:
+        """Whether an invalidation happened in the last ``seconds`` (e.g. to read from the primary)."""
+        return self.invalidated_at is not None and time.monotonic() - self.invalidated_at < seconds
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "generation": self.generation,
+        }
+
+
+def invalidate_collections(*collections: str):
+    """Drop every registered cache that depends on any of ``collections``."""
+    touched = set(collections)
+    for cache in _registry:
+        if cache.collections & touched:
+            cache.invalidate()
+
+
+def registered_caches() -> List[TTLCache]:
+    return list(_registry)
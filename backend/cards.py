@@ -0,0 +1,127 @@
+import logging
+from typing import List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_LENGTH = 150
+
+# Fields copied into the list-view card of each collection (only the first image).
+CARD_FIELDS = {
+    "vendor_offers": (
+        "id", "vendor_name", "title", "description", "category", "location", "price", "currency",
+        "discount_percentage", "valid_until", "contact_info", "images", "tags",
+    ),
+    "tourism_events": (
+        "id", "title", "description", "event_type", "location", "start_date", "end_date", "entry_fee",
+        "organizer", "contact_info", "images", "tags", "is_featured",
+    ),
+}
+
+
+def summarize(text: Optional[str]) -> Optional[str]:
+    if text and len(text) > SUMMARY_LENGTH:
+        return text[:SUMMARY_LENGTH] + "..."
+    return text
+
+
+def card_fields(collection: str, doc: dict) -> dict:
+    """Display card stored alongside an offer or event.
+
+    ``card`` is the list view (first image only). ``card_summary`` holds the
+    truncated description the explore page shows, so the shorter cards can be
+    assembled by projection without duplicating the image again.
+    """
+    if collection not in CARD_FIELDS:
+        return {}
+    card = {field: doc.get(field) for field in CARD_FIELDS[collection]}
+    card["images"] = (card["images"] or [])[:1]
+    return {"card": card, "card_summary": summarize(doc.get("description"))}
+
+
+def _summary_projection(fields) -> dict:
+    projection = {"_id": 0}
+    for field in fields:
+        if field == "description":
+            projection[field] = "$card_summary"
+        elif field == "tags":
+            projection[field] = {"$slice": [{"$ifNull": ["$card.tags", []]}, 3]}
+        else:
+            projection[field] = f"$card.{field}"
+    return projection
+
+
+# Explore page cards, built from the stored card by the server. Featured and
+# recent offers come from one query projected with the union of both field
+# sets; ``pick`` trims each row to the fields its section shows.
+FEATURED_OFFER_FIELDS = (
+    "id", "vendor_name", "title", "description", "category", "location", "price", "currency",
+    "discount_percentage", "images", "tags",
+)
+RECENT_OFFER_FIELDS = (
+    "id", "vendor_name", "title", "category", "location", "price", "discount_percentage", "images",
+)
+EXPLORE_OFFER_PROJECTION = _summary_projection(
+    FEATURED_OFFER_FIELDS + tuple(field for field in RECENT_OFFER_FIELDS if field not in FEATURED_OFFER_FIELDS)
+)
+FEATURED_EVENT_PROJECTION = _summary_projection((
+    "id", "title", "description", "event_type", "location", "start_date", "end_date", "entry_fee",
+    "organizer", "images", "tags",
+))
+
+
+def pick(rows: List[dict], fields) -> List[dict]:
+    return [{field: row[field] for field in fields if field in row} for row in rows]
+
+
+def _card_fallback(collection: str) -> dict:
+    """``$set`` stage building ``card``/``card_summary`` in the pipeline where none is stored.
+
+    Covers documents from before the backfill ran and rows written by other
+    tools; mirrors ``card_fields``.
+    """
+    card = {field: {"$ifNull": [f"${field}", None]} for field in CARD_FIELDS[collection]}
+    card["images"] = {"$slice": [{"$ifNull": ["$images", []]}, 1]}
+    description = {"$ifNull": ["$description", ""]}
+    # Longer than SUMMARY_LENGTH iff there is a code point at that index
+    summary = {"$cond": [
+        {"$eq": [{"$substrCP": [description, SUMMARY_LENGTH, 1]}, ""]},
+        {"$ifNull": ["$description", None]},
+        {"$concat": [{"$substrCP": [description, 0, SUMMARY_LENGTH]}, "..."]},
+    ]}
+    return {"$set": {
+        "card": {"$ifNull": ["$card", card]},
+        "card_summary": {"$ifNull": ["$card_summary", summary]},
+    }}
+
+
+def card_pipeline(collection: str, query: dict, sort: list, limit: int, projection: Optional[dict] = None) -> List[dict]:
+    """Aggregation returning stored cards (or a projection of them) in place of documents."""
+    pipeline = [{"$match": query}, {"$sort": dict(sort)}, {"$limit": limit}, _card_fallback(collection)]
+    if projection:
+        pipeline.append({"$project": projection})
+    else:
+        pipeline.append({"$replaceRoot": {"newRoot": "$card"}})
+    return pipeline
+
+
+async def backfill_cards(db, collection: str, batch_size: int = 500, rebuild: bool = False) -> int:
+    """Compute cards for documents written before they existed (or all with ``rebuild``)."""
+    query = {} if rebuild else {"card": {"$exists": False}}
+    projection = {field: 1 for field in CARD_FIELDS[collection]}
+    projection["images"] = {"$slice": 1}
+    updated = 0
+    ops = []
+    async for doc in db[collection].find(query, projection).batch_size(batch_size):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": card_fields(collection, doc)}))
+        if len(ops) >= batch_size:
+            await db[collection].bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+    if ops:
+        await db[collection].bulk_write(ops, ordered=False)
+        updated += len(ops)
+    if updated:
+        logger.info(f"🃏 Built cards for {updated} {collection} documents")
+    return updated
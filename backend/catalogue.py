@@ -0,0 +1,64 @@
+import logging
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+import cards
+import lifecycle
+import reviews
+import stats
+import invalidation
+from search import search_fields
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_COLLECTIONS = ("vendors", "vendor_offers", "tourism_events")
+# Stored by derived_fields for search, lists and ranking; not part of the API documents
+INTERNAL_FIELDS = (
+    "card", "card_summary", "location_norm", "location_tokens", "search_keywords", "search_version",
+    "rating_sum", "ranking_score",
+)
+DETAIL_PROJECTION = {"_id": 0, **{field: 0 for field in INTERNAL_FIELDS}}
+
+_RECORDERS = {
+    "vendors": stats.record_vendor,
+    "vendor_offers": stats.record_offer,
+    "tourism_events": stats.record_event,
+}
+
+
+def derived_fields(collection: str, doc: dict) -> dict:
+    """Fields computed from a catalogue document at write time."""
+    derived = search_fields(collection, doc)
+    derived.update(lifecycle.lifecycle_fields(collection, doc))
+    derived.update(cards.card_fields(collection, doc))
+    if collection == "vendors":
+        derived.update(reviews.rating_fields(doc))
+    return derived
+
+
+def prepare_document(collection: str, doc: dict) -> dict:
+    doc.update(derived_fields(collection, doc))
+    return doc
+
+
+async def after_insert(db, collection: str, doc: dict):
+    """Counters and cache invalidation following a single catalogue insert."""
+    await _RECORDERS[collection](db, doc)
+    await invalidation.publish(db, collection)
+
+
+async def after_bulk_write(db, collections):
+    """Bulk upserts can flip existing documents, so recount rather than ``$inc``."""
+    await stats.reconcile(db, include_sketch=False)
+    await invalidation.publish(db, *collections)
+
+
+async def ensure_catalogue_indexes(db):
+    for collection in CATALOGUE_COLLECTIONS:
+        try:
+            await db[collection].create_index([("id", ASCENDING)], unique=True)
+        except OperationFailure as e:
+            # Pre-existing duplicate ids; bulk upserts still work, just without the guarantee.
+            logger.error(f"Could not create unique id index on {collection}: {str(e)}")
+            await db[collection].create_index([("id", ASCENDING)])
@@ -0,0 +1,139 @@
+import logging
+import math
+import os
+from typing import List
+
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+LAYOUT = os.environ.get("CHAT_STORAGE", "document")
+BUCKET_SIZE = int(os.environ.get("CHAT_BUCKET_SIZE", "50"))
+CONTEXT_TURNS = int(os.environ.get("CHAT_CONTEXT_TURNS", "0"))
+
+# Fields repeated on every turn in the document layout; buckets store them once.
+BUCKET_METADATA_FIELDS = ("ai_model", "conversation_context")
+TURN_FIELDS = ("user_message", "ai_response", "timestamp", "message_length", "response_length")
+
+
+class ChatStore:
+    """Reads and writes chat turns in either storage layout.
+
+    ``document`` keeps one ``chat_history`` document per turn (written through
+    the write-behind buffer). ``bucket`` appends turns with ``$push`` into
+    ``chat_buckets`` documents holding up to ``bucket_size`` turns of one
+    session, so recent history is one or two documents away.
+    """
+
+    def __init__(self, db, write_buffer, layout: str = LAYOUT, bucket_size: int = BUCKET_SIZE):
+        if layout not in ("document", "bucket"):
+            raise ValueError(f"Unknown CHAT_STORAGE layout: {layout}")
+        self.db = db
+        self.write_buffer = write_buffer
+        self.layout = layout
+        self.bucket_size = bucket_size
+
+    async def ensure_indexes(self):
+        await self.db.chat_history.create_index([("session_id", ASCENDING), ("timestamp", DESCENDING)])
+        await self.db.chat_buckets.create_index([("session_id", ASCENDING), ("last_timestamp", DESCENDING)])
+        await self.db.chat_buckets.create_index([("session_id", ASCENDING), ("count", ASCENDING)])
+
+    async def append(self, turn: dict):
+        if self.layout == "document":
+            await self.write_buffer.insert("chat_history", turn)
+            return
+
+        # Concurrent first writes for a session may each open a bucket; that
+        # only leaves one bucket partially filled.
+        await self.db.chat_buckets.update_one(
+            {"session_id": turn["session_id"], "count": {"$lt": self.bucket_size}},
+            {
+                "$push": {"turns": {field: turn.get(field) for field in TURN_FIELDS}},
+                "$inc": {"count": 1},
+                "$min": {"first_timestamp": turn["timestamp"]},
+                "$max": {"last_timestamp": turn["timestamp"]},
+                "$setOnInsert": {field: turn.get(field) for field in BUCKET_METADATA_FIELDS},
+            },
+            upsert=True,
+        )
+
+    async def recent(self, session_id: str, limit: int) -> List[dict]:
+        """Return up to ``limit`` most recent turns in chronological order."""
+        if limit <= 0:
+            return []
+        if self.layout == "document":
+            turns = await self.db.chat_history.find(
+                {"session_id": session_id}
+            ).sort("timestamp", -1).limit(limit).to_list(limit)
+            return list(reversed(turns))
+
+        # Buckets are filled in order, so at most one extra (partial) bucket is needed.
+        max_buckets = math.ceil(limit / self.bucket_size) + 1
+        buckets = await self.db.chat_buckets.find(
+            {"session_id": session_id}
+        ).sort("last_timestamp", -1).limit(max_buckets).to_list(max_buckets)
+        turns = []
+        for bucket in reversed(buckets):
+            turns.extend(bucket.get("turns", []))
+        turns.sort(key=lambda turn: turn["timestamp"])
+        return turns[-limit:]
+
+
+def context_prompt(history: List[dict], message: str) -> str:
+    """Prefix the user's message with recent turns for conversational context."""
+    if not history:
+        return message
+    lines = ["Previous conversation:"]
+    for turn in history:
+        lines.append(f"Traveler: {turn.get('user_message')}")
+        lines.append(f"TraveAI: {turn.get('ai_response')}")
+    lines.append("")
+    lines.append(f"Current question: {message}")
+    return "\n".join(lines)
+
+
+async def migrate_to_buckets(db, bucket_size: int = BUCKET_SIZE, batch_size: int = 1000) -> dict:
+    """Copy ``chat_history`` into ``chat_buckets``, one session at a time.
+
+    Each bucket takes the ``_id`` of its first turn, so a re-run replaces
+    exactly the buckets it copies and nothing else. Run it before switching ``CHAT_STORAGE`` to ``bucket``; the
+    source collection is left in place.
+    """
+    migrated = {"sessions": 0, "turns": 0, "buckets": 0}
+    no_session = object()
+    session_id = no_session
+    buckets: List[dict] = []
+
+    async def flush_session():
+        if session_id is no_session:
+            return
+        if buckets:
+            await db.chat_buckets.delete_many({"_id": {"$in": [bucket["_id"] for bucket in buckets]}, "migrated": True})
+            await db.chat_buckets.insert_many(buckets, ordered=False)
+        migrated["sessions"] += 1
+        migrated["buckets"] += len(buckets)
+
+    # Walks the (session_id, timestamp desc) index backwards.
+    cursor = db.chat_history.find({}).sort([("session_id", DESCENDING), ("timestamp", ASCENDING)])
+    async for doc in cursor.batch_size(batch_size):
+        if doc.get("session_id") != session_id:
+            await flush_session()
+            session_id = doc.get("session_id")
+            buckets = []
+        if not buckets or buckets[-1]["count"] >= bucket_size:
+            buckets.append({
+                "_id": doc["_id"],
+                "session_id": session_id,
+                "turns": [],
+                "count": 0,
+                "first_timestamp": doc.get("timestamp"),
+                "migrated": True,
+                **{field: doc.get(field) for field in BUCKET_METADATA_FIELDS},
+            })
+        bucket = buckets[-1]
+        bucket["turns"].append({field: doc.get(field) for field in TURN_FIELDS})
+        bucket["count"] += 1
+        bucket["last_timestamp"] = doc.get("timestamp")
+        migrated["turns"] += 1
+    await flush_session()
+    return migrated
@@ -0,0 +1,207 @@
+import hashlib
+import logging
+import os
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from bson.binary import Binary
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, zlib is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_VERSION = 1
+ALGORITHM = os.environ.get("TEXT_CODEC", "zstd" if zstandard else "zlib")
+MIN_SIZE = int(os.environ.get("TEXT_CODEC_MIN_SIZE", "512"))
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+# zlib can only reference the last 32 KB of a preset dictionary.
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+# Large generated-text fields that are stored compressed.
+COMPRESSED_FIELDS = {
+    "itineraries": ("generated_itinerary",),
+    "route_analyses": ("ai_detailed_analysis",),
+    "chat_history": ("ai_response",),
+}
+
+# dictionary id -> (algorithm, raw bytes); every dictionary ever used must
+# stay loaded so old documents remain readable.
+_dictionaries: Dict[str, Tuple[str, bytes]] = {}
+_active_dictionary: Optional[str] = None
+
+
+def _compress(data: bytes, algorithm: str, dictionary: Optional[bytes]) -> bytes:
+    if algorithm == "zstd":
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data).compress(data)
+    if dictionary:
+        compressor = zlib.compressobj(ZLIB_LEVEL, zlib.DEFLATED, 15, 9, zlib.Z_DEFAULT_STRATEGY, dictionary)
+    else:
+        compressor = zlib.compressobj(ZLIB_LEVEL)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(data: bytes, algorithm: str, dictionary: Optional[bytes]) -> bytes:
+    if algorithm == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed text")
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def encode_text(text: Optional[str], algorithm: Optional[str] = None):
+    """Compress ``text`` into a versioned subdocument, or return it unchanged.
+
+    Short strings and ``TEXT_CODEC=none`` are stored as plain strings, which is
+    also how every document written before this codec existed looks.
+    """
+    algorithm = algorithm or ALGORITHM
+    if not isinstance(text, str) or algorithm == "none":
+        return text
+    raw = text.encode("utf-8")
+    if len(raw) < MIN_SIZE:
+        return text
+
+    dictionary_id = None
+    dictionary = None
+    if _active_dictionary and _dictionaries[_active_dictionary][0] == algorithm:
+        dictionary_id = _active_dictionary
+        dictionary = _dictionaries[dictionary_id][1]
+    compressed = _compress(raw, algorithm, dictionary)
+    if len(compressed) >= len(raw):
+        return text
+    return {
+        "_codec": CODEC_VERSION,
+        "alg": algorithm,
+        "dict": dictionary_id,
+        "size": len(raw),
+        "data": Binary(compressed),
+    }
+
+
+def decode_text(value):
+    """Return the plain string for a value written by ``encode_text`` (or before it)."""
+    if not isinstance(value, dict) or "_codec" not in value:
+        return value
+    return decode_bytes(value).decode("utf-8")
+
+
+def encode_bytes(raw: bytes, algorithm: Optional[str] = None) -> dict:
+    """Compress arbitrary bytes (no dictionary) into the same versioned envelope."""
+    algorithm = algorithm or ALGORITHM
+    if algorithm == "none":
+        algorithm = "zlib"
+    return {
+        "_codec": CODEC_VERSION,
+        "alg": algorithm,
+        "dict": None,
+        "size": len(raw),
+        "data": Binary(_compress(raw, algorithm, None)),
+    }
+
+
+def decode_bytes(value: dict) -> bytes:
+    dictionary = None
+    if value.get("dict"):
+        if value["dict"] not in _dictionaries:
+            raise KeyError(f"Compression dictionary {value['dict']} is not loaded")
+        dictionary = _dictionaries[value["dict"]][1]
+    return _decompress(bytes(value["data"]), value["alg"], dictionary)
+
+
+async def decode_many(db, docs, fields: Iterable[str]):
+    """Decode ``fields`` of ``docs`` in place, loading unknown dictionaries first.
+
+    Another worker (or the CLI) may have activated a dictionary after this
+    process started, so missing ids are fetched on demand.
+    """
+    fields = tuple(fields)
+    missing = {
+        doc[field]["dict"]
+        for doc in docs
+        for field in fields
+        if isinstance(doc.get(field), dict) and doc[field].get("dict") and doc[field]["dict"] not in _dictionaries
+    }
+    if missing:
+        async for entry in db.codec_dictionaries.find({"_id": {"$in": list(missing)}}):
+            _dictionaries[entry["_id"]] = (entry["alg"], bytes(entry["data"]))
+    for doc in docs:
+        for field in fields:
+            if field in doc:
+                doc[field] = decode_text(doc[field])
+    return docs
+
+
+def encode_fields(collection: str, doc: dict) -> dict:
+    """Compress the configured large text fields of ``doc`` in place."""
+    for field in COMPRESSED_FIELDS.get(collection, ()):
+        if field in doc:
+            doc[field] = encode_text(doc[field])
+    return doc
+
+
+def train_dictionary(samples: Iterable[str], algorithm: Optional[str] = None, size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """Build a preset dictionary from past generated outputs.
+
+    zstd has a proper trainer. For zlib the dictionary is the most repeated
+    lines (headings, emoji boilerplate), with the most common ones last since
+    deflate encodes nearer matches more cheaply.
+    """
+    algorithm = algorithm or ALGORITHM
+    samples = [sample.encode("utf-8") for sample in samples if sample]
+    if algorithm == "zstd":
+        return zstandard.train_dictionary(size, samples).as_bytes()
+
+    counts = Counter(
+        line.strip()
+        for sample in samples
+        for line in sample.splitlines()
+        if len(line.strip()) >= 8
+    )
+    dictionary = b""
+    for line, count in counts.most_common():
+        if count < 2 or len(dictionary) + len(line) + 1 > size:
+            break
+        dictionary = line + b"\n" + dictionary
+    return dictionary
+
+
+async def load_dictionaries(db):
+    """Load every stored dictionary and select the newest active one for writes."""
+    global _active_dictionary
+    active = None
+    async for doc in db.codec_dictionaries.find({}).sort("created_at", 1):
+        _dictionaries[doc["_id"]] = (doc["alg"], bytes(doc["data"]))
+        if doc.get("active"):
+            active = doc["_id"]
+    _active_dictionary = active
+
+
+async def store_dictionary(db, dictionary: bytes, algorithm: Optional[str] = None, activate: bool = True) -> str:
+    algorithm = algorithm or ALGORITHM
+    dictionary_id = f"{algorithm}-{hashlib.sha256(dictionary).hexdigest()[:12]}"
+    if activate:
+        await db.codec_dictionaries.update_many({}, {"$set": {"active": False}})
+    await db.codec_dictionaries.update_one(
+        {"_id": dictionary_id},
+        {
+            "$set": {"active": activate},
+            "$setOnInsert": {
+                "alg": algorithm,
+                "data": Binary(dictionary),
+                "size": len(dictionary),
+                "created_at": datetime.utcnow(),
+            },
+        },
+        upsert=True,
+    )
+    await load_dictionaries(db)
+    return dictionary_id
@@ -0,0 +1,164 @@
+import os
+import re
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip is always available
+    brotli = None
+
+MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+# Quality 4-5 keeps Brotli's CPU close to gzip -6 for dynamic responses.
+BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "5"))
+ALGORITHMS = [
+    name.strip()
+    for name in os.environ.get("COMPRESSION_ALGORITHMS", "br,gzip").split(",")
+    if name.strip() and (name.strip() != "br" or brotli is not None)
+]
+
+# Content types worth compressing; everything else (images, archives, gzip
+# exports, video) is passed through untouched.
+COMPRESSIBLE_TYPES = re.compile(
+    r"^(text/|application/(json|x-ndjson|javascript|xml|problem\+json)|image/svg\+xml)"
+)
+
+# Each encoding gets its own strong ETag, e.g. "abc" -> "abc-br".
+ETAG_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+_ETAG_SUFFIX = re.compile(r'-(?:br|gz)"')
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the first configured algorithm the client accepts (q > 0)."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for algorithm in ALGORITHMS:
+        if accepted.get(algorithm, accepted.get("*", 0.0)) > 0:
+            return algorithm
+    return None
+
+
+class _Encoder:
+    def __init__(self, algorithm: str):
+        self.algorithm = algorithm
+        if algorithm == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._gzip = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        """Compress ``data``; with ``flush`` everything so far is emitted so streams stay live."""
+        if self.algorithm == "br":
+            return self._brotli.process(data) + (self._brotli.flush() if flush else b"")
+        return self._gzip.compress(data) + (self._gzip.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.algorithm == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._gzip.compress(data) + self._gzip.flush()
+
+
+def _tag_etag(headers: MutableHeaders, algorithm: str):
+    etag = headers.get("etag")
+    if etag and etag.endswith('"'):
+        headers["ETag"] = etag[:-1] + ETAG_SUFFIXES[algorithm] + '"'
+
+
+class CompressionMiddleware:
+    """gzip / Brotli response compression with a size threshold and type rules.
+
+    Single-body responses below ``MIN_SIZE`` are left alone. Streaming
+    responses are compressed chunk by chunk and flushed after each one.
+    Incoming ``If-None-Match`` values have their encoding suffix stripped so
+    the ETag logic behind this middleware sees the identity ETag.
+    """
+
+    def __init__(self, app, min_size: int = MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        algorithm = negotiate(request_headers.get("accept-encoding"))
+        if algorithm is None:
+            await self.app(scope, receive, send)
+            return
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and _ETAG_SUFFIX.search(if_none_match):
+            scope = dict(scope)
+            headers = MutableHeaders(scope=scope)
+            headers["if-none-match"] = _ETAG_SUFFIX.sub('"', if_none_match)
+
+        start = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                compressible = (
+                    COMPRESSIBLE_TYPES.match(content_type) is not None
+                    and "content-encoding" not in headers
+                )
+                if compressible:
+                    MutableHeaders(scope=start).add_vary_header("Accept-Encoding")
+                if start["status"] == 304 and if_none_match and ETAG_SUFFIXES[algorithm] + '"' in if_none_match:
+                    # 304s carry no body or type; echo the encoded ETag the client validated with.
+                    _tag_etag(MutableHeaders(scope=start), algorithm)
+                passthrough = not compressible or start["status"] < 200 or start["status"] in (204, 304)
+                if passthrough:
+                    await send(start)
+                return
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body and len(body) < self.min_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = _Encoder(algorithm)
+                headers = MutableHeaders(scope=start)
+                headers["Content-Encoding"] = algorithm
+                _tag_etag(headers, algorithm)
+                if more_body:
+                    del headers["content-length"]
+                    await send(start)
+                else:
+                    compressed = encoder.finish(body)
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+            if more_body:
+                chunk = encoder.compress(body, flush=True)
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": encoder.finish(body)})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,218 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "100"))
+MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0"))
+MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MAX_CONNECTING = int(os.environ.get("MONGO_MAX_CONNECTING", "2"))
+WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+SOCKET_TIMEOUT_MS = int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", "0"))
+# Secondaries lagging further than this are skipped by non-primary reads (minimum 90).
+MAX_STALENESS_SECONDS = int(os.environ.get("MONGO_MAX_STALENESS_SECONDS", "-1"))
+# Caches reloaded this soon after an invalidation read from the primary, so a
+# lagging secondary cannot hand back (and pin for a full TTL) pre-write data.
+PRIMARY_READ_AFTER_WRITE_SECONDS = float(os.environ.get("MONGO_PRIMARY_READ_AFTER_WRITE_SECONDS", "30"))
+
+
+def _available_compressors() -> str:
+    """Wire compressors in preference order, limited to what is installed."""
+    compressors = []
+    try:
+        import zstandard  # noqa: F401
+        compressors.append("zstd")
+    except ImportError:
+        pass
+    try:
+        import snappy  # noqa: F401
+        compressors.append("snappy")
+    except ImportError:
+        pass
+    compressors.append("zlib")
+    return ",".join(compressors)
+
+
+COMPRESSORS = os.environ.get("MONGO_COMPRESSORS", _available_compressors())
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Route class -> read preference. "list" covers catalogue, explore, search and
+# history listings; "analytics" covers dashboard counters, trending, exports
+# and other heavy aggregations. Writes always go to the primary.
+ROUTE_READ_PREFERENCES = {
+    "primary": "primary",
+    "list": os.environ.get("MONGO_READ_PREFERENCE_LIST", "secondaryPreferred"),
+    "analytics": os.environ.get("MONGO_READ_PREFERENCE_ANALYTICS", "secondaryPreferred"),
+}
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters, including how long checkouts waited.
+
+    A checkout starts and finishes on the same driver thread, so the start
+    time is kept thread-locally.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checked_out = 0
+        self.connections = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.failure_reasons: Dict[str, int] = {}
+
+    def _wait_ms(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._wait_ms()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.wait_total_ms += waited
+            self.wait_max_ms = max(self.wait_max_ms, waited)
+
+    def connection_check_out_failed(self, event):
+        self._wait_ms()
+        with self._lock:
+            self.checkout_failures += 1
+            self.failure_reasons[str(event.reason)] = self.failure_reasons.get(str(event.reason), 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "max_pool_size": MAX_POOL_SIZE,
+                "connections": self.connections,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "failure_reasons": dict(self.failure_reasons),
+                "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "compressors": COMPRESSORS,
+                "read_preferences": dict(ROUTE_READ_PREFERENCES),
+            }
+
+    def exposition(self):
+        snapshot = self.snapshot()
+        return [
+            "# HELP mongodb_pool_connections Open connections in the driver pool.",
+            "# TYPE mongodb_pool_connections gauge",
+            f"mongodb_pool_connections {snapshot['connections']}",
+            "# HELP mongodb_pool_checked_out Connections currently checked out.",
+            "# TYPE mongodb_pool_checked_out gauge",
+            f"mongodb_pool_checked_out {snapshot['checked_out']}",
+            "# HELP mongodb_pool_checkouts_total Connection checkouts.",
+            "# TYPE mongodb_pool_checkouts_total counter",
+            f"mongodb_pool_checkouts_total {snapshot['checkouts']}",
+            "# HELP mongodb_pool_checkout_failures_total Failed connection checkouts.",
+            "# TYPE mongodb_pool_checkout_failures_total counter",
+            f"mongodb_pool_checkout_failures_total {snapshot['checkout_failures']}",
+            "# HELP mongodb_pool_wait_max_seconds Longest checkout wait so far.",
+            "# TYPE mongodb_pool_wait_max_seconds gauge",
+            f"mongodb_pool_wait_max_seconds {snapshot['wait_max_ms'] / 1000}",
+        ]
+
+
+pool_metrics = PoolMetrics()
+metrics.register_collector(pool_metrics.exposition)
+
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": MAX_POOL_SIZE,
+        "minPoolSize": MIN_POOL_SIZE,
+        "maxIdleTimeMS": MAX_IDLE_TIME_MS,
+        "maxConnecting": MAX_CONNECTING,
+        "waitQueueTimeoutMS": WAIT_QUEUE_TIMEOUT_MS,
+        "connectTimeoutMS": CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": SERVER_SELECTION_TIMEOUT_MS,
+        "compressors": COMPRESSORS,
+    }
+    if SOCKET_TIMEOUT_MS:
+        options["socketTimeoutMS"] = SOCKET_TIMEOUT_MS
+    return options
+
+
+def create_client(mongo_url: Optional[str] = None) -> AsyncIOMotorClient:
+    """Motor client with the configured pool, timeouts, compression, pool and command metrics."""
+    return AsyncIOMotorClient(
+        mongo_url or os.environ["MONGO_URL"],
+        event_listeners=[pool_metrics, metrics.command_metrics],
+        **client_options(),
+    )
+
+
+def read_preference(route_class: str):
+    name = ROUTE_READ_PREFERENCES[route_class]
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference for {route_class} reads: {name}")
+    if name == "primary":
+        return Primary()
+    if MAX_STALENESS_SECONDS > 0:
+        return READ_PREFERENCES[name](max_staleness=MAX_STALENESS_SECONDS)
+    return READ_PREFERENCES[name]()
+
+
+def get_database(client: AsyncIOMotorClient, name: str, route_class: str = "primary"):
+    """Database handle whose reads are routed according to ``route_class``."""
+    return client.get_database(name, read_preference=read_preference(route_class))
@@ -0,0 +1,164 @@
+import base64
+import json
+import logging
+import os
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+from bson.binary import Binary
+
+import chat_store
+import codec
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "500"))
+GZIP_LEVEL = 6
+
+# exportable collection -> (date field used for range filters, session scoped)
+EXPORT_COLLECTIONS = {
+    "itineraries": ("created_at", True),
+    "chat_history": ("timestamp", True),
+    "route_analyses": ("created_at", True),
+    "session_summaries": ("last_activity_at", True),
+    "vendors": ("created_at", False),
+    "vendor_offers": ("created_at", False),
+    "tourism_events": ("created_at", False),
+    "vendor_reviews": ("created_at", False),
+}
+SESSION_COLLECTIONS = ("itineraries", "chat_history", "route_analyses")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (Binary, bytes)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Stored datetimes come back from Motor as naive UTC; compare like with like."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def build_query(
+    collection: str,
+    session_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict:
+    if collection not in EXPORT_COLLECTIONS:
+        raise ValueError(f"Unknown export collection: {collection}")
+    date_field, session_scoped = EXPORT_COLLECTIONS[collection]
+    query = {}
+    if session_id:
+        if not session_scoped:
+            raise ValueError(f"{collection} cannot be filtered by session")
+        query["session_id"] = session_id
+    if since or until:
+        query[date_field] = {}
+        if since:
+            query[date_field]["$gte"] = _naive_utc(since)
+        if until:
+            query[date_field]["$lt"] = _naive_utc(until)
+    return query
+
+
+def _bucket_query(query: dict) -> dict:
+    """Translate a turn-level chat query to the buckets that may hold matching turns."""
+    bucket_query = {key: value for key, value in query.items() if key != "timestamp"}
+    window = query.get("timestamp", {})
+    if "$gte" in window:
+        bucket_query["last_timestamp"] = {"$gte": window["$gte"]}
+    if "$lt" in window:
+        bucket_query["first_timestamp"] = {"$lt": window["$lt"]}
+    return bucket_query
+
+
+def _in_window(turn: dict, window: dict) -> bool:
+    timestamp = turn.get("timestamp")
+    if timestamp is not None:
+        timestamp = _naive_utc(timestamp)
+    if "$gte" in window and (timestamp is None or timestamp < _naive_utc(window["$gte"])):
+        return False
+    if "$lt" in window and (timestamp is None or timestamp >= _naive_utc(window["$lt"])):
+        return False
+    return True
+
+
+async def iter_batches(db, collection: str, query: dict, batch_size: int = BATCH_SIZE) -> AsyncIterator[List[dict]]:
+    """Yield decoded documents ``batch_size`` at a time straight off a Motor cursor.
+
+    Chat history is exported as one document per turn whichever
+    ``CHAT_STORAGE`` layout is in use.
+    """
+    if collection == "chat_history" and chat_store.LAYOUT == "bucket":
+        window = query.get("timestamp", {})
+        # A bucket is inserted with its first turn, so _id order follows first_timestamp
+        # order and is served by the _id index
+        cursor = db.chat_buckets.find(_bucket_query(query)).sort("_id", 1).batch_size(batch_size)
+        batch = []
+        async for bucket in cursor:
+            metadata = {field: bucket.get(field) for field in chat_store.BUCKET_METADATA_FIELDS}
+            for turn in bucket.get("turns", []):
+                if _in_window(turn, window):
+                    batch.append({"session_id": bucket["session_id"], **metadata, **turn})
+            if len(batch) >= batch_size:
+                yield await codec.decode_many(db, batch, codec.COMPRESSED_FIELDS["chat_history"])
+                batch = []
+        if batch:
+            yield await codec.decode_many(db, batch, codec.COMPRESSED_FIELDS["chat_history"])
+        return
+
+    fields = codec.COMPRESSED_FIELDS.get(collection, ())
+    cursor = db[collection].find(query).sort("_id", 1).batch_size(batch_size)
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield await codec.decode_many(db, batch, fields)
+            batch = []
+    if batch:
+        yield await codec.decode_many(db, batch, fields)
+
+
+async def export_ndjson(
+    db,
+    queries: Dict[str, dict],
+    gzip: bool = False,
+    batch_size: int = BATCH_SIZE,
+    tag_collection: bool = False,
+) -> AsyncIterator[bytes]:
+    """Stream each ``collection: query`` pair as NDJSON, one chunk per cursor batch.
+
+    Build ``queries`` with ``build_query`` before starting the response so
+    bad filters fail with a status code instead of a truncated stream. With
+    ``tag_collection`` each line carries a ``_collection`` key so several
+    collections can share one stream.
+    """
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if gzip else None
+    exported = 0
+    for collection, query in queries.items():
+        async for batch in iter_batches(db, collection, query, batch_size):
+            lines = []
+            for doc in batch:
+                if tag_collection:
+                    doc["_collection"] = collection
+                lines.append(json.dumps(doc, default=_json_default, ensure_ascii=False))
+            exported += len(lines)
+            chunk = ("\n".join(lines) + "\n").encode("utf-8")
+            if compressor:
+                chunk = compressor.compress(chunk)
+                if not chunk:
+                    continue
+            yield chunk
+    if compressor:
+        yield compressor.flush()
+    logger.info(f"📤 Exported {exported} documents from {', '.join(queries)}")
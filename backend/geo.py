@@ -0,0 +1,93 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import metrics
+import timing
+
+CACHE_SIZE = int(os.environ.get("GEOCODE_CACHE_SIZE", "2048"))
+# Place coordinates do not move; the TTL only bounds how long a miss is remembered.
+CACHE_TTL_SECONDS = float(os.environ.get("GEOCODE_CACHE_TTL_SECONDS", "86400"))
+# Nominatim's usage policy allows at most one request per second
+MIN_INTERVAL_SECONDS = float(os.environ.get("GEOCODE_MIN_INTERVAL_SECONDS", "1"))
+TIMEOUT_SECONDS = float(os.environ.get("GEOCODE_TIMEOUT_SECONDS", "5"))
+
+Coordinates = Tuple[float, float]
+
+# geopy is imported on first use (or by warmup) to keep it out of server startup
+_geolocator = None
+_cache: "OrderedDict[str, Tuple[float, Optional[Coordinates]]]" = OrderedDict()
+_throttle = asyncio.Lock()
+_last_request = 0.0
+
+
+def _get_geolocator():
+    global _geolocator
+    if _geolocator is None:
+        from geopy.geocoders import Nominatim
+
+        _geolocator = Nominatim(user_agent="traveai_app", timeout=TIMEOUT_SECONDS)
+    return _geolocator
+
+
+def distance_km(origin: Coordinates, destination: Coordinates) -> float:
+    from geopy.distance import geodesic
+
+    return geodesic(origin, destination).kilometers
+
+
+async def warmup():
+    await asyncio.to_thread(_get_geolocator)
+
+
+def _cached(key: str):
+    """``(True, coordinates)`` for a live cache entry, else ``(False, None)``."""
+    entry = _cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        _cache.move_to_end(key)
+        return True, entry[1]
+    return False, None
+
+
+async def geocode(query: str) -> Optional[Coordinates]:
+    """(latitude, longitude) for ``query``, or None if Nominatim does not know it.
+
+    Results (including "not found") are kept in a bounded LRU. Only misses
+    reach Nominatim: one request at a time per worker, at least
+    ``MIN_INTERVAL_SECONDS`` apart, in a worker thread since geopy blocks.
+    """
+    global _last_request
+    key = " ".join(query.lower().split())
+    hit, coordinates = _cached(key)
+    if hit:
+        metrics.geocoder_lookups.inc("hit")
+        return coordinates
+
+    async with _throttle:
+        # Another request may have looked this place up while we waited
+        hit, coordinates = _cached(key)
+        if hit:
+            metrics.geocoder_lookups.inc("hit")
+            return coordinates
+        metrics.geocoder_lookups.inc("miss")
+        wait = _last_request + MIN_INTERVAL_SECONDS - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        started = time.perf_counter()
+        try:
+            with timing.span(timing.GEOCODE):
+                location = await asyncio.to_thread(_get_geolocator().geocode, query)
+        except Exception:
+            metrics.geocoder_errors.inc()
+            raise
+        finally:
+            _last_request = time.monotonic()
+            metrics.geocoder_latency.observe(time.perf_counter() - started)
+    coordinates = (location.latitude, location.longitude) if location else None
+    _cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, coordinates)
+    _cache.move_to_end(key)
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return coordinates
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from starlette.responses import Response
+
+import database
+import llm
+import startup
+from responses import dumps
+
+logger = logging.getLogger(__name__)
+
+PROBE_INTERVAL_SECONDS = float(os.environ.get("HEALTH_PROBE_INTERVAL_SECONDS", "5"))
+MONGO_PING_TIMEOUT_SECONDS = float(os.environ.get("HEALTH_MONGO_PING_TIMEOUT_SECONDS", "2"))
+# Saturation thresholds; crossing any makes the worker unready
+POOL_SATURATION = float(os.environ.get("HEALTH_POOL_SATURATION", "0.9"))
+QUEUE_SATURATION = float(os.environ.get("HEALTH_QUEUE_SATURATION", "0.8"))
+MAX_LOOP_LAG_MS = float(os.environ.get("HEALTH_MAX_LOOP_LAG_MS", "500"))
+# With 0 the LLM check is reported but never makes the worker unready
+LLM_REQUIRED = os.environ.get("HEALTH_LLM_REQUIRED", "1") == "1"
+# Results older than this (e.g. the prober is stuck) count as unready
+MAX_RESULT_AGE_SECONDS = float(os.environ.get("HEALTH_MAX_RESULT_AGE_SECONDS", str(PROBE_INTERVAL_SECONDS * 3)))
+
+LIVE_BODY = dumps({"status": "alive"})
+
+
+class ReadinessProber:
+    """Checks dependencies in the background and keeps the verdict as encoded bytes.
+
+    Every ``interval`` seconds it pings MongoDB, reads the connection pool,
+    write-behind queue and LLM circuit state, notes how late its own sleep
+    woke up (event loop lag) and whether the required startup backfills
+    have finished.
+    ``response()`` only returns the cached body, so orchestrator probes add no
+    load of their own.
+    """
+
+    def __init__(self, db, write_buffer, interval: float = PROBE_INTERVAL_SECONDS):
+        self.db = db
+        self.write_buffer = write_buffer
+        self.interval = interval
+        self.checks: Dict[str, dict] = {}
+        self.ready = False
+        self.checked_at = 0.0
+        self._pool_failures = database.pool_metrics.checkout_failures
+        self.loop_lag_ms = 0.0
+        self._body = dumps({"status": "starting", "ready": False, "checks": {}})
+
+    async def _check_mongo(self) -> dict:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.db.command("ping"), timeout=MONGO_PING_TIMEOUT_SECONDS)
+        except Exception as e:
+            return {"ok": False, "error": str(e) or type(e).__name__}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    def _check_pool(self) -> dict:
+        snapshot = database.pool_metrics.snapshot()
+        utilisation = snapshot["checked_out"] / snapshot["max_pool_size"] if snapshot["max_pool_size"] else 0.0
+        new_failures = snapshot["checkout_failures"] - self._pool_failures
+        self._pool_failures = snapshot["checkout_failures"]
+        return {
+            "ok": utilisation < POOL_SATURATION and new_failures == 0,
+            "checked_out": snapshot["checked_out"],
+            "max_pool_size": snapshot["max_pool_size"],
+            "utilisation": round(utilisation, 3),
+            "checkout_failures_since_last_probe": new_failures,
+        }
+
+    def _check_write_buffer(self) -> dict:
+        depth = self.write_buffer.queue.qsize()
+        capacity = self.write_buffer.queue.maxsize
+        fill = depth / capacity if capacity else 0.0
+        return {
+            "ok": fill < QUEUE_SATURATION and (self.write_buffer.running or not self.write_buffer.enabled),
+            "queue_depth": depth,
+            "queue_capacity": capacity,
+            "running": self.write_buffer.running,
+        }
+
+    @staticmethod
+    def _check_llm() -> dict:
+        configured = bool(os.environ.get("GEMINI_API_KEY"))
+        return {
+            "ok": configured and not llm.circuit.is_open,
+            "configured": configured,
+            "circuit": llm.circuit.state,
+            "consecutive_failures": llm.circuit.consecutive_failures,
+        }
+
+    @staticmethod
+    def _check_startup() -> dict:
+        # Data backfills the read paths depend on (event status, cards, search fields)
+        return startup.required_status()
+
+    def _check_loop_lag(self) -> dict:
+        return {"ok": self.loop_lag_ms < MAX_LOOP_LAG_MS, "lag_ms": round(self.loop_lag_ms, 2)}
+
+    async def probe(self):
+        checks = {
+            "startup": self._check_startup(),
+            "event_loop": self._check_loop_lag(),
+            "mongodb": await self._check_mongo(),
+            "mongodb_pool": self._check_pool(),
+            "write_buffer": self._check_write_buffer(),
+            "llm": self._check_llm(),
+        }
+        ready = all(check["ok"] for name, check in checks.items() if name != "llm" or LLM_REQUIRED)
+        if ready != self.ready:
+            if ready:
+                logger.info("✅ Worker is ready")
+            else:
+                failing = ", ".join(name for name, check in checks.items() if not check["ok"])
+                logger.warning(f"⚠️ Worker is not ready: {failing}")
+        self.checks = checks
+        self.ready = ready
+        self.checked_at = time.monotonic()
+        self._body = dumps({
+            "status": "ready" if ready else "unready",
+            "ready": ready,
+            "checked_at": datetime.utcnow().isoformat(),
+            "checks": checks,
+        })
+
+    async def run(self):
+        while True:
+            try:
+                await self.probe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Readiness probe failed: {str(e)}")
+            # How late the loop wakes us up is how long other callbacks hogged it
+            wake_at = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.loop_lag_ms = max(0.0, time.perf_counter() - wake_at) * 1000
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready and time.monotonic() - self.checked_at < MAX_RESULT_AGE_SECONDS
+
+    def response(self) -> Response:
+        return Response(content=self._body, status_code=200 if self.is_ready else 503, media_type="application/json")
+
+    def database_status(self) -> Optional[str]:
+        mongo = self.checks.get("mongodb")
+        if mongo is None:
+            return None
+        return "Connected" if mongo["ok"] else "Unavailable"
+
+
+def live_response() -> Response:
+    return Response(content=LIVE_BODY, media_type="application/json")
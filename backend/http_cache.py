@@ -0,0 +1,132 @@
+import hashlib
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+class CachePolicy:
+    def __init__(self, max_age: int, stale_while_revalidate: int = 0, public: bool = True):
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.public = public
+
+    @property
+    def header(self) -> str:
+        parts = ["public" if self.public else "private", f"max-age={self.max_age}"]
+        if self.stale_while_revalidate:
+            parts.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        return ", ".join(parts)
+
+
+# GET routes whose responses may be cached by browsers and the CDN. Catalogue
+# writes become visible within max-age; the CDN may serve a stale copy for up
+# to stale-while-revalidate longer while it refetches in the background.
+ROUTE_POLICIES: List[Tuple[re.Pattern, CachePolicy]] = [
+    (re.compile(r"^/api/destinations$"), CachePolicy(max_age=300, stale_while_revalidate=3600)),
+    (re.compile(r"^/api/explore$"), CachePolicy(max_age=30, stale_while_revalidate=300)),
+    (re.compile(r"^/api/vendors/[^/]+$"), CachePolicy(max_age=60, stale_while_revalidate=600)),
+    (re.compile(r"^/api/vendor-offers/[^/]+$"), CachePolicy(max_age=60, stale_while_revalidate=600)),
+    (re.compile(r"^/api/tourism-events$"), CachePolicy(max_age=60, stale_while_revalidate=300)),
+]
+
+
+def policy_for(path: str) -> Optional[CachePolicy]:
+    for pattern, policy in ROUTE_POLICIES:
+        if pattern.match(path):
+            return policy
+    return None
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag from the response bytes."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def version_etag(kind: str, doc_id: str, updated_at: Optional[datetime]) -> str:
+    """Strong ETag from a document's identity and ``updated_at``, known before the body is built."""
+    version = updated_at.isoformat() if updated_at else "0"
+    return '"' + hashlib.blake2b(f"{kind}:{doc_id}:{version}".encode("utf-8"), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 for ``request`` if the client already holds ``etag``, else None."""
+    if not etag_matches(request.headers.get("if-none-match"), etag):
+        return None
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+class HTTPCacheMiddleware:
+    """ETag, Cache-Control and 304 handling for the routes in ``ROUTE_POLICIES``.
+
+    Endpoints that already know their version set ``ETag`` themselves (and
+    can answer 304 before touching the database); otherwise the body is
+    hashed here. Only successful GET responses are affected.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        policy = policy_for(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start = None
+        body = bytearray()
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                if start["status"] not in (200, 304):
+                    await send(start)
+                return
+            if start["status"] not in (200, 304):
+                await send(message)
+                return
+            body.extend(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            headers = MutableHeaders(scope=start)
+            etag = headers.get("etag") or content_etag(bytes(body))
+            headers["ETag"] = etag
+            headers["Cache-Control"] = policy.header
+            if start["status"] == 304 or etag_matches(if_none_match, etag):
+                for header in ("content-length", "content-type"):
+                    if header in headers:
+                        del headers[header]
+                start["status"] = 304
+                await send(start)
+                await send({"type": "http.response.body", "body": b""})
+                return
+            headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": bytes(body)})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from cache import invalidate_collections, registered_caches
+
+logger = logging.getLogger(__name__)
+
+# auto: change streams when the deployment supports them, otherwise polling.
+MODE = os.environ.get("CACHE_INVALIDATION", "auto")
+POLL_INTERVAL_SECONDS = float(os.environ.get("CACHE_INVALIDATION_POLL_MS", "1000")) / 1000
+RETRY_SECONDS = 5
+
+WATCHED_COLLECTIONS = ("vendors", "vendor_offers", "tourism_events")
+
+# Server error codes meaning change streams are unavailable on this deployment
+# (standalone server, or a storage engine / topology without an oplog).
+CHANGE_STREAMS_UNSUPPORTED = {40573, 40324, 13297}
+
+
+async def publish(db, *collections: str):
+    """Invalidate local caches and bump the version counters other workers poll.
+
+    Call after writing to any of ``collections``. Change-stream listeners
+    see the write itself, so the counters only matter in polling mode, but
+    bumping them is cheap and keeps mixed deployments consistent.
+    """
+    invalidate_collections(*collections)
+    try:
+        now = datetime.utcnow()
+        await asyncio.gather(*(
+            db.cache_versions.update_one(
+                {"_id": collection},
+                {"$inc": {"version": 1}, "$set": {"updated_at": now}},
+                upsert=True,
+            )
+            for collection in collections
+        ))
+    except Exception as e:
+        logger.error(f"Failed to publish cache invalidation for {', '.join(collections)}: {str(e)}")
+
+
+class InvalidationBus:
+    """Turns writes made by any process into ``invalidate_collections`` calls.
+
+    With change streams every insert, update or delete on the watched
+    collections is seen, including writes from tools that never call
+    ``publish``. Without a replica set the bus polls ``cache_versions``
+    instead, which only sees writers that publish.
+    """
+
+    def __init__(self, db, collections: Iterable[str] = WATCHED_COLLECTIONS, mode: str = MODE,
+                 poll_interval: float = POLL_INTERVAL_SECONDS):
+        if mode not in ("auto", "change_stream", "poll", "off"):
+            raise ValueError(f"Unknown CACHE_INVALIDATION mode: {mode}")
+        self.db = db
+        self.collections = tuple(collections)
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.active_mode: Optional[str] = None
+        self.events = 0
+        self.last_event_at: Optional[datetime] = None
+        self._versions: Optional[Dict[str, int]] = None
+
+    def _invalidate(self, *collections: str):
+        self.events += 1
+        self.last_event_at = datetime.utcnow()
+        invalidate_collections(*collections)
+
+    async def run(self):
+        if self.mode == "off":
+            return
+        if self.mode in ("auto", "change_stream"):
+            try:
+                await self._watch()
+            except OperationFailure as e:
+                if self.mode == "change_stream" or e.code not in CHANGE_STREAMS_UNSUPPORTED:
+                    raise
+                logger.info("🔁 Change streams unavailable, polling cache versions instead")
+        await self._poll()
+
+    async def _watch(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": list(self.collections)}}}]
+        resume_token = None
+        while True:
+            try:
+                async with self.db.watch(pipeline, resume_after=resume_token) as stream:
+                    if self.active_mode != "change_stream":
+                        self.active_mode = "change_stream"
+                        logger.info("🔁 Watching catalogue changes for cache invalidation")
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self._invalidate(change["ns"]["coll"])
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    raise
+                # Resume token no longer in the oplog: changes may have been missed.
+                logger.error(f"Change stream failed, restarting: {str(e)}")
+                resume_token = None
+                self._invalidate(*self.collections)
+                await asyncio.sleep(RETRY_SECONDS)
+            except PyMongoError as e:
+                logger.error(f"Change stream interrupted: {str(e)}")
+                await asyncio.sleep(RETRY_SECONDS)
+
+    async def _poll(self):
+        self.active_mode = "poll"
+        while True:
+            try:
+                versions = {
+                    doc["_id"]: doc["version"]
+                    async for doc in self.db.cache_versions.find({"_id": {"$in": list(self.collections)}})
+                }
+                if self._versions is not None:
+                    changed = [name for name, version in versions.items() if self._versions.get(name, 0) != version]
+                    if changed:
+                        self._invalidate(*changed)
+                self._versions = versions
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache version poll failed: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    def metrics(self) -> dict:
+        return {
+            "mode": self.active_mode or self.mode,
+            "events": self.events,
+            "last_event_at": self.last_event_at,
+            "caches": [cache.stats() for cache in registered_caches()],
+        }
@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+
+async def claim(db, name: str, interval_seconds: float) -> bool:
+    """Take the named lease if nobody has claimed it within ``interval_seconds``.
+
+    Lets one worker out of many run a periodic job per interval.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=interval_seconds)
+    try:
+        await db.job_leases.update_one(
+            {"_id": name, "$or": [{"claimed_at": {"$lt": cutoff}}, {"claimed_at": {"$exists": False}}]},
+            {"$set": {"claimed_at": now}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The lease document exists and is still held by another worker.
+        return False
+    return True
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo import ASCENDING, DESCENDING
+
+import stats
+import invalidation
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the scheduler's sleep, so offers created with an earlier
+# deadline (possibly by another worker) are picked up reasonably quickly.
+MAX_SLEEP_SECONDS = int(os.environ.get("LIFECYCLE_MAX_SLEEP_SECONDS", "60"))
+MIN_SLEEP_SECONDS = 1
+
+EVENT_ACTIVE = "active"
+EVENT_ARCHIVED = "archived"
+
+# Read paths filter on these alone and rely on the scheduler for the dates.
+ACTIVE_OFFER_FILTER = {"is_active": True}
+ACTIVE_EVENT_FILTER = {"status": EVENT_ACTIVE}
+
+# Full-collection indexes from before the partial ones below existed
+SUPERSEDED_INDEXES = {
+    "vendor_offers": ("is_active_1_category_1_created_at_-1", "is_active_1_location_tokens_1_created_at_-1"),
+}
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Clients may send offsets (e.g. a trailing ``Z``); MongoDB stores naive UTC."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def lifecycle_fields(collection: str, doc: dict, now: Optional[datetime] = None) -> dict:
+    """State implied by a document's dates at write time."""
+    now = _naive_utc(now or datetime.utcnow())
+    if collection == "vendor_offers" and doc.get("valid_until") and _naive_utc(doc["valid_until"]) < now:
+        return {"is_active": False}
+    if collection == "tourism_events" and doc.get("end_date"):
+        return {"status": EVENT_ARCHIVED if _naive_utc(doc["end_date"]) < now else EVENT_ACTIVE}
+    return {}
+
+
+async def _drop_indexes_if_exist(collection, names):
+    existing = await collection.index_information()
+    for name in names:
+        if name in existing:
+            await collection.drop_index(name)
+            logger.info(f"🧹 Dropped superseded index {collection.name}.{name}")
+
+
+async def ensure_lifecycle_indexes(db):
+    # Partial indexes only hold the live documents, so they stay small as history grows.
+    await db.vendor_offers.create_index(
+        [("created_at", DESCENDING)],
+        partialFilterExpression=ACTIVE_OFFER_FILTER,
+        name="active_offers_created_at",
+    )
+    await db.vendor_offers.create_index(
+        [("category", ASCENDING), ("created_at", DESCENDING)],
+        partialFilterExpression=ACTIVE_OFFER_FILTER,
+        name="active_offers_category_created_at",
+    )
+    await db.vendor_offers.create_index(
+        [("location_tokens", ASCENDING), ("created_at", DESCENDING)],
+        partialFilterExpression=ACTIVE_OFFER_FILTER,
+        name="active_offers_location_created_at",
+    )
+    await db.vendor_offers.create_index(
+        [("valid_until", ASCENDING)],
+        partialFilterExpression=ACTIVE_OFFER_FILTER,
+        name="active_offers_valid_until",
+    )
+    await db.tourism_events.create_index(
+        [("start_date", ASCENDING)],
+        partialFilterExpression=ACTIVE_EVENT_FILTER,
+        name="active_events_start_date",
+    )
+    await db.tourism_events.create_index(
+        [("is_featured", ASCENDING), ("start_date", ASCENDING)],
+        partialFilterExpression=ACTIVE_EVENT_FILTER,
+        name="active_events_featured_start_date",
+    )
+    await db.tourism_events.create_index(
+        [("end_date", ASCENDING)],
+        partialFilterExpression=ACTIVE_EVENT_FILTER,
+        name="active_events_end_date",
+    )
+    for collection, names in SUPERSEDED_INDEXES.items():
+        await _drop_indexes_if_exist(db[collection], names)
+
+
+async def backfill_event_status(db) -> int:
+    """Set ``status`` on events created before the field existed; list reads filter on it."""
+    now = datetime.utcnow()
+    active = await db.tourism_events.update_many(
+        {"status": {"$exists": False}, "end_date": {"$gte": now}},
+        {"$set": {"status": EVENT_ACTIVE}},
+    )
+    archived = await db.tourism_events.update_many(
+        {"status": {"$exists": False}, "end_date": {"$lt": now}},
+        {"$set": {"status": EVENT_ARCHIVED, "archived_at": now}},
+    )
+    updated = active.modified_count + archived.modified_count
+    if updated:
+        logger.info(f"🗓️ Set status on {updated} tourism events")
+        await invalidation.publish(db, "tourism_events")
+    return updated
+
+
+async def retire_expired(db) -> dict:
+    """Deactivate expired offers and archive finished events.
+
+    Both updates are idempotent, so every worker can run them; only the
+    worker whose update actually modified documents adjusts the counters
+    and publishes the invalidation to the other workers.
+    """
+    now = datetime.utcnow()
+    offers, events = await asyncio.gather(
+        db.vendor_offers.update_many(
+            {**ACTIVE_OFFER_FILTER, "valid_until": {"$lt": now}},
+            {"$set": {"is_active": False, "expired_at": now, "updated_at": now}},
+        ),
+        db.tourism_events.update_many(
+            {**ACTIVE_EVENT_FILTER, "end_date": {"$lt": now}},
+            {"$set": {"status": EVENT_ARCHIVED, "archived_at": now, "updated_at": now}},
+        ),
+    )
+    retired = {"offers": offers.modified_count, "events": events.modified_count}
+    if retired["offers"] or retired["events"]:
+        await stats.increment(db, active_offers=-retired["offers"], upcoming_events=-retired["events"])
+        await invalidation.publish(db, "vendor_offers", "tourism_events")
+        logger.info(f"⏰ Retired {retired['offers']} expired offers and archived {retired['events']} past events")
+    return retired
+
+
+async def next_deadline(db) -> Optional[datetime]:
+    offer, event = await asyncio.gather(
+        db.vendor_offers.find_one(ACTIVE_OFFER_FILTER, {"valid_until": 1}, sort=[("valid_until", ASCENDING)]),
+        db.tourism_events.find_one(ACTIVE_EVENT_FILTER, {"end_date": 1}, sort=[("end_date", ASCENDING)]),
+    )
+    deadlines = [d for d in (offer and offer.get("valid_until"), event and event.get("end_date")) if d]
+    return min(deadlines) if deadlines else None
+
+
+async def run_scheduler(db):
+    """Sleep until the next offer or event deadline, then retire what has passed."""
+    while True:
+        sleep_seconds = MAX_SLEEP_SECONDS
+        try:
+            await retire_expired(db)
+            deadline = await next_deadline(db)
+            if deadline:
+                until_deadline = (deadline - datetime.utcnow()).total_seconds()
+                sleep_seconds = max(MIN_SLEEP_SECONDS, min(MAX_SLEEP_SECONDS, until_deadline))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Offer lifecycle run failed: {str(e)}")
+        await asyncio.sleep(sleep_seconds)
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+
+import metrics
+import timing
+
+MODEL = "gemini-2.0-flash"
+# Consecutive failures that open the circuit, and how long it stays open
+CIRCUIT_FAILURES = int(os.environ.get("LLM_CIRCUIT_FAILURES", "5"))
+CIRCUIT_COOLDOWN_SECONDS = float(os.environ.get("LLM_CIRCUIT_COOLDOWN_SECONDS", "30"))
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """Fails LLM calls fast after ``failures`` consecutive errors, for ``cooldown`` seconds.
+
+    Once the cooldown passes calls go through again; the next success closes
+    the circuit, the next failure reopens it.
+    """
+
+    def __init__(self, failures: int = CIRCUIT_FAILURES, cooldown: float = CIRCUIT_COOLDOWN_SECONDS):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: float = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self.consecutive_failures >= self.failures and time.monotonic() - self.opened_at < self.cooldown
+
+    @property
+    def state(self) -> str:
+        if self.consecutive_failures < self.failures:
+            return "closed"
+        return "open" if self.is_open else "half_open"
+
+    def record_success(self):
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failures:
+            self.opened_at = time.monotonic()
+
+
+circuit = CircuitBreaker()
+
+# emergentintegrations pulls in litellm, which takes seconds to import; it is
+# loaded on the first LLM call or by warmup(), not when the server starts.
+_chat_module = None
+
+
+def _chat():
+    global _chat_module
+    if _chat_module is None:
+        from emergentintegrations.llm import chat
+
+        _chat_module = chat
+    return _chat_module
+
+
+async def load():
+    """Import the client stack in a worker thread; await before ``create_chat``/``user_message``."""
+    if _chat_module is None:
+        await asyncio.to_thread(_chat)
+
+
+def create_chat(api_key: str, session_id: str, system_message: str, max_tokens: int, model: str = MODEL):
+    return _chat().LlmChat(
+        api_key=api_key,
+        session_id=session_id,
+        system_message=system_message
+    ).with_model("gemini", model).with_max_tokens(max_tokens)
+
+
+def user_message(text: str):
+    return _chat().UserMessage(text=text)
+
+
+async def warmup(api_key: str):
+    """Import the LLM client stack off the event loop and build one client."""
+    await asyncio.to_thread(create_chat, api_key, "warmup", "", 1)
+
+
+async def send(chat, message, endpoint: str, model: str = MODEL) -> str:
+    """``chat.send_message(message)`` with latency, size and error metrics for ``endpoint``."""
+    if circuit.is_open:
+        metrics.llm_calls.inc(endpoint, model, "circuit_open")
+        raise CircuitOpenError("AI service is temporarily unavailable, please try again shortly")
+    prompt = getattr(message, "text", "") or ""
+    metrics.llm_characters.inc(endpoint, model, "prompt", amount=len(prompt))
+    metrics.llm_tokens.inc(endpoint, model, "prompt", amount=metrics.estimate_tokens(prompt))
+    metrics.llm_in_flight.inc(endpoint)
+    started = time.perf_counter()
+    try:
+        with timing.span(timing.LLM):
+            response = await chat.send_message(message)
+    except Exception:
+        circuit.record_failure()
+        metrics.llm_calls.inc(endpoint, model, "error")
+        raise
+    finally:
+        metrics.llm_in_flight.dec(endpoint)
+        metrics.llm_latency.observe(time.perf_counter() - started, endpoint, model)
+    circuit.record_success()
+    metrics.llm_calls.inc(endpoint, model, "ok")
+    metrics.llm_characters.inc(endpoint, model, "response", amount=len(response))
+    metrics.llm_tokens.inc(endpoint, model, "response", amount=metrics.estimate_tokens(response))
+    return response
@@ -0,0 +1,235 @@
+"""TraveAI maintenance CLI.
+
+Run from the backend directory, e.g. ``python manage.py reindex-search``.
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import typer
+from dotenv import load_dotenv
+
+from search import SEARCH_COLLECTIONS, ensure_search_indexes, reindex_collection
+import bulk_import
+import cards
+import catalogue
+import chat_store
+import codec
+import database
+import export
+import invalidation
+import retention
+import sessions
+import stats
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+cli = typer.Typer(help="TraveAI maintenance commands")
+
+
+def get_db():
+    client = database.create_client(os.environ['MONGO_URL'])
+    return client, client[os.environ['DB_NAME']]
+
+
+def run(coro_fn):
+    async def _main():
+        client, db = get_db()
+        try:
+            return await coro_fn(db)
+        finally:
+            client.close()
+
+    return asyncio.run(_main())
+
+
+@cli.command("reindex-search")
+def reindex_search():
+    """Create search indexes and recompute stored search fields."""
+    async def _run(db):
+        await ensure_search_indexes(db)
+        for collection in SEARCH_COLLECTIONS:
+            updated = await reindex_collection(db, collection)
+            typer.echo(f"🔎 {collection}: reindexed {updated} documents")
+        await invalidation.publish(db, *SEARCH_COLLECTIONS)
+
+    run(_run)
+
+
+@cli.command("reconcile-stats")
+def reconcile_stats():
+    """Recount the dashboard counters and refresh the unique-user sketch."""
+    async def _run(db):
+        counters = await stats.reconcile(db, include_sketch=True)
+        typer.echo(f"📊 Counters reconciled: {counters}")
+
+    run(_run)
+
+
+@cli.command("backfill-sessions")
+def backfill_sessions():
+    """Rebuild per-session activity summaries from existing history."""
+    async def _run(db):
+        await sessions.ensure_session_indexes(db)
+        processed = await sessions.backfill(db, chat_layout=chat_store.LAYOUT)
+        for collection, count in processed.items():
+            typer.echo(f"🧳 {collection}: summarized {count} sessions")
+
+    run(_run)
+
+
+@cli.command("migrate-chat-buckets")
+def migrate_chat_buckets(bucket_size: int = typer.Option(chat_store.BUCKET_SIZE, help="Turns per bucket document")):
+    """Copy chat_history into the bucketed chat_buckets layout."""
+    async def _run(db):
+        migrated = await chat_store.migrate_to_buckets(db, bucket_size=bucket_size)
+        typer.echo(
+            f"💬 Migrated {migrated['turns']} turns from {migrated['sessions']} sessions "
+            f"into {migrated['buckets']} buckets"
+        )
+
+    run(_run)
+
+
+@cli.command("train-codec-dictionary")
+def train_codec_dictionary(
+    samples: int = typer.Option(500, help="Documents sampled from each collection"),
+    activate: bool = typer.Option(True, help="Use the new dictionary for future writes"),
+):
+    """Train a compression dictionary on past generated text and store it."""
+    async def _run(db):
+        await codec.load_dictionaries(db)
+        texts = []
+        for collection, fields in codec.COMPRESSED_FIELDS.items():
+            docs = await db[collection].aggregate([{"$sample": {"size": samples}}]).to_list(samples)
+            await codec.decode_many(db, docs, fields)
+            texts.extend(doc[field] for doc in docs for field in fields if isinstance(doc.get(field), str))
+        if not texts:
+            typer.echo("No generated text to train on yet")
+            raise typer.Exit(1)
+        dictionary = codec.train_dictionary(texts)
+        dictionary_id = await codec.store_dictionary(db, dictionary, activate=activate)
+        typer.echo(f"🗜️ Stored dictionary {dictionary_id} ({len(dictionary)} bytes) from {len(texts)} samples")
+
+    run(_run)
+
+
+@cli.command("archive-sessions")
+def archive_sessions(
+    older_than_days: int = typer.Option(retention.ARCHIVE_AFTER_DAYS, help="Archive sessions idle for this long"),
+    limit: int = typer.Option(1000, help="Maximum sessions to archive in this run"),
+):
+    """Move idle sessions' history into the compressed archive collection."""
+    async def _run(db):
+        await retention.ensure_retention_indexes(db)
+        archived = await retention.archive_idle_sessions(db, older_than_days, limit)
+        typer.echo(f"🗄️ Archived {archived} sessions")
+
+    run(_run)
+
+
+@cli.command("restore-session")
+def restore_session(session_id: str):
+    """Restore one archived session into the hot collections."""
+    async def _run(db):
+        restored = await retention.restore_session(db, session_id)
+        if restored is None:
+            typer.echo(f"No archive found for session {session_id}")
+            raise typer.Exit(1)
+        typer.echo(f"♻️ Restored {session_id}: {restored}")
+
+    run(_run)
+
+
+@cli.command("import-ndjson")
+def import_ndjson(
+    collection: str = typer.Argument(..., help="vendors, vendor_offers or tourism_events"),
+    path: Path = typer.Argument(..., help="NDJSON file, '-' for stdin; .gz files are decompressed"),
+    batch_size: int = typer.Option(bulk_import.BATCH_SIZE, help="Rows per bulk write"),
+):
+    """Validate and upsert catalogue rows from an NDJSON file."""
+    if collection not in catalogue.CATALOGUE_COLLECTIONS:
+        raise typer.BadParameter(f"collection must be one of {', '.join(catalogue.CATALOGUE_COLLECTIONS)}")
+    # The row models live in the API module; import it only for this command.
+    from server import TourismEvent, VendorOffer, VendorProfile
+    model = {"vendors": VendorProfile, "vendor_offers": VendorOffer, "tourism_events": TourismEvent}[collection]
+
+    async def chunks():
+        stream = sys.stdin.buffer if str(path) == "-" else open(path, "rb")
+        try:
+            while True:
+                chunk = await asyncio.to_thread(stream.read, 1024 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+    async def _run(db):
+        report = await bulk_import.import_ndjson(
+            db, collection, model, chunks(), gzip=path.suffix == ".gz", batch_size=batch_size
+        )
+        typer.echo(
+            f"📥 {collection}: {report['inserted']} inserted, {report['updated']} updated, "
+            f"{report['failed']} failed"
+        )
+        for error in report["errors"]:
+            typer.echo(f"  line {error['line']}: {error['error']}", err=True)
+
+    run(_run)
+
+
+@cli.command("export-ndjson")
+def export_ndjson(
+    collections: List[str] = typer.Argument(..., help=f"Any of: {', '.join(export.EXPORT_COLLECTIONS)}"),
+    output: Path = typer.Option(Path("-"), "--output", "-o", help="Output file, '-' for stdout"),
+    session_id: Optional[str] = typer.Option(None, help="Only documents of this session"),
+    since: Optional[datetime] = typer.Option(None, help="Created at or after this time"),
+    until: Optional[datetime] = typer.Option(None, help="Created before this time"),
+    gzip: bool = typer.Option(False, help="Gzip-compress the output"),
+    batch_size: int = typer.Option(export.BATCH_SIZE, help="Cursor batch size"),
+):
+    """Stream collections to NDJSON with constant memory."""
+    try:
+        queries = {
+            collection: export.build_query(collection, session_id=session_id, since=since, until=until)
+            for collection in collections
+        }
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    async def _run(db):
+        out = sys.stdout.buffer if str(output) == "-" else open(output, "wb")
+        try:
+            async for chunk in export.export_ndjson(
+                db, queries, gzip=gzip, batch_size=batch_size, tag_collection=len(queries) > 1
+            ):
+                await asyncio.to_thread(out.write, chunk)
+        finally:
+            if out is sys.stdout.buffer:
+                out.flush()
+            else:
+                out.close()
+
+    run(_run)
+
+
+@cli.command("rebuild-cards")
+def rebuild_cards():
+    """Recompute the stored display cards of every offer and event."""
+    async def _run(db):
+        for collection in cards.CARD_FIELDS:
+            updated = await cards.backfill_cards(db, collection, rebuild=True)
+            typer.echo(f"🃏 {collection}: rebuilt {updated} cards")
+        await invalidation.publish(db, *cards.CARD_FIELDS)
+
+    run(_run)
+
+
+if __name__ == "__main__":
+    cli()
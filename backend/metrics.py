@@ -0,0 +1,252 @@
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from pymongo import monitoring
+from starlette.routing import Match
+
+from cache import registered_caches
+
+ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds. HTTP and Mongo buckets start in the sub-millisecond range; LLM
+# calls routinely take several seconds.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[str]]] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Cumulative buckets rendered at scrape time; observing is one bisect and two adds."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        lines = self._header()
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+def register_collector(collector: Callable[[], Iterable[str]]):
+    """Add a callable producing exposition lines at scrape time (for values kept elsewhere)."""
+    _collectors.append(collector)
+
+
+def render() -> bytes:
+    """All metrics in the Prometheus text exposition format.
+
+    Values are per process: with several uvicorn workers, each worker is a
+    separate scrape target (or use a multiprocess-aware scraper).
+    """
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# HTTP
+http_requests = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+
+# LLM
+llm_calls = Counter("llm_calls_total", "LLM calls by endpoint, model and outcome.", ("endpoint", "model", "outcome"))
+llm_latency = Histogram(
+    "llm_call_duration_seconds", "LLM call latency.", ("endpoint", "model"), buckets=LLM_LATENCY_BUCKETS
+)
+llm_in_flight = Gauge("llm_calls_in_flight", "LLM calls awaiting a response.", ("endpoint",))
+llm_characters = Counter("llm_characters_total", "Prompt and response characters.", ("endpoint", "model", "direction"))
+llm_tokens = Counter(
+    "llm_tokens_estimated_total",
+    "Estimated prompt and response tokens (characters / 4; the client does not report usage).",
+    ("endpoint", "model", "direction"),
+)
+
+# Geocoder
+geocoder_lookups = Counter("geocoder_lookups_total", "Geocoder lookups by cache result (hit/miss).", ("result",))
+geocoder_latency = Histogram("geocoder_request_duration_seconds", "Nominatim request latency (cache misses only).")
+geocoder_errors = Counter("geocoder_errors_total", "Geocoder requests that raised.")
+
+# MongoDB
+mongo_commands = Counter("mongodb_commands_total", "MongoDB commands by name and outcome.", ("command", "outcome"))
+mongo_latency = Histogram("mongodb_command_duration_seconds", "MongoDB command latency by name.", ("command",))
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Driver command timings; pymongo reports the duration on completion."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_commands.inc(event.command_name, "ok")
+        mongo_latency.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        mongo_commands.inc(event.command_name, "error")
+        mongo_latency.observe(event.duration_micros / 1e6, event.command_name)
+
+
+command_metrics = CommandMetrics()
+
+
+def route_template(app, scope) -> str:
+    """The matched route's path template, so ids never become label values."""
+    endpoint = scope.get("endpoint")
+    for route in app.routes:
+        if endpoint is not None and getattr(route, "endpoint", None) is endpoint:
+            return route.path
+    if endpoint is None:
+        # Unrouted (404), or a middleware handed the router a copy of the scope.
+        for route in app.routes:
+            if route.matches(scope)[0] == Match.FULL:
+                return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Route latency, status counts and in-flight requests.
+
+    Should be the outermost middleware so throttled and CORS-rejected
+    requests are counted too.
+    """
+
+    def __init__(self, app, router, enabled: bool = ENABLED):
+        self.app = app
+        self.router = router
+        self.enabled = enabled
+        self._templates: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        template = self._templates.get(endpoint) if endpoint is not None else None
+        if template is None:
+            template = route_template(self.router, scope)
+            if endpoint is not None:
+                self._templates[endpoint] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            route = self._route(scope)
+            http_latency.observe(time.perf_counter() - started, scope["method"], route)
+            http_requests.inc(scope["method"], route, str(status))
+
+
+def cache_collector() -> Iterable[str]:
+    """In-process TTL cache hit/miss counters (see cache.py)."""
+    caches = registered_caches()
+    lines = [
+        "# HELP cache_lookups_total In-process cache lookups by result.",
+        "# TYPE cache_lookups_total counter",
+    ]
+    for cache in caches:
+        lines.append(f'cache_lookups_total{{cache="{_escape(cache.name)}",result="hit"}} {cache.hits}')
+        lines.append(f'cache_lookups_total{{cache="{_escape(cache.name)}",result="miss"}} {cache.misses}')
+    return lines
+
+
+register_collector(cache_collector)
+
@@ -0,0 +1,246 @@
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", "120"))
+DEFAULT_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+MIN_INTERVAL_MS = 1.0
+FORMATS = ("collapsed", "speedscope")
+
+# Innermost frames from these files mean a worker thread is parked, not working.
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+Frame = Tuple[str, str, int]  # function, file, first line
+
+# The one profile that may run at a time in this process
+current: Optional["SamplingProfiler"] = None
+
+
+def route_pattern(route: str) -> re.Pattern:
+    """``/api/vendors/{vendor_id}`` -> a regex matching concrete paths."""
+    parts = re.split(r"(\{[^}]+\})", route)
+    return re.compile("^" + "".join("[^/]+" if part.startswith("{") else re.escape(part) for part in parts) + "$")
+
+
+def _frames(frame) -> List[Frame]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_chain(task) -> List[Frame]:
+    """Frames of a suspended task, outermost coroutine first, following ``await``."""
+    stack = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return stack
+
+
+class SamplingProfiler:
+    """Samples thread stacks from a background thread every ``interval_ms``.
+
+    The event loop thread's stack is rooted at the asyncio task running at
+    that moment ("event loop" when idle), so handler time is attributed per
+    task. With ``include_waiting``, every other pending task's await chain is
+    sampled too, showing where handlers spend wall-clock time suspended
+    (geocoder threads, Gemini, MongoDB). ``include_threads`` adds busy worker
+    threads such as ``asyncio.to_thread`` calls.
+
+    With a ``route``, samples are only kept while a matching request is in
+    flight, and the profile ends after ``max_requests`` of them complete.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        interval_ms: float = DEFAULT_INTERVAL_MS,
+        include_waiting: bool = True,
+        include_threads: bool = True,
+        route: Optional[str] = None,
+        max_requests: int = 0,
+    ):
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+        # The task waiting for this profile to finish; not worth sampling
+        self.owner = asyncio.current_task(loop)
+        self.interval = max(MIN_INTERVAL_MS, interval_ms) / 1000
+        self.include_waiting = include_waiting
+        self.include_threads = include_threads
+        self.route = route
+        self.route_pattern = route_pattern(route) if route else None
+        self.max_requests = max_requests
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.in_flight = 0
+        self.completed_requests = 0
+        self.done = loop.create_future()
+        self.started_at = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.route_pattern is None or self.in_flight > 0:
+                self._sample()
+
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        running = asyncio.tasks._current_tasks.get(self.loop)
+        for ident, frame in sys._current_frames().items():
+            if ident == self._thread.ident:
+                continue
+            stack = _frames(frame)
+            if ident == self.loop_thread:
+                root = f"task {running.get_name()}" if running is not None else "event loop"
+            elif not self.include_threads or (stack and stack[-1][1].endswith(_IDLE_FILES)):
+                continue
+            else:
+                root = f"thread {names.get(ident, ident)}"
+            self.samples[((root, "", 0),) + tuple(stack)] += 1
+        if self.include_waiting:
+            try:
+                tasks = list(asyncio.all_tasks(self.loop))
+            except RuntimeError:  # task set changed while copying; skip this round
+                tasks = []
+            for task in tasks:
+                if task is running or task is self.owner or task.done():
+                    continue
+                chain = _await_chain(task)
+                if chain:
+                    self.samples[((f"awaiting {task.get_name()}", "", 0),) + tuple(chain)] += 1
+        self.sample_count += 1
+
+    # Request gate, called on the event loop by ProfileGateMiddleware
+    def matches(self, path: str) -> bool:
+        return self.route_pattern is not None and self.route_pattern.match(path) is not None
+
+    def request_started(self):
+        self.in_flight += 1
+
+    def request_finished(self):
+        self.in_flight -= 1
+        self.completed_requests += 1
+        if self.max_requests and self.completed_requests >= self.max_requests and not self.done.done():
+            self.done.set_result(None)
+
+    # Output
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format, for flamegraph.pl / speedscope / inferno."""
+        lines = []
+        for stack, count in self.samples.most_common():
+            lines.append(";".join(_label(frame).replace(";", ":") for frame in stack) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> dict:
+        frames: List[dict] = []
+        index: Dict[Frame, int] = {}
+        samples, weights = [], []
+        interval_ms = self.interval * 1000
+        for stack, count in self.samples.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    entry = {"name": _label(frame)}
+                    if frame[1]:
+                        entry.update({"file": frame[1], "line": frame[2]})
+                    frames.append(entry)
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(count * interval_ms)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"TraveAI {self.route or 'all requests'} ({self.sample_count} samples)",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": "TraveAI sampling profile",
+            "exporter": "traveai-profiler",
+        }
+
+
+def _label(frame: Frame) -> str:
+    name, filename, line = frame
+    if not filename:
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+async def profile(
+    seconds: float,
+    route: Optional[str] = None,
+    max_requests: int = 0,
+    interval_ms: float = DEFAULT_INTERVAL_MS,
+    include_waiting: bool = True,
+    include_threads: bool = True,
+) -> SamplingProfiler:
+    """Run a profile for ``seconds`` (or until ``max_requests`` matching requests finish)."""
+    global current
+    if current is not None:
+        raise RuntimeError("A profile is already running in this process")
+    profiler = SamplingProfiler(
+        asyncio.get_running_loop(),
+        interval_ms=interval_ms,
+        include_waiting=include_waiting,
+        include_threads=include_threads,
+        route=route,
+        max_requests=max_requests,
+    )
+    current = profiler
+    profiler.start()
+    try:
+        await asyncio.wait_for(asyncio.shield(profiler.done), timeout=min(seconds, MAX_SECONDS))
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        profiler.stop()
+        current = None
+    return profiler
+
+
+class ProfileGateMiddleware:
+    """Tells a route-scoped profile when matching requests start and finish."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        profiler = current
+        if profiler is None or scope["type"] != "http" or not profiler.matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        profiler.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.request_finished()
@@ -0,0 +1,276 @@
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+from pymongo import ASCENDING, ReturnDocument
+from starlette.datastructures import Headers
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+# Only behind a proxy that sets X-Forwarded-For; otherwise clients could pick their own key.
+TRUST_PROXY = os.environ.get("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+MAX_MEMORY_BUCKETS = int(os.environ.get("RATE_LIMIT_MAX_BUCKETS", "100000"))
+# Only the first part of an LLM request body is read to find its session_id.
+MAX_BODY_PEEK = 64 * 1024
+
+
+class BucketPolicy:
+    """``burst`` tokens, refilled at ``per_minute`` tokens per minute."""
+
+    def __init__(self, name: str, per_minute: float, burst: int):
+        self.name = name
+        self.per_minute = per_minute
+        self.burst = burst
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+    @property
+    def header(self) -> str:
+        return f"{self.burst};w={math.ceil(self.burst / self.rate)}"
+
+
+def _policy(name: str, per_minute: str, burst: str) -> BucketPolicy:
+    prefix = f"RATE_LIMIT_{name.upper()}"
+    return BucketPolicy(
+        name,
+        float(os.environ.get(f"{prefix}_PER_MINUTE", per_minute)),
+        int(os.environ.get(f"{prefix}_BURST", burst)),
+    )
+
+
+# Route classes. Every LLM route call costs a Gemini request, so its budget
+# is far stricter than cached reads.
+POLICIES = {
+    "llm": _policy("llm", "6", "3"),
+    "write": _policy("write", "60", "20"),
+    "read": _policy("read", "600", "120"),
+}
+# LLM routes are also budgeted per session; the per-IP bucket is this many times
+# larger so travelers sharing a NAT or office network are not throttled together.
+LLM_IP_MULTIPLIER = float(os.environ.get("RATE_LIMIT_LLM_IP_MULTIPLIER", "5"))
+LLM_ROUTES = {"/api/generate-itinerary", "/api/chat", "/api/analyze-route"}
+EXEMPT_PATHS = {"/api/health", "/api/health/live", "/api/health/ready", "/health"}
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    if method == "OPTIONS" or path in EXEMPT_PATHS or not path.startswith("/api"):
+        return None
+    if path in LLM_ROUTES:
+        return "llm"
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+class MemoryBackend:
+    """Per-process token buckets, least recently used evicted beyond ``max_buckets``."""
+
+    def __init__(self, max_buckets: int = MAX_MEMORY_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, policy: BucketPolicy, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(policy.burst), now))
+        tokens = min(policy.burst, tokens + (now - updated) * policy.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return allowed, tokens
+
+    async def refund(self, key: str, policy: BucketPolicy, cost: float = 1.0):
+        if key in self._buckets:
+            tokens, updated = self._buckets[key]
+            self._buckets[key] = (min(policy.burst, tokens + cost), updated)
+
+
+class MongoBackend:
+    """Buckets shared by every worker, refilled and taken in one atomic update.
+
+    Any MongoDB deployment works, including a local ``mongod``. If the
+    database is unreachable the in-memory buckets take over so a database
+    hiccup never blocks traffic.
+    """
+
+    def __init__(self, db, fallback: Optional[MemoryBackend] = None):
+        self.collection = db.rate_limits
+        self.fallback = fallback or MemoryBackend()
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+
+    async def take(self, key: str, policy: BucketPolicy, cost: float = 1.0) -> Tuple[bool, float]:
+        elapsed = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]}
+        refilled = {"$min": [
+            policy.burst,
+            {"$add": [{"$ifNull": ["$tokens", policy.burst]}, {"$multiply": [elapsed, policy.rate]}]},
+        ]}
+        idle_expiry = timedelta(seconds=policy.burst / policy.rate + 60)
+        try:
+            bucket = await self.collection.find_one_and_update(
+                {"_id": key},
+                [
+                    {"$set": {"tokens": refilled, "updated_at": "$$NOW"}},
+                    {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+                    {"$set": {
+                        "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                        "expires_at": {"$add": ["$$NOW", int(idle_expiry.total_seconds() * 1000)]},
+                    }},
+                ],
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except Exception as e:
+            logger.error(f"Rate limit backend unavailable, using local buckets: {str(e)}")
+            return await self.fallback.take(key, policy, cost)
+        return bucket["allowed"], bucket["tokens"]
+
+    async def refund(self, key: str, policy: BucketPolicy, cost: float = 1.0):
+        try:
+            await self.collection.update_one(
+                {"_id": key},
+                [{"$set": {"tokens": {"$min": [policy.burst, {"$add": ["$tokens", cost]}]}}}],
+            )
+        except Exception as e:
+            logger.error(f"Rate limit backend unavailable, refunding local bucket: {str(e)}")
+            await self.fallback.refund(key, policy, cost)
+
+
+def client_ip(scope) -> str:
+    if TRUST_PROXY:
+        forwarded = Headers(scope=scope).get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def _peek_body(receive):
+    """Read the request body (up to ``MAX_BODY_PEEK``) and return a receive that replays it."""
+    messages = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if not message.get("more_body", False) or size > MAX_BODY_PEEK:
+            break
+    body = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.request")
+
+    async def replay():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return body, replay
+
+
+def _session_id(scope, body: bytes) -> Optional[str]:
+    session_id = Headers(scope=scope).get("x-session-id")
+    if session_id:
+        return session_id
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    value = payload.get("session_id") if isinstance(payload, dict) else None
+    return value if isinstance(value, str) else None
+
+
+class RateLimitMiddleware:
+    """Token buckets per client IP and, for LLM routes, per ``session_id``.
+
+    Every response on a limited route carries ``RateLimit-*`` headers;
+    throttled requests get a 429 with ``Retry-After``.
+    """
+
+    def __init__(self, app, backend=None, policies: Dict[str, BucketPolicy] = POLICIES, enabled: bool = ENABLED):
+        self.app = app
+        self.backend = backend or MemoryBackend()
+        self.policies = policies
+        self.enabled = enabled
+        self.throttled = 0
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        name = route_class(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        policy = self.policies[name]
+
+        buckets = [(f"{name}:ip:{client_ip(scope)}", policy)]
+        if name == "llm":
+            buckets[0] = (buckets[0][0], BucketPolicy(
+                "llm_ip", policy.per_minute * LLM_IP_MULTIPLIER, int(policy.burst * LLM_IP_MULTIPLIER)
+            ))
+            body, receive = await _peek_body(receive)
+            session_id = _session_id(scope, body)
+            if session_id:
+                buckets.append((f"{name}:session:{session_id}", policy))
+
+        # Headers describe whichever bucket is closest to running out.
+        remaining, tightest = float("inf"), policy
+        charged = []
+        for key, bucket_policy in buckets:
+            allowed, tokens = await self.backend.take(key, bucket_policy)
+            if not allowed:
+                # A throttled session must not drain the budget it shares with its IP
+                for charged_key, charged_policy in charged:
+                    await self.backend.refund(charged_key, charged_policy)
+                self.throttled += 1
+                await self._reject(send, bucket_policy, tokens)
+                return
+            charged.append((key, bucket_policy))
+            if tokens / bucket_policy.burst < remaining / tightest.burst:
+                remaining, tightest = tokens, bucket_policy
+        policy = tightest
+
+        headers = self._headers(policy, remaining)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _headers(self, policy: BucketPolicy, tokens: float):
+        reset = math.ceil((policy.burst - tokens) / policy.rate) if tokens < policy.burst else 0
+        return [
+            (b"ratelimit-policy", policy.header.encode()),
+            (b"ratelimit-limit", str(policy.burst).encode()),
+            (b"ratelimit-remaining", str(int(tokens)).encode()),
+            (b"ratelimit-reset", str(reset).encode()),
+        ]
+
+    async def _reject(self, send, policy: BucketPolicy, tokens: float):
+        retry_after = max(1, math.ceil((1 - tokens) / policy.rate))
+        body = json.dumps({
+            "detail": f"Too many requests. Please wait {retry_after} seconds and try again. 🙏"
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": self._headers(policy, tokens) + [
+                (b"retry-after", str(retry_after).encode()),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import bson
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError, OperationFailure
+
+import codec
+import leases
+import stats
+
+logger = logging.getLogger(__name__)
+
+STATUS_CHECK_DAYS = int(os.environ.get("RETENTION_STATUS_CHECK_DAYS", "7"))
+ARCHIVE_AFTER_DAYS = int(os.environ.get("RETENTION_ARCHIVE_AFTER_DAYS", "90"))
+# Summaries of archived (idle, anonymous) sessions expire this long after archival.
+ARCHIVED_SESSION_DAYS = int(os.environ.get("RETENTION_ARCHIVED_SESSION_DAYS", "30"))
+ARCHIVE_INTERVAL_SECONDS = int(os.environ.get("RETENTION_ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_BATCH_SESSIONS = int(os.environ.get("RETENTION_ARCHIVE_BATCH_SESSIONS", "200"))
+
+HISTORY_COLLECTIONS = ("itineraries", "chat_history", "chat_buckets", "route_analyses")
+# Compressed archives are split into parts well below the 16 MB document limit.
+MAX_PART_BYTES = 8 * 1024 * 1024
+INDEX_OPTIONS_CONFLICT = 85
+
+
+async def _ensure_ttl_index(collection, field: str, seconds: int):
+    try:
+        await collection.create_index([(field, ASCENDING)], expireAfterSeconds=seconds)
+    except OperationFailure as e:
+        if e.code != INDEX_OPTIONS_CONFLICT:
+            raise
+        # The retention period changed; update the existing TTL in place.
+        await collection.database.command({
+            "collMod": collection.name,
+            "index": {"keyPattern": {field: 1}, "expireAfterSeconds": seconds},
+        })
+
+
+async def ensure_retention_indexes(db):
+    await _ensure_ttl_index(db.status_checks, "timestamp", STATUS_CHECK_DAYS * 86400)
+    await _ensure_ttl_index(db.session_summaries, "archived_at", ARCHIVED_SESSION_DAYS * 86400)
+    await db.session_summaries.create_index([("last_activity_at", ASCENDING)])
+    await db.session_archives.create_index([("session_id", ASCENDING), ("part", ASCENDING)])
+    await db.itineraries.create_index([("session_id", ASCENDING)])
+    await db.route_analyses.create_index([("session_id", ASCENDING)])
+
+
+async def _load_archive(db, session_id: str) -> Optional[Dict[str, List[dict]]]:
+    parts = await db.session_archives.find({"session_id": session_id}).to_list(None)
+    if not parts:
+        return None
+    # An interrupted re-archive can leave two generations; the newest is complete.
+    latest = max(part["generation"] for part in parts)
+    parts = sorted((part for part in parts if part["generation"] == latest), key=lambda part: part["part"])
+    envelope = dict(parts[0]["codec"], data=b"".join(bytes(part["data"]) for part in parts))
+    return bson.decode(codec.decode_bytes(envelope))["collections"]
+
+
+async def archive_session(db, session_id: str) -> Dict[str, int]:
+    """Move a session's history into compressed ``session_archives`` parts.
+
+    Anything already archived for the session is merged in, the new parts are
+    written before the old ones are removed, and hot documents are deleted by
+    ``_id`` only after the archive is durable.
+    """
+    hot = {
+        collection: await db[collection].find({"session_id": session_id}).to_list(None)
+        for collection in HISTORY_COLLECTIONS
+    }
+    archived = await _load_archive(db, session_id) or {}
+    collections = {}
+    for collection in HISTORY_COLLECTIONS:
+        merged = {doc["_id"]: doc for doc in archived.get(collection, [])}
+        merged.update((doc["_id"], doc) for doc in hot[collection])
+        if merged:
+            collections[collection] = list(merged.values())
+
+    now = datetime.utcnow()
+    if collections:
+        envelope = codec.encode_bytes(bson.encode({"collections": collections}))
+        data = bytes(envelope.pop("data"))
+        chunks = [data[i:i + MAX_PART_BYTES] for i in range(0, len(data), MAX_PART_BYTES)]
+        generation = str(ObjectId())
+        await db.session_archives.insert_many([
+            {
+                "_id": f"{session_id}:{generation}:{index}",
+                "session_id": session_id,
+                "generation": generation,
+                "part": index,
+                "parts": len(chunks),
+                "codec": envelope,
+                "data": bson.Binary(chunk),
+                "counts": {name: len(docs) for name, docs in collections.items()},
+                "archived_at": now,
+            }
+            for index, chunk in enumerate(chunks)
+        ])
+        await db.session_archives.delete_many({"session_id": session_id, "generation": {"$ne": generation}})
+        for collection, docs in hot.items():
+            if docs:
+                await db[collection].delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        # Archived itineraries still count towards the lifetime total
+        await stats.record_archived_itineraries(db, len(hot["itineraries"]))
+
+    await db.session_summaries.update_one({"session_id": session_id}, {"$set": {"archived_at": now}})
+    return {collection: len(docs) for collection, docs in hot.items()}
+
+
+async def restore_session(db, session_id: str) -> Optional[Dict[str, int]]:
+    """Copy an archived session back into the hot collections and drop the archive."""
+    collections = await _load_archive(db, session_id)
+    if collections is None:
+        return None
+    restored = {}
+    for collection, docs in collections.items():
+        try:
+            result = await db[collection].insert_many(docs, ordered=False)
+            restored[collection] = len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Documents still present in the hot collection are left as they are.
+            restored[collection] = e.details.get("nInserted", 0)
+    await db.session_archives.delete_many({"session_id": session_id})
+    await stats.record_archived_itineraries(db, -restored.get("itineraries", 0))
+
+    chat_turns = len(collections.get("chat_history", [])) + sum(
+        bucket.get("count", 0) for bucket in collections.get("chat_buckets", [])
+    )
+    now = datetime.utcnow()
+    await db.session_summaries.update_one(
+        {"session_id": session_id},
+        {
+            "$unset": {"archived_at": ""},
+            # Restoring counts as activity so the archiver leaves the session alone.
+            "$set": {"last_activity_at": now},
+            # Summaries of archived sessions may have expired; recreate their counts.
+            "$setOnInsert": {
+                "itineraries": len(collections.get("itineraries", [])),
+                "chat_messages": chat_turns,
+                "route_analyses": len(collections.get("route_analyses", [])),
+                "first_seen_at": now,
+            },
+        },
+        upsert=True,
+    )
+    return restored
+
+
+async def archive_idle_sessions(db, older_than_days: int = ARCHIVE_AFTER_DAYS, limit: int = ARCHIVE_BATCH_SESSIONS) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    idle = await db.session_summaries.find(
+        {"last_activity_at": {"$lt": cutoff}, "archived_at": {"$exists": False}},
+        {"session_id": 1},
+    ).limit(limit).to_list(limit)
+    for summary in idle:
+        await archive_session(db, summary["session_id"])
+    return len(idle)
+
+
+async def archive_periodically(db):
+    while True:
+        try:
+            if await leases.claim(db, "retention_archive", ARCHIVE_INTERVAL_SECONDS):
+                archived = await archive_idle_sessions(db)
+                if archived:
+                    logger.info(f"🗄️ Archived {archived} idle sessions")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Session archival failed: {str(e)}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
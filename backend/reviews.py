@@ -0,0 +1,91 @@
+import os
+from datetime import datetime
+from typing import Optional
+
+from pymongo import ASCENDING, DESCENDING
+
+# Bayesian smoothing: every vendor starts as if it had PRIOR_WEIGHT reviews of
+# PRIOR_RATING, so a single 5-star review cannot outrank a long track record.
+PRIOR_RATING = float(os.environ.get("REVIEW_PRIOR_RATING", "3.5"))
+PRIOR_WEIGHT = float(os.environ.get("REVIEW_PRIOR_WEIGHT", "5"))
+
+VENDOR_SORTS = {
+    "rating": "rating",
+    "ranking": "ranking_score",
+    "reviews": "total_reviews",
+}
+
+
+def ranking_score(rating_sum: float, total_reviews: int) -> float:
+    return (rating_sum + PRIOR_RATING * PRIOR_WEIGHT) / (total_reviews + PRIOR_WEIGHT)
+
+
+def rating_fields(vendor: dict) -> dict:
+    """Derived rating fields stored on a new vendor document."""
+    rating_sum = vendor.get("rating", 0.0) * vendor.get("total_reviews", 0)
+    return {
+        "rating_sum": rating_sum,
+        "ranking_score": ranking_score(rating_sum, vendor.get("total_reviews", 0)),
+    }
+
+
+# Pipeline stage recomputing the average and smoothed score from the running sums.
+_DERIVED_STAGE = {"$set": {
+    "rating": {"$cond": [
+        {"$gt": ["$total_reviews", 0]},
+        {"$round": [{"$divide": ["$rating_sum", "$total_reviews"]}, 2]},
+        0.0,
+    ]},
+    "ranking_score": {"$divide": [
+        {"$add": ["$rating_sum", PRIOR_RATING * PRIOR_WEIGHT]},
+        {"$add": ["$total_reviews", PRIOR_WEIGHT]},
+    ]},
+}}
+
+
+def add_review_update(rating: int) -> list:
+    """Single-document pipeline update folding one review into the running totals.
+
+    Runs atomically on the vendor document, so concurrent reviews never lose
+    increments and nothing is re-aggregated from the reviews collection.
+    Vendors created before ``rating_sum`` existed are seeded from their
+    stored average.
+    """
+    return [
+        {"$set": {
+            "rating_sum": {"$add": [
+                {"$ifNull": ["$rating_sum", {"$multiply": [{"$ifNull": ["$rating", 0]}, {"$ifNull": ["$total_reviews", 0]}]}]},
+                rating,
+            ]},
+            "total_reviews": {"$add": [{"$ifNull": ["$total_reviews", 0]}, 1]},
+            "updated_at": datetime.utcnow(),
+        }},
+        _DERIVED_STAGE,
+    ]
+
+
+async def ensure_review_indexes(db):
+    await db.vendor_reviews.create_index([("vendor_id", ASCENDING), ("created_at", DESCENDING)])
+    await db.vendors.create_index([("verified", ASCENDING), ("rating", DESCENDING)])
+    await db.vendors.create_index([("verified", ASCENDING), ("ranking_score", DESCENDING)])
+    await db.vendors.create_index([("verified", ASCENDING), ("total_reviews", DESCENDING)])
+    await db.vendors.create_index([("verified", ASCENDING), ("business_type", ASCENDING), ("ranking_score", DESCENDING)])
+    # Seed running sums and scores on vendors created before reviews existed.
+    await db.vendors.update_many(
+        {"ranking_score": {"$exists": False}},
+        [
+            {"$set": {
+                "rating_sum": {"$multiply": [{"$ifNull": ["$rating", 0]}, {"$ifNull": ["$total_reviews", 0]}]},
+                "total_reviews": {"$ifNull": ["$total_reviews", 0]},
+            }},
+            {"$set": {"ranking_score": _DERIVED_STAGE["$set"]["ranking_score"]}},
+        ],
+    )
+
+
+async def list_reviews(db, vendor_id: str, limit: int, before: Optional[datetime] = None) -> list:
+    """Newest-first page of reviews; pass the last ``created_at`` as ``before`` for the next page."""
+    query = {"vendor_id": vendor_id}
+    if before:
+        query["created_at"] = {"$lt": before}
+    return await db.vendor_reviews.find(query, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(limit)
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, TEXT, UpdateOne
+
+import invalidation
+import lifecycle
+
+logger = logging.getLogger(__name__)
+
+# Per-collection search configuration: which field is the display title,
+# which fields feed the keyword tokens, and the base filter applied to
+# public search results.
+SEARCH_COLLECTIONS = {
+    "vendors": {
+        "type": "vendor",
+        "title_field": "name",
+        "keyword_fields": ["name", "business_type", "description"],
+    },
+    "vendor_offers": {
+        "type": "offer",
+        "title_field": "title",
+        "keyword_fields": ["title", "category", "vendor_name", "tags", "description"],
+    },
+    "tourism_events": {
+        "type": "event",
+        "title_field": "title",
+        "keyword_fields": ["title", "event_type", "organizer", "tags", "description"],
+    },
+}
+
+SEARCH_TYPES = {config["type"]: collection for collection, config in SEARCH_COLLECTIONS.items()}
+
+# Bump when tokenization changes; documents with another version are
+# recomputed by backfill_search_fields at startup.
+SEARCH_VERSION = 2
+
+# Combining diacritics (the accents NFKD splits off Latin letters). Other
+# marks, such as Devanagari vowel signs, are part of the word and are kept.
+_ACCENTS = re.compile("[\u0300-\u036f]")
+
+
+def _is_word_char(ch: str) -> bool:
+    # Letters, digits and marks in any script
+    return unicodedata.category(ch)[0] in "LNM"
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Casefold, strip Latin accents and collapse everything but words to single spaces."""
+    if not value:
+        return ""
+    value = _ACCENTS.sub("", unicodedata.normalize("NFKD", value))
+    value = unicodedata.normalize("NFC", value).casefold()
+    return " ".join("".join(ch if _is_word_char(ch) else " " for ch in value).split())
+
+
+def tokenize(value) -> List[str]:
+    """Return unique normalized tokens, keeping first-seen order."""
+    values = value if isinstance(value, (list, tuple)) else [value]
+    tokens = []
+    seen = set()
+    for item in values:
+        if isinstance(item, (list, tuple)):
+            item = " ".join(str(part) for part in item)
+        for token in normalize_text(item).split():
+            if token not in seen:
+                seen.add(token)
+                tokens.append(token)
+    return tokens
+
+
+def search_fields(collection: str, doc: dict) -> dict:
+    """Compute the denormalized search fields stored alongside a document."""
+    config = SEARCH_COLLECTIONS[collection]
+    return {
+        "location_norm": normalize_text(doc.get("location")),
+        "location_tokens": tokenize(doc.get("location")),
+        "search_keywords": tokenize([doc.get(field) for field in config["keyword_fields"] if doc.get(field)]),
+        "search_version": SEARCH_VERSION,
+    }
+
+
+def location_filter(location: Optional[str]) -> dict:
+    """Indexed replacement for the old unanchored ``$regex`` location filter.
+
+    Every token of the query must prefix-match one of the stored location
+    tokens, so "north go" still finds "North Goa" but each clause is an
+    anchored range scan on the ``location_tokens`` multikey index.
+    """
+    if not location or not location.strip():
+        return {}
+    tokens = tokenize(location)
+    if not tokens:
+        # Only punctuation: nothing can match, rather than dropping the filter
+        return {"location_tokens": {"$in": []}}
+    clauses = [{"location_tokens": {"$regex": f"^{re.escape(token)}"}} for token in tokens]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def public_filter(collection: str) -> dict:
+    if collection == "vendors":
+        return {"verified": True}
+    if collection == "vendor_offers":
+        return dict(lifecycle.ACTIVE_OFFER_FILTER)
+    return dict(lifecycle.ACTIVE_EVENT_FILTER)
+
+
+async def ensure_search_indexes(db):
+    await db.vendors.create_index(
+        [("name", TEXT), ("location_tokens", TEXT), ("search_keywords", TEXT)],
+        weights={"name": 10, "location_tokens": 5, "search_keywords": 1},
+        default_language="english",
+        name="search_text",
+    )
+    await db.vendors.create_index([("verified", ASCENDING), ("location_tokens", ASCENDING), ("rating", DESCENDING)])
+    await db.vendors.create_index([("verified", ASCENDING), ("business_type", ASCENDING), ("location_tokens", ASCENDING)])
+
+    for collection in ("vendor_offers", "tourism_events"):
+        await db[collection].create_index(
+            [("title", TEXT), ("tags", TEXT), ("location_tokens", TEXT), ("search_keywords", TEXT)],
+            weights={"title": 10, "tags": 5, "location_tokens": 5, "search_keywords": 1},
+            default_language="english",
+            name="search_text",
+        )
+    # Active-offer list indexes are partial, see lifecycle.ensure_lifecycle_indexes
+    await db.tourism_events.create_index([("location_tokens", ASCENDING), ("start_date", ASCENDING)])
+    await db.tourism_events.create_index([("event_type", ASCENDING), ("start_date", ASCENDING)])
+
+
+async def reindex_collection(db, collection: str, batch_size: int = 500, rebuild: bool = True) -> int:
+    """Recompute search fields for every document in ``collection`` (only stale ones without ``rebuild``)."""
+    query = {} if rebuild else {"search_version": {"$ne": SEARCH_VERSION}}
+    projection = {"_id": 1, "location": 1, **{field: 1 for field in SEARCH_COLLECTIONS[collection]["keyword_fields"]}}
+    updated = 0
+    ops = []
+    async for doc in db[collection].find(query, projection).batch_size(batch_size):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": search_fields(collection, doc)}))
+        if len(ops) >= batch_size:
+            await db[collection].bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+    if ops:
+        await db[collection].bulk_write(ops, ordered=False)
+        updated += len(ops)
+    return updated
+
+
+async def backfill_search_fields(db, collection: str) -> int:
+    """Search fields for documents written before them (or by an older tokenizer).
+
+    Location filters only match ``location_tokens``, so list endpoints would
+    silently skip these documents until this has run.
+    """
+    updated = await reindex_collection(db, collection, rebuild=False)
+    if updated:
+        logger.info(f"🔎 Recomputed search fields for {updated} {collection} documents")
+        await invalidation.publish(db, collection)
+    return updated
+
+
+def _search_result(collection: str, doc: dict) -> dict:
+    config = SEARCH_COLLECTIONS[collection]
+    description = doc.get("description") or ""
+    return {
+        "type": config["type"],
+        "id": doc.get("id"),
+        "title": doc.get(config["title_field"]),
+        "location": doc.get("location"),
+        "snippet": description[:150] + "..." if len(description) > 150 else description,
+        "tags": (doc.get("tags") or [])[:3],
+        "score": round(doc.get("score", 0.0), 4),
+    }
+
+
+async def _search_collection(db, collection: str, text_query: str, location: Optional[str], limit: int) -> List[dict]:
+    query = {"$text": {"$search": text_query}, **public_filter(collection)}
+    query.update(location_filter(location))
+    projection = {
+        "_id": 0,
+        "id": 1,
+        SEARCH_COLLECTIONS[collection]["title_field"]: 1,
+        "location": 1,
+        "description": 1,
+        "tags": 1,
+        "score": {"$meta": "textScore"},
+    }
+    docs = await db[collection].find(query, projection).sort([("score", {"$meta": "textScore"})]).limit(limit).to_list(limit)
+    return [_search_result(collection, doc) for doc in docs]
+
+
+async def search_catalogue(
+    db,
+    q: str,
+    types: Optional[List[str]] = None,
+    location: Optional[str] = None,
+    limit: int = 20,
+) -> Dict[str, object]:
+    """Relevance-ranked search across vendors, offers and events."""
+    text_query = " ".join(tokenize(q))
+    collections = [SEARCH_TYPES[t] for t in types] if types else list(SEARCH_COLLECTIONS)
+    if not text_query:
+        return {"query": q, "results": [], "total_count": 0}
+
+    per_collection = await asyncio.gather(
+        *(_search_collection(db, collection, text_query, location, limit) for collection in collections)
+    )
+    results = sorted(
+        (result for batch in per_collection for result in batch),
+        key=lambda result: result["score"],
+        reverse=True,
+    )[:limit]
+    return {"query": q, "results": results, "total_count": len(results)}
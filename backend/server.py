@@ -1,7 +1,9 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+# Imported first so startup.PROCESS_STARTED covers loading everything below
+import startup
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.responses import Response, StreamingResponse
 import os
 import logging
 from pathlib import Path
@@ -9,29 +11,89 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 import uuid
 from datetime import datetime
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
 import json
+import zlib
+import asyncio
+import search
+from search import SEARCH_COLLECTIONS, SEARCH_TYPES, ensure_search_indexes, location_filter, search_catalogue
+import sessions
+import stats
+import trending
+import codec
+import retention
+import reviews
+import catalogue
+import cards
+import lifecycle
+import bulk_import
+import export
+from admin import require_admin
+from cache import TTLCache
+import invalidation
+import database
+from responses import FastJSONResponse, PrebuiltJSON, dumps, json_bytes_response
+import http_cache
+from http_cache import HTTPCacheMiddleware
+from compression import CompressionMiddleware
+import ratelimit
+import metrics
+import llm
+import geo
+import timing
+import profiler
+import health
+from timing import span
+from write_behind import WriteBehindBuffer
+from chat_store import CONTEXT_TURNS, ChatStore, context_prompt
+from bson import ObjectId
+
+startup.mark("imports")
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection (pool, timeouts and wire compression from MONGO_* settings)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = database.create_client(mongo_url)
 db = client[os.environ['DB_NAME']]
+# Read-routed handles: listings and analytics may be served by secondaries
+list_db = database.get_database(client, os.environ['DB_NAME'], "list")
+analytics_db = database.get_database(client, os.environ['DB_NAME'], "analytics")
+
+# Deferred inserts for chat history, itineraries and route analyses
+write_buffer = WriteBehindBuffer(db)
+
+# Chat turns in the configured storage layout (CHAT_STORAGE=document|bucket)
+chat_store = ChatStore(db, write_buffer)
 
 # Create the main app without a prefix
 app = FastAPI(
     title="TraveAI API",
     description="AI-Powered Travel Planning Assistant for India",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Explore payload cache, dropped on any vendor, offer or event write by any
+# worker (see invalidation.py), so the TTL is only a safety net
+explore_cache = TTLCache(
+    "explore",
+    ttl_seconds=float(os.environ.get("EXPLORE_CACHE_TTL_SECONDS", "300")),
+    collections=["vendors", "vendor_offers", "tourism_events"]
+)
+
+# Token buckets for the rate limiter; RATE_LIMIT_BACKEND=mongo shares them across workers
+rate_limit_backend = ratelimit.MongoBackend(db) if ratelimit.BACKEND == "mongo" else ratelimit.MemoryBackend()
+
+# Background dependency checks behind /api/health/ready
+readiness = health.ReadinessProber(db, write_buffer)
+
+# Applies catalogue writes made by other workers and tools to the caches above
+invalidation_bus = invalidation.InvalidationBus(db)
+
 # Gemini API Key
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 CLERK_SECRET_KEY = os.environ.get('CLERK_SECRET_KEY')
@@ -144,6 +206,7 @@ class TourismEvent(BaseModel):
     images: List[str] = []  # Base64 encoded images
     tags: List[str] = []
     is_featured: bool = False
+    status: str = "active"  # active, archived (set once end_date has passed)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -151,10 +214,15 @@ class VendorReview(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     vendor_id: str
     user_name: str
-    rating: int  # 1-5 stars
+    rating: int = Field(ge=1, le=5)  # 1-5 stars
     review_text: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class VendorReviewCreate(BaseModel):
+    user_name: str
+    rating: int = Field(ge=1, le=5)
+    review_text: str
+
 class TransportOption(BaseModel):
     mode: str  # train, bus, flight, car
     duration: str
@@ -178,19 +246,21 @@ class RouteAnalysisResponse(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 # Add your routes to the router instead of directly to app
+API_ROOT_RESPONSE = PrebuiltJSON({
+    "message": "🌟 TraveAI Backend is running!",
+    "description": "Your AI-powered travel companion for exploring India",
+    "version": "1.0.0",
+    "features": [
+        "AI Itinerary Generation",
+        "Smart Chat Assistant",
+        "Personalized Recommendations",
+        "Local Insights"
+    ]
+})
+
 @api_router.get("/")
 async def root():
-    return {
-        "message": "🌟 TraveAI Backend is running!",
-        "description": "Your AI-powered travel companion for exploring India",
-        "version": "1.0.0",
-        "features": [
-            "AI Itinerary Generation",
-            "Smart Chat Assistant",
-            "Personalized Recommendations",
-            "Local Insights"
-        ]
-    }
+    return API_ROOT_RESPONSE.response()
 
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
@@ -200,8 +270,9 @@ async def create_status_check(input: StatusCheckCreate):
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
+async def get_status_checks(limit: int = 1000):
+    limit = max(1, min(limit, 1000))
+    status_checks = await db.status_checks.find().sort("timestamp", -1).limit(limit).to_list(limit)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
 @api_router.post("/generate-itinerary", response_model=ItineraryResponse)
@@ -230,11 +301,8 @@ async def generate_itinerary(request: ItineraryRequest):
         Format your response with clear day-by-day structure, use emojis to make it engaging, and include local tips that only an expert would know."""
         
         # Initialize Gemini chat
-        chat = LlmChat(
-            api_key=GEMINI_API_KEY,
-            session_id=request.session_id,
-            system_message=system_message
-        ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(4096)
+        await llm.load()
+        chat = llm.create_chat(GEMINI_API_KEY, request.session_id, system_message, max_tokens=4096)
         
         # Create enhanced user message
         interests_str = ", ".join(request.interests) if request.interests else "general sightseeing and cultural experiences"
@@ -248,8 +316,8 @@ async def generate_itinerary(request: ItineraryRequest):
         
         style_description = travel_styles.get(request.travel_style, "balanced")
         
-        user_message = UserMessage(
-            text=f"""🌟 Create an incredible {request.duration}-day travel itinerary for {request.destination}!
+        user_message = llm.user_message(
+            f"""🌟 Create an incredible {request.duration}-day travel itinerary for {request.destination}!
 
 TRAVELER PROFILE:
 🎯 Interests: {interests_str}
@@ -272,7 +340,7 @@ Make it engaging with emojis and format it beautifully! I want this to be an unf
         )
         
         # Get AI response
-        response = await chat.send_message(user_message)
+        response = await llm.send(chat, user_message, "generate-itinerary")
         
         # Save to database with enhanced metadata
         itinerary_data = {
@@ -283,6 +351,7 @@ Make it engaging with emojis and format it beautifully! I want this to be an unf
             "budget": request.budget,
             "interests": request.interests,
             "travel_style": request.travel_style,
+            "_id": ObjectId(),  # Generated client-side so the write can be deferred
             "generated_itinerary": response,
             "created_at": datetime.utcnow(),
             "ai_model": "gemini-2.0-flash",
@@ -290,19 +359,26 @@ Make it engaging with emojis and format it beautifully! I want this to be an unf
             "character_count": len(response)
         }
         
-        result = await db.itineraries.insert_one(itinerary_data)
-        itinerary_data["id"] = str(result.inserted_id)
+        itinerary_id = str(itinerary_data["_id"])
+        with span(timing.DB_WRITE):
+            codec.encode_fields("itineraries", itinerary_data)
+            await write_buffer.insert("itineraries", itinerary_data)
+            await stats.record_itinerary(db, request.session_id)
+            await sessions.record_activity(db, request.session_id, "itinerary", destination=request.destination)
+        trending.record(request.destination)
         
         # Update user stats (if we had user context)
         # This would increment AI recommendations count
         
         return ItineraryResponse(
-            id=str(result.inserted_id),
+            id=itinerary_id,
             session_id=request.session_id,
             user_request=itinerary_data["user_request"],
             generated_itinerary=response
         )
         
+    except llm.CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logging.error(f"Error generating itinerary: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate your dream itinerary: {str(e)}")
@@ -333,17 +409,16 @@ I always prioritize:
 Feel free to ask me anything about traveling in India! 🇮🇳"""
         
         # Initialize Gemini chat
-        chat = LlmChat(
-            api_key=GEMINI_API_KEY,
-            session_id=request.session_id,
-            system_message=system_message
-        ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(2048)
+        await llm.load()
+        chat = llm.create_chat(GEMINI_API_KEY, request.session_id, system_message, max_tokens=2048)
         
-        # Create user message
-        user_message = UserMessage(text=request.message)
+        # Create user message, with recent turns as context when configured
+        with span(timing.DB_READ):
+            history = await codec.decode_many(db, await chat_store.recent(request.session_id, CONTEXT_TURNS), ["ai_response"])
+        user_message = llm.user_message(context_prompt(history, request.message))
         
         # Get AI response
-        response = await chat.send_message(user_message)
+        response = await llm.send(chat, user_message, "chat")
         
         # Save chat history with enhanced metadata
         chat_data = {
@@ -357,10 +432,15 @@ Feel free to ask me anything about traveling in India! 🇮🇳"""
             "conversation_context": "travel_assistance"
         }
         
-        await db.chat_history.insert_one(chat_data)
+        with span(timing.DB_WRITE):
+            codec.encode_fields("chat_history", chat_data)
+            await chat_store.append(chat_data)
+            await sessions.record_activity(db, request.session_id, "chat")
         
         return ChatResponse(response=response, session_id=request.session_id)
         
+    except llm.CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logging.error(f"Error in chat: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Sorry, I encountered an issue. Let's try again! 🤖")
@@ -368,8 +448,10 @@ Feel free to ask me anything about traveling in India! 🇮🇳"""
 @api_router.get("/itineraries/{session_id}")
 async def get_user_itineraries(session_id: str):
     try:
-        itineraries = await db.itineraries.find({"session_id": session_id}).to_list(100)
-        return [
+        with span(timing.DB_READ):
+            itineraries = await list_db.itineraries.find({"session_id": session_id}).to_list(100)
+            await codec.decode_many(db, itineraries, ["generated_itinerary"])
+        return FastJSONResponse([
             {
                 "id": str(itinerary["_id"]),
                 "destination": itinerary.get("destination"),
@@ -381,7 +463,7 @@ async def get_user_itineraries(session_id: str):
                 "interests": itinerary.get("interests", [])
             }
             for itinerary in itineraries
-        ]
+        ])
     except Exception as e:
         logging.error(f"Error fetching itineraries: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch your travel memories: {str(e)}")
@@ -389,100 +471,164 @@ async def get_user_itineraries(session_id: str):
 @api_router.get("/chat-history/{session_id}")
 async def get_chat_history(session_id: str, limit: int = 50):
     try:
-        chat_history = await db.chat_history.find(
-            {"session_id": session_id}
-        ).sort("timestamp", -1).limit(limit).to_list(limit)
+        chat_history = await chat_store.recent(session_id, limit)
+        await codec.decode_many(db, chat_history, ["ai_response"])
         
-        return [
+        return FastJSONResponse([
             {
                 "user_message": chat.get("user_message"),
                 "ai_response": chat.get("ai_response"),
                 "timestamp": chat.get("timestamp")
             }
-            for chat in reversed(chat_history)  # Reverse to get chronological order
-        ]
+            for chat in chat_history
+        ])
     except Exception as e:
         logging.error(f"Error fetching chat history: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch conversation history: {str(e)}")
 
-# Enhanced destinations endpoint with more detailed information
-@api_router.get("/destinations")
-async def get_popular_destinations():
-    destinations = [
-        {
-            "name": "Goa",
-            "type": "Beach Paradise",
-            "highlights": ["Pristine beaches", "Portuguese heritage", "Vibrant nightlife", "Water sports"],
-            "best_time": "November to March",
-            "avg_budget": "₹2,000-5,000/day",
-            "image_hint": "golden beaches, palm trees"
-        },
-        {
-            "name": "Bangalore",
-            "type": "Garden City",
-            "highlights": ["IT hub", "Pleasant climate", "Craft breweries", "Modern culture"],
-            "best_time": "October to February",
-            "avg_budget": "₹1,500-4,000/day",
-            "image_hint": "urban skyline, gardens"
-        },
-        {
-            "name": "Mysore",
-            "type": "Heritage City",
-            "highlights": ["Royal palaces", "Silk sarees", "Yoga centers", "Classical architecture"],
-            "best_time": "October to March",
-            "avg_budget": "₹1,200-3,000/day",
-            "image_hint": "palace, heritage architecture"
-        },
-        {
-            "name": "Coorg",
-            "type": "Scotland of India",
-            "highlights": ["Coffee plantations", "Misty hills", "Adventure sports", "Wildlife"],
-            "best_time": "October to March",
-            "avg_budget": "₹2,000-4,500/day",
-            "image_hint": "coffee plantations, hills"
-        },
-        {
-            "name": "Hampi",
-            "type": "UNESCO World Heritage",
-            "highlights": ["Ancient ruins", "Boulder landscapes", "Historical significance", "Photography"],
-            "best_time": "October to February",
-            "avg_budget": "₹800-2,500/day",
-            "image_hint": "ancient ruins, boulders"
-        },
-        {
-            "name": "Gokarna",
-            "type": "Spiritual Beach Town",
-            "highlights": ["Pristine beaches", "Temple town", "Hippie culture", "Trekking"],
-            "best_time": "November to March",
-            "avg_budget": "₹1,000-3,000/day",
-            "image_hint": "beaches, temples"
-        }
-    ]
-    
+@api_router.post("/sessions/{session_id}/restore")
+async def restore_archived_session(session_id: str):
+    """Bring an archived session's history back into the hot collections"""
+    try:
+        restored = await retention.restore_session(db, session_id)
+    except Exception as e:
+        logging.error(f"Error restoring session: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to restore your travel history: {str(e)}")
+    if restored is None:
+        raise HTTPException(status_code=404, detail="No archived history found for this session")
+    return {"session_id": session_id, "restored": restored}
+
+def _export_response(queries: dict, filename: str, gzip: bool, tag_collection: bool = False) -> StreamingResponse:
+    stream = export.export_ndjson(analytics_db, queries, gzip=gzip, tag_collection=tag_collection)
+    if gzip:
+        return StreamingResponse(
+            stream,
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson.gz"'},
+        )
+    return StreamingResponse(
+        stream,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson"'},
+    )
+
+@api_router.get("/sessions/{session_id}/export")
+async def export_session(
+    session_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    gzip: bool = False
+):
+    """Stream a session's itineraries, chat turns and route analyses as NDJSON"""
+    queries = {
+        collection: export.build_query(collection, session_id=session_id, since=since, until=until)
+        for collection in export.SESSION_COLLECTIONS
+    }
+    return _export_response(queries, f"traveai-session-{session_id}", gzip, tag_collection=True)
+
+@api_router.get("/admin/export/{collection}", dependencies=[Depends(require_admin)])
+async def export_collection(
+    collection: str,
+    session_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    gzip: bool = False
+):
+    """Stream a full collection (optionally filtered) as NDJSON"""
+    try:
+        query = export.build_query(collection, session_id=session_id, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _export_response({collection: query}, f"traveai-{collection}", gzip)
+
+# Static destination catalogue; the default response is encoded once at import
+POPULAR_DESTINATIONS = [
+    {
+        "name": "Goa",
+        "type": "Beach Paradise",
+        "highlights": ["Pristine beaches", "Portuguese heritage", "Vibrant nightlife", "Water sports"],
+        "best_time": "November to March",
+        "avg_budget": "₹2,000-5,000/day",
+        "image_hint": "golden beaches, palm trees"
+    },
+    {
+        "name": "Bangalore",
+        "type": "Garden City",
+        "highlights": ["IT hub", "Pleasant climate", "Craft breweries", "Modern culture"],
+        "best_time": "October to February",
+        "avg_budget": "₹1,500-4,000/day",
+        "image_hint": "urban skyline, gardens"
+    },
+    {
+        "name": "Mysore",
+        "type": "Heritage City",
+        "highlights": ["Royal palaces", "Silk sarees", "Yoga centers", "Classical architecture"],
+        "best_time": "October to March",
+        "avg_budget": "₹1,200-3,000/day",
+        "image_hint": "palace, heritage architecture"
+    },
+    {
+        "name": "Coorg",
+        "type": "Scotland of India",
+        "highlights": ["Coffee plantations", "Misty hills", "Adventure sports", "Wildlife"],
+        "best_time": "October to March",
+        "avg_budget": "₹2,000-4,500/day",
+        "image_hint": "coffee plantations, hills"
+    },
+    {
+        "name": "Hampi",
+        "type": "UNESCO World Heritage",
+        "highlights": ["Ancient ruins", "Boulder landscapes", "Historical significance", "Photography"],
+        "best_time": "October to February",
+        "avg_budget": "₹800-2,500/day",
+        "image_hint": "ancient ruins, boulders"
+    },
+    {
+        "name": "Gokarna",
+        "type": "Spiritual Beach Town",
+        "highlights": ["Pristine beaches", "Temple town", "Hippie culture", "Trekking"],
+        "best_time": "November to March",
+        "avg_budget": "₹1,000-3,000/day",
+        "image_hint": "beaches, temples"
+    }
+]
+
+DESTINATIONS_TRAVEL_TIP = "🌟 Each destination offers unique experiences - from beach relaxation to cultural immersion!"
+
+def destinations_payload(destinations: list) -> dict:
     return {
         "destinations": destinations,
         "total_count": len(destinations),
         "featured_states": ["Goa", "Karnataka"],
-        "travel_tip": "🌟 Each destination offers unique experiences - from beach relaxation to cultural immersion!"
+        "travel_tip": DESTINATIONS_TRAVEL_TIP
     }
 
+DESTINATIONS_RESPONSE = PrebuiltJSON(destinations_payload(POPULAR_DESTINATIONS))
+
+# Enhanced destinations endpoint with more detailed information
+@api_router.get("/destinations")
+async def get_popular_destinations(sort: Optional[str] = None):
+    if sort != "trending":
+        return DESTINATIONS_RESPONSE.response()
+    destinations = [
+        dict(destination, trending_score=round(trending.score(destination["name"]), 2))
+        for destination in POPULAR_DESTINATIONS
+    ]
+    destinations.sort(key=lambda destination: destination["trending_score"], reverse=True)
+    return FastJSONResponse(destinations_payload(destinations))
+
 @api_router.post("/analyze-route", response_model=RouteAnalysisResponse)
 async def analyze_route(request: RouteAnalysisRequest):
     try:
-        # Initialize geocoder
-        geolocator = Nominatim(user_agent="traveai_app")
+        # Get coordinates for locations (cached; misses are throttled, see geo.py)
+        from_coords = await geo.geocode(f"{request.from_location}, India")
+        to_coords = await geo.geocode(f"{request.to_location}, India")
         
-        # Get coordinates for locations
-        from_location = geolocator.geocode(f"{request.from_location}, India")
-        to_location = geolocator.geocode(f"{request.to_location}, India")
-        
-        if not from_location or not to_location:
+        if not from_coords or not to_coords:
             raise HTTPException(status_code=400, detail="Unable to find one or both locations. Please check location names.")
         
         # Calculate distance
-        from_coords = (from_location.latitude, from_location.longitude)
-        to_coords = (to_location.latitude, to_location.longitude)
-        distance = geodesic(from_coords, to_coords).kilometers
+        distance = geo.distance_km(from_coords, to_coords)
         
         # Enhanced system message for route analysis
         system_message = """You are TraveAI's intelligent route analyzer and transportation expert for India. 
@@ -504,18 +650,15 @@ async def analyze_route(request: RouteAnalysisRequest):
         Format your response with clear transportation options, each including mode, duration, cost range, comfort level, and specific recommendations."""
         
         # Initialize Gemini chat for route analysis
-        chat = LlmChat(
-            api_key=GEMINI_API_KEY,
-            session_id=request.session_id,
-            system_message=system_message
-        ).with_model("gemini", "gemini-2.0-flash").with_max_tokens(3072)
+        await llm.load()
+        chat = llm.create_chat(GEMINI_API_KEY, request.session_id, system_message, max_tokens=3072)
         
         # Create detailed route analysis prompt
         travel_date_str = f" on {request.travel_date}" if request.travel_date else ""
         mode_filter = f" focusing on {request.travel_mode} options" if request.travel_mode != "all" else ""
         
-        user_message = UserMessage(
-            text=f"""🗺️ ROUTE ANALYSIS REQUEST: {request.from_location} to {request.to_location}
+        user_message = llm.user_message(
+            f"""🗺️ ROUTE ANALYSIS REQUEST: {request.from_location} to {request.to_location}
             
 TRIP DETAILS:
 📍 From: {request.from_location}
@@ -566,7 +709,7 @@ Format each option with: Mode | Duration | Cost Range | Comfort Level | Key Reco
         )
         
         # Get AI response
-        ai_response = await chat.send_message(user_message)
+        ai_response = await llm.send(chat, user_message, "analyze-route")
         
         # Parse the AI response to extract structured data
         # For now, we'll create a structured response based on common patterns
@@ -680,12 +823,17 @@ Format each option with: Mode | Duration | Cost Range | Comfort Level | Key Reco
             "ai_model": "gemini-2.0-flash"
         }
         
-        result = await db.route_analyses.insert_one(analysis_data)
+        with span(timing.DB_WRITE):
+            codec.encode_fields("route_analyses", analysis_data)
+            await write_buffer.insert("route_analyses", analysis_data)
+            await sessions.record_activity(db, request.session_id, "route")
         
         return route_analysis
         
     except HTTPException:
         raise
+    except llm.CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logging.error(f"Error analyzing route: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to analyze route: {str(e)}")
@@ -693,8 +841,10 @@ Format each option with: Mode | Duration | Cost Range | Comfort Level | Key Reco
 @api_router.get("/route-analyses/{session_id}")
 async def get_route_analyses(session_id: str):
     try:
-        analyses = await db.route_analyses.find({"session_id": session_id}).to_list(50)
-        return [
+        with span(timing.DB_READ):
+            analyses = await list_db.route_analyses.find({"session_id": session_id}).to_list(50)
+            await codec.decode_many(db, analyses, ["ai_detailed_analysis"])
+        return FastJSONResponse([
             {
                 "id": str(analysis["_id"]),
                 "from_location": analysis.get("from_location"),
@@ -705,7 +855,7 @@ async def get_route_analyses(session_id: str):
                 "ai_detailed_analysis": analysis.get("ai_detailed_analysis")
             }
             for analysis in analyses
-        ]
+        ])
     except Exception as e:
         logging.error(f"Error fetching route analyses: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch route analyses: {str(e)}")
@@ -713,7 +863,7 @@ async def get_route_analyses(session_id: str):
 # Health check with enhanced information
 @api_router.get("/health")
 async def health_check():
-    return {
+    return FastJSONResponse({
         "status": "healthy",
         "service": "TraveAI API",
         "version": "1.0.0",
@@ -724,9 +874,23 @@ async def health_check():
             "Vendor Collaboration",
             "Tourism Event Management"
         ],
-        "database": "Connected",
-        "ai_model": "Gemini 2.0 Flash"
-    }
+        "database": readiness.database_status() or "Unknown",
+        "ai_model": "Gemini 2.0 Flash",
+        "write_buffer": write_buffer.metrics(),
+        "cache_invalidation": invalidation_bus.metrics(),
+        "database_pool": database.pool_metrics.snapshot(),
+        "startup": startup.report()
+    })
+
+# Liveness: the worker's event loop is serving requests
+@api_router.get("/health/live")
+async def liveness_check():
+    return health.live_response()
+
+# Readiness: the cached verdict of the background prober (503 when unready)
+@api_router.get("/health/ready")
+async def readiness_check():
+    return readiness.response()
 
 # Vendor Collaboration Endpoints
 
@@ -734,57 +898,114 @@ async def health_check():
 async def create_vendor(vendor: VendorProfile):
     try:
         vendor_dict = vendor.dict()
+        catalogue.prepare_document("vendors", vendor_dict)
         await db.vendors.insert_one(vendor_dict)
+        await catalogue.after_insert(db, "vendors", vendor_dict)
         return vendor
     except Exception as e:
         logging.error(f"Error creating vendor: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create vendor profile: {str(e)}")
 
+# Vendor list fields, shaped in the database rather than per document in Python
+VENDOR_LIST_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "name": 1,
+    "business_type": 1,
+    "location": 1,
+    "description": 1,
+    "rating": 1,
+    "total_reviews": 1,
+    "ranking_score": {"$round": [{"$ifNull": ["$ranking_score", 0.0]}, 3]}
+}
+
 @api_router.get("/vendors")
-async def get_vendors(business_type: Optional[str] = None, location: Optional[str] = None):
+async def get_vendors(
+    business_type: Optional[str] = None,
+    location: Optional[str] = None,
+    sort: str = "rating"
+):
+    if sort not in reviews.VENDOR_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort: {sort}. Use any of: {', '.join(reviews.VENDOR_SORTS)}")
     try:
         query = {"verified": True}
         if business_type:
             query["business_type"] = business_type
         if location:
-            query["location"] = {"$regex": location, "$options": "i"}
+            query.update(location_filter(location))
         
-        vendors = await db.vendors.find(query).sort("rating", -1).to_list(100)
-        return [
-            {
-                "id": vendor["id"],
-                "name": vendor["name"],
-                "business_type": vendor["business_type"],
-                "location": vendor["location"],
-                "description": vendor["description"],
-                "rating": vendor["rating"],
-                "total_reviews": vendor["total_reviews"]
-            }
-            for vendor in vendors
-        ]
+        vendors = await list_db.vendors.aggregate([
+            {"$match": query},
+            {"$sort": {reviews.VENDOR_SORTS[sort]: -1}},
+            {"$limit": 100},
+            {"$project": VENDOR_LIST_PROJECTION}
+        ]).to_list(100)
+        return FastJSONResponse(vendors)
     except Exception as e:
         logging.error(f"Error fetching vendors: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch vendors: {str(e)}")
 
 @api_router.get("/vendors/{vendor_id}")
-async def get_vendor_details(vendor_id: str):
+async def get_vendor_details(vendor_id: str, request: Request):
     try:
-        vendor = await db.vendors.find_one({"id": vendor_id})
+        # A revalidating client may already hold this version: check it before
+        # loading the full document (plain requests skip the extra round trip)
+        if "if-none-match" in request.headers:
+            version = await db.vendors.find_one({"id": vendor_id}, {"_id": 0, "updated_at": 1})
+            if not version:
+                raise HTTPException(status_code=404, detail="Vendor not found")
+            cached = http_cache.not_modified(request, http_cache.version_etag("vendor", vendor_id, version.get("updated_at")))
+            if cached:
+                return cached
+        vendor = await db.vendors.find_one({"id": vendor_id}, catalogue.DETAIL_PROJECTION)
         if not vendor:
             raise HTTPException(status_code=404, detail="Vendor not found")
-        return vendor
+        return FastJSONResponse(vendor, headers={"ETag": http_cache.version_etag("vendor", vendor_id, vendor.get("updated_at"))})
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"Error fetching vendor details: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch vendor details: {str(e)}")
 
+@api_router.post("/vendors/{vendor_id}/reviews", response_model=VendorReview)
+async def create_vendor_review(vendor_id: str, input: VendorReviewCreate):
+    try:
+        if not await db.vendors.find_one({"id": vendor_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Vendor not found")
+        review = VendorReview(vendor_id=vendor_id, **input.dict())
+        await db.vendor_reviews.insert_one(review.dict())
+        # Fold the new rating into the vendor's running totals atomically
+        await db.vendors.update_one({"id": vendor_id}, reviews.add_review_update(review.rating))
+        await invalidation.publish(db, "vendors")
+        return review
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error creating vendor review: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to submit review: {str(e)}")
+
+@api_router.get("/vendors/{vendor_id}/reviews")
+async def get_vendor_reviews(vendor_id: str, limit: int = 20, before: Optional[datetime] = None):
+    try:
+        limit = max(1, min(limit, 100))
+        vendor_reviews = await reviews.list_reviews(list_db, vendor_id, limit, before)
+        return FastJSONResponse({
+            "reviews": vendor_reviews,
+            "count": len(vendor_reviews),
+            "next_before": vendor_reviews[-1]["created_at"] if len(vendor_reviews) == limit else None
+        })
+    except Exception as e:
+        logging.error(f"Error fetching vendor reviews: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch reviews: {str(e)}")
+
 @api_router.post("/vendor-offers", response_model=VendorOffer)
 async def create_vendor_offer(offer: VendorOffer):
     try:
         offer_dict = offer.dict()
+        catalogue.prepare_document("vendor_offers", offer_dict)
         await db.vendor_offers.insert_one(offer_dict)
-        return offer
+        await catalogue.after_insert(db, "vendor_offers", offer_dict)
+        return offer_dict  # reflects lifecycle state derived from the dates
     except Exception as e:
         logging.error(f"Error creating vendor offer: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create vendor offer: {str(e)}")
@@ -798,43 +1019,36 @@ async def get_vendor_offers(
     try:
         query = {}
         if active_only:
-            query["is_active"] = True
-            query["valid_until"] = {"$gte": datetime.utcnow()}
+            # Expired offers are deactivated by the lifecycle scheduler
+            query.update(lifecycle.ACTIVE_OFFER_FILTER)
         if category:
             query["category"] = category
         if location:
-            query["location"] = {"$regex": location, "$options": "i"}
+            query.update(location_filter(location))
         
-        offers = await db.vendor_offers.find(query).sort("created_at", -1).to_list(50)
-        return [
-            {
-                "id": offer["id"],
-                "vendor_name": offer["vendor_name"],
-                "title": offer["title"],
-                "description": offer["description"],
-                "category": offer["category"],
-                "location": offer["location"],
-                "price": offer["price"],
-                "currency": offer["currency"],
-                "discount_percentage": offer["discount_percentage"],
-                "valid_until": offer["valid_until"],
-                "contact_info": offer["contact_info"],
-                "images": offer["images"][:1] if offer["images"] else [],  # Only first image for list view
-                "tags": offer["tags"]
-            }
-            for offer in offers
-        ]
+        return FastJSONResponse(await list_db.vendor_offers.aggregate(
+            cards.card_pipeline("vendor_offers", query, [("created_at", -1)], 50)
+        ).to_list(50))
     except Exception as e:
         logging.error(f"Error fetching vendor offers: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch vendor offers: {str(e)}")
 
 @api_router.get("/vendor-offers/{offer_id}")
-async def get_vendor_offer_details(offer_id: str):
+async def get_vendor_offer_details(offer_id: str, request: Request):
     try:
-        offer = await db.vendor_offers.find_one({"id": offer_id})
+        # A revalidating client may already hold this version: check it before
+        # loading the full document (plain requests skip the extra round trip)
+        if "if-none-match" in request.headers:
+            version = await db.vendor_offers.find_one({"id": offer_id}, {"_id": 0, "updated_at": 1})
+            if not version:
+                raise HTTPException(status_code=404, detail="Offer not found")
+            cached = http_cache.not_modified(request, http_cache.version_etag("offer", offer_id, version.get("updated_at")))
+            if cached:
+                return cached
+        offer = await db.vendor_offers.find_one({"id": offer_id}, catalogue.DETAIL_PROJECTION)
         if not offer:
             raise HTTPException(status_code=404, detail="Offer not found")
-        return offer
+        return FastJSONResponse(offer, headers={"ETag": http_cache.version_etag("offer", offer_id, offer.get("updated_at"))})
     except HTTPException:
         raise
     except Exception as e:
@@ -845,8 +1059,10 @@ async def get_vendor_offer_details(offer_id: str):
 async def create_tourism_event(event: TourismEvent):
     try:
         event_dict = event.dict()
+        catalogue.prepare_document("tourism_events", event_dict)
         await db.tourism_events.insert_one(event_dict)
-        return event
+        await catalogue.after_insert(db, "tourism_events", event_dict)
+        return event_dict  # reflects lifecycle state derived from the dates
     except Exception as e:
         logging.error(f"Error creating tourism event: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create tourism event: {str(e)}")
@@ -858,114 +1074,156 @@ async def get_tourism_events(
     featured_only: bool = False
 ):
     try:
-        query = {}
+        # Only show upcoming or current events; finished ones are archived by the lifecycle scheduler
+        query = dict(lifecycle.ACTIVE_EVENT_FILTER)
         if featured_only:
             query["is_featured"] = True
         if event_type:
             query["event_type"] = event_type
         if location:
-            query["location"] = {"$regex": location, "$options": "i"}
-        
-        # Only show upcoming or current events
-        query["end_date"] = {"$gte": datetime.utcnow()}
+            query.update(location_filter(location))
         
-        events = await db.tourism_events.find(query).sort("start_date", 1).to_list(50)
-        return [
-            {
-                "id": event["id"],
-                "title": event["title"],
-                "description": event["description"],
-                "event_type": event["event_type"],
-                "location": event["location"],
-                "start_date": event["start_date"],
-                "end_date": event["end_date"],
-                "entry_fee": event["entry_fee"],
-                "organizer": event["organizer"],
-                "contact_info": event["contact_info"],
-                "images": event["images"][:1] if event["images"] else [],  # Only first image for list view
-                "tags": event["tags"],
-                "is_featured": event["is_featured"]
-            }
-            for event in events
-        ]
+        return FastJSONResponse(await list_db.tourism_events.aggregate(
+            cards.card_pipeline("tourism_events", query, [("start_date", 1)], 50)
+        ).to_list(50))
     except Exception as e:
         logging.error(f"Error fetching tourism events: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch tourism events: {str(e)}")
 
+# Bulk NDJSON import targets: URL segment -> (collection, row model)
+IMPORT_TARGETS = {
+    "vendors": ("vendors", VendorProfile),
+    "vendor-offers": ("vendor_offers", VendorOffer),
+    "tourism-events": ("tourism_events", TourismEvent),
+}
+
+@api_router.post("/admin/import/{target}", dependencies=[Depends(require_admin)])
+async def import_catalogue(target: str, request: Request, gzip: bool = False):
+    """Stream an NDJSON body (optionally gzip) into a catalogue collection, upserting on ``id``."""
+    if target not in IMPORT_TARGETS:
+        raise HTTPException(status_code=404, detail=f"Unknown import target: {target}")
+    try:
+        collection, model = IMPORT_TARGETS[target]
+        gzip = gzip or request.headers.get("content-encoding", "").lower() == "gzip"
+        return await bulk_import.import_ndjson(db, collection, model, request.stream(), gzip=gzip)
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid gzip body: {str(e)}")
+    except Exception as e:
+        logging.error(f"Error importing {target}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to import {target}: {str(e)}")
+
+@api_router.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def run_profile(
+    seconds: float = 10,
+    route: Optional[str] = None,
+    requests: int = 0,
+    format: str = "collapsed",
+    interval_ms: float = profiler.DEFAULT_INTERVAL_MS,
+    tasks: bool = True,
+    threads: bool = True
+):
+    """Sample this worker for ``seconds``, or until ``requests`` calls to ``route`` finish.
+
+    Returns folded stacks (flamegraph.pl, speedscope) or speedscope JSON.
+    """
+    if format not in profiler.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown profile format: {format}. Use one of: {', '.join(profiler.FORMATS)}")
+    if requests and not route:
+        raise HTTPException(status_code=400, detail="Profiling the next N requests needs a route, e.g. route=/api/analyze-route")
+    if profiler.current is not None:
+        raise HTTPException(status_code=409, detail="A profile is already running in this worker")
+    try:
+        result = await profiler.profile(
+            seconds, route=route, max_requests=requests, interval_ms=interval_ms,
+            include_waiting=tasks, include_threads=threads
+        )
+        logger.info(f"🔬 Profiled {result.sample_count} samples over {result.elapsed:.1f}s ({route or 'all requests'})")
+        if format == "speedscope":
+            return Response(
+                content=dumps(result.speedscope()),
+                media_type="application/json",
+                headers={"Content-Disposition": 'attachment; filename="traveai.speedscope.json"'}
+            )
+        return Response(
+            content=result.collapsed(),
+            media_type="text/plain",
+            headers={"Content-Disposition": 'attachment; filename="traveai.collapsed.txt"'}
+        )
+    except Exception as e:
+        logging.error(f"Error profiling: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to profile: {str(e)}")
+
+@api_router.get("/admin/slow-requests", dependencies=[Depends(require_admin)])
+async def get_slow_requests(limit: int = 50):
+    """Stage-by-stage breakdowns of recent requests slower than SLOW_REQUEST_MS (this worker only)."""
+    return FastJSONResponse({
+        "threshold_ms": timing.SLOW_REQUEST_MS,
+        "requests": timing.slow_samples(max(1, min(limit, timing.SLOW_REQUEST_SAMPLES)))
+    })
+
+@api_router.get("/search")
+async def search_content(
+    q: str,
+    types: Optional[str] = None,
+    location: Optional[str] = None,
+    limit: int = 20
+):
+    """Relevance-ranked search across vendors, offers and events"""
+    requested_types = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    unknown_types = [t for t in requested_types or [] if t not in SEARCH_TYPES]
+    if unknown_types:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown search types: {', '.join(unknown_types)}. Use any of: {', '.join(SEARCH_TYPES)}"
+        )
+    try:
+        return FastJSONResponse(await search_catalogue(list_db, q, requested_types, location, max(1, min(limit, 50))))
+    except Exception as e:
+        logging.error(f"Error searching catalogue: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
+
+async def build_explore_body():
+    # Just after a catalogue write a lagging secondary may still serve the old
+    # content, which would then stay cached for the full TTL
+    source = db if explore_cache.invalidated_within(database.PRIMARY_READ_AFTER_WRITE_SECONDS) else list_db
+    with span(timing.DB_READ):
+        content = await build_explore_content(source)
+    with span(timing.SERIALIZE):
+        body = dumps(content)
+    return body, http_cache.content_etag(body)
+
+async def build_explore_content(source):
+    # Cards are precomputed on write; one offers query serves both offer sections
+    offers, featured_events = await asyncio.gather(
+        source.vendor_offers.aggregate(cards.card_pipeline(
+            "vendor_offers", lifecycle.ACTIVE_OFFER_FILTER, [("created_at", -1)], 8, cards.EXPLORE_OFFER_PROJECTION
+        )).to_list(8),
+        source.tourism_events.aggregate(cards.card_pipeline(
+            "tourism_events", {**lifecycle.ACTIVE_EVENT_FILTER, "is_featured": True}, [("start_date", 1)], 6, cards.FEATURED_EVENT_PROJECTION
+        )).to_list(6)
+    )
+    # Featured offers are the newest six of the same result
+    featured_offers = cards.pick(offers[:6], cards.FEATURED_OFFER_FIELDS)
+    recent_offers = cards.pick(offers, cards.RECENT_OFFER_FIELDS)
+    
+    return {
+        "featured_offers": featured_offers,
+        "featured_events": featured_events,
+        "recent_offers": recent_offers,
+        "stats": {
+            "total_offers": len(recent_offers),
+            "total_events": len(featured_events),
+            "categories": ["accommodation", "food", "tours", "transport", "activities", "shopping"]
+        }
+    }
+
 @api_router.get("/explore")
 async def get_explore_content():
     """Get content for the explore section - featured offers and events"""
     try:
-        # Get featured offers (limit to 6)
-        featured_offers = await db.vendor_offers.find({
-            "is_active": True,
-            "valid_until": {"$gte": datetime.utcnow()}
-        }).sort("created_at", -1).limit(6).to_list(6)
-        
-        # Get featured events (limit to 6)  
-        featured_events = await db.tourism_events.find({
-            "is_featured": True,
-            "end_date": {"$gte": datetime.utcnow()}
-        }).sort("start_date", 1).limit(6).to_list(6)
-        
-        # Get recent offers (limit to 8)
-        recent_offers = await db.vendor_offers.find({
-            "is_active": True,
-            "valid_until": {"$gte": datetime.utcnow()}
-        }).sort("created_at", -1).limit(8).to_list(8)
-        
-        return {
-            "featured_offers": [
-                {
-                    "id": offer["id"],
-                    "vendor_name": offer["vendor_name"],
-                    "title": offer["title"],
-                    "description": offer["description"][:150] + "..." if len(offer["description"]) > 150 else offer["description"],
-                    "category": offer["category"],
-                    "location": offer["location"],
-                    "price": offer["price"],
-                    "currency": offer["currency"],
-                    "discount_percentage": offer["discount_percentage"],
-                    "images": offer["images"][:1] if offer["images"] else [],
-                    "tags": offer["tags"][:3]  # Limit tags for display
-                }
-                for offer in featured_offers
-            ],
-            "featured_events": [
-                {
-                    "id": event["id"],
-                    "title": event["title"],
-                    "description": event["description"][:150] + "..." if len(event["description"]) > 150 else event["description"],
-                    "event_type": event["event_type"],
-                    "location": event["location"],
-                    "start_date": event["start_date"],
-                    "end_date": event["end_date"],
-                    "entry_fee": event["entry_fee"],
-                    "organizer": event["organizer"],
-                    "images": event["images"][:1] if event["images"] else [],
-                    "tags": event["tags"][:3]
-                }
-                for event in featured_events
-            ],
-            "recent_offers": [
-                {
-                    "id": offer["id"],
-                    "vendor_name": offer["vendor_name"],
-                    "title": offer["title"],
-                    "category": offer["category"],
-                    "location": offer["location"],
-                    "price": offer["price"],
-                    "discount_percentage": offer["discount_percentage"],
-                    "images": offer["images"][:1] if offer["images"] else []
-                }
-                for offer in recent_offers
-            ],
-            "stats": {
-                "total_offers": len(recent_offers),
-                "total_events": len(featured_events),
-                "categories": ["accommodation", "food", "tours", "transport", "activities", "shopping"]
-            }
-        }
+        # The cache holds the encoded body and its ETag, so hits skip serialization and hashing
+        body, etag = await explore_cache.get_or_load("explore", build_explore_body)
+        return json_bytes_response(body, etag)
     except Exception as e:
         logging.error(f"Error fetching explore content: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch explore content: {str(e)}")
@@ -974,29 +1232,17 @@ async def get_explore_content():
 async def get_dashboard_stats(session_id: Optional[str] = None):
     """Get real-time dashboard statistics"""
     try:
-        # If session_id provided, get user-specific stats
-        if session_id:
-            user_itineraries = await db.itineraries.count_documents({"session_id": session_id})
-            user_chat_messages = await db.chat_history.count_documents({"session_id": session_id})
-            user_route_analyses = await db.route_analyses.count_documents({"session_id": session_id})
-        else:
-            user_itineraries = 0
-            user_chat_messages = 0
-            user_route_analyses = 0
+        # If session_id provided, get user-specific stats from the session summary
+        summary = await sessions.get_summary(analytics_db, session_id) if session_id else {}
+        user_itineraries = summary.get("itineraries", 0)
+        user_chat_messages = summary.get("chat_messages", 0)
+        user_route_analyses = summary.get("route_analyses", 0)
         
-        # Global stats
-        total_users = await db.itineraries.distinct("session_id")
-        total_itineraries = await db.itineraries.count_documents({})
-        total_vendors = await db.vendors.count_documents({"verified": True})
-        total_offers = await db.vendor_offers.count_documents({"is_active": True})
-        total_events = await db.tourism_events.count_documents({"end_date": {"$gte": datetime.utcnow()}})
+        # Global stats from the incrementally maintained counters
+        global_stats = await stats.read_global_stats(analytics_db)
         
-        # Popular destinations from itineraries
-        popular_destinations = await db.itineraries.aggregate([
-            {"$group": {"_id": "$destination", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 5}
-        ]).to_list(5)
+        # Trending destinations from the in-memory decayed top-K
+        popular_destinations = trending.top(5)
         
         return {
             "user_stats": {
@@ -1004,19 +1250,18 @@ async def get_dashboard_stats(session_id: Optional[str] = None):
                 "ai_interactions": user_chat_messages,
                 "routes_analyzed": user_route_analyses,
                 "countries_visited": min(3, user_itineraries // 2),  # Mock calculation
-                "ai_recommendations": user_chat_messages + user_itineraries + user_route_analyses
+                "ai_recommendations": user_chat_messages + user_itineraries + user_route_analyses,
+                "last_activity_at": summary.get("last_activity_at"),
+                "recent_destinations": summary.get("recent_destinations", [])
             },
             "global_stats": {
-                "total_users": len(total_users),
-                "total_trips_planned": total_itineraries,
-                "verified_vendors": total_vendors,
-                "active_offers": total_offers,
-                "upcoming_events": total_events
+                "total_users": global_stats["total_users"],
+                "total_trips_planned": global_stats["total_itineraries"],
+                "verified_vendors": global_stats["verified_vendors"],
+                "active_offers": global_stats["active_offers"],
+                "upcoming_events": global_stats["upcoming_events"]
             },
-            "popular_destinations": [
-                {"name": dest["_id"], "count": dest["count"]} 
-                for dest in popular_destinations
-            ],
+            "popular_destinations": popular_destinations,
             "recent_activity": [
                 "🎉 New vendor partnership added",
                 "✈️ Route analysis feature improved",
@@ -1032,6 +1277,16 @@ async def get_dashboard_stats(session_id: Optional[str] = None):
 # Include the router in the main app
 app.include_router(api_router)
 
+# ETag / 304 / Cache-Control for cacheable GET routes (see http_cache.ROUTE_POLICIES)
+app.add_middleware(HTTPCacheMiddleware)
+
+# gzip / Brotli for large JSON and NDJSON bodies; wraps the ETag middleware so
+# each encoding gets its own ETag
+app.add_middleware(CompressionMiddleware)
+
+# Per-IP and per-session token buckets; LLM routes get the strictest budget
+app.add_middleware(ratelimit.RateLimitMiddleware, backend=rate_limit_backend)
+
 # Enhanced CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -1042,6 +1297,15 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Lets an admin profile run only while matching requests are in flight
+app.add_middleware(profiler.ProfileGateMiddleware)
+
+# Server-Timing header, per-request JSON log line and slow-request samples
+app.add_middleware(timing.TimingMiddleware)
+
+# Route latency, status and in-flight metrics for /metrics; outermost so every request is counted
+app.add_middleware(metrics.MetricsMiddleware, router=app)
+
 # Configure enhanced logging
 logging.basicConfig(
     level=logging.INFO,
@@ -1052,26 +1316,104 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Long-running maintenance tasks started at startup and cancelled at shutdown
+background_tasks = []
+
+# Backfills the read paths rely on; the worker is unready until they finish
+def backfill_steps():
+    return [
+        ("backfill_event_status", lambda: lifecycle.backfill_event_status(db)),
+    ] + [
+        (f"backfill_cards_{collection}", lambda collection=collection: cards.backfill_cards(db, collection))
+        for collection in cards.CARD_FIELDS
+    ] + [
+        (f"backfill_search_{collection}", lambda collection=collection: search.backfill_search_fields(db, collection))
+        for collection in SEARCH_COLLECTIONS
+    ]
+
+# Each index group is its own startup phase, so one failing does not skip the others
+def index_steps():
+    steps = [
+        ("indexes_search", lambda: ensure_search_indexes(db)),
+        ("indexes_sessions", lambda: sessions.ensure_session_indexes(db)),
+        ("indexes_chat", chat_store.ensure_indexes),
+        ("indexes_retention", lambda: retention.ensure_retention_indexes(db)),
+        ("indexes_reviews", lambda: reviews.ensure_review_indexes(db)),
+        ("indexes_catalogue", lambda: catalogue.ensure_catalogue_indexes(db)),
+        ("indexes_lifecycle", lambda: lifecycle.ensure_lifecycle_indexes(db)),
+        ("indexes_trending", lambda: trending.ensure_trending_indexes(db)),
+    ]
+    if isinstance(rate_limit_backend, ratelimit.MongoBackend):
+        steps.append(("indexes_rate_limit", rate_limit_backend.ensure_indexes))
+    return steps
+
+async def prepare_in_background(required_steps, steps):
+    await startup.run_required(required_steps)
+    await startup.run_background(steps)
+
+async def warm_mongo_pool():
+    # Opens up to MONGO_MIN_POOL_SIZE connections (at least one) before real traffic needs them
+    await asyncio.gather(*[
+        db.command("ping") for _ in range(max(1, database.MIN_POOL_SIZE))
+    ])
+
+async def warm_caches():
+    await explore_cache.get_or_load("explore", build_explore_body)
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("🌟 TraveAI Backend is starting up!")
     logger.info("🤖 AI Models: Gemini 2.0 Flash")
     logger.info("🗄️ Database: MongoDB Connected")
+    # Stored chat dictionaries are needed to encode and decode, so they load before serving
+    await startup.run_phase("codec_dictionaries", lambda: codec.load_dictionaries(db))
+    write_buffer.start()
+    required_steps = backfill_steps()
+    startup.require(required_steps)
+    background_tasks.append(asyncio.create_task(stats.reconcile_periodically(analytics_db)))
+    background_tasks.append(asyncio.create_task(trending.reseed_periodically(analytics_db)))
+    background_tasks.append(asyncio.create_task(retention.archive_periodically(db)))
+    background_tasks.append(asyncio.create_task(lifecycle.run_scheduler(db)))
+    background_tasks.append(asyncio.create_task(invalidation_bus.run()))
+    background_tasks.append(asyncio.create_task(readiness.run()))
+    # Backfills, index maintenance and warmup run once the worker is already
+    # serving; readiness stays false until the backfills are done
+    steps = index_steps()
+    if startup.WARMUP == "background":
+        steps += [
+            ("warmup_mongo_pool", warm_mongo_pool),
+            ("warmup_caches", warm_caches),
+            ("warmup_llm_client", lambda: llm.warmup(GEMINI_API_KEY)),
+            ("warmup_geocoder", geo.warmup)
+        ]
+    background_tasks.append(asyncio.create_task(prepare_in_background(required_steps, steps)))
+    startup.mark("ready")
     logger.info("✅ Ready to help travelers explore India!")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     logger.info("👋 TraveAI Backend is shutting down gracefully...")
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await write_buffer.close()
     client.close()
     logger.info("✅ Database connections closed!")
 
 # Root endpoint
+APP_ROOT_RESPONSE = PrebuiltJSON({
+    "message": "🙏 Welcome to TraveAI!",
+    "description": "Your AI-powered travel companion for exploring incredible India",
+    "api_docs": "/docs",
+    "version": "1.0.0",
+    "status": "🚀 Ready for adventure!"
+})
+
 @app.get("/")
 async def root():
-    return {
-        "message": "🙏 Welcome to TraveAI!",
-        "description": "Your AI-powered travel companion for exploring incredible India",
-        "api_docs": "/docs",
-        "version": "1.0.0",
-        "status": "🚀 Ready for adventure!"
-    }
\ No newline at end of file
+    return APP_ROOT_RESPONSE.response()
+
+# Prometheus scrape endpoint (per worker process)
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,109 @@
+import logging
+from datetime import datetime
+from typing import Optional
+
+from pymongo import ASCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+RECENT_DESTINATIONS_LIMIT = 5
+
+# activity kind -> (counter field, last-activity timestamp field)
+ACTIVITY_FIELDS = {
+    "itinerary": ("itineraries", "last_itinerary_at"),
+    "chat": ("chat_messages", "last_chat_at"),
+    "route": ("route_analyses", "last_route_at"),
+}
+
+# source collection -> (activity kind, count expression, first timestamp, last timestamp)
+SOURCE_COLLECTIONS = {
+    "itineraries": ("itinerary", 1, "$created_at", "$created_at"),
+    "chat_history": ("chat", 1, "$timestamp", "$timestamp"),
+    "route_analyses": ("route", 1, "$created_at", "$created_at"),
+}
+# Bucketed chat layout: each document carries its own turn count and time range.
+CHAT_BUCKET_SOURCE = ("chat", "$count", "$first_timestamp", "$last_timestamp")
+
+
+async def ensure_session_indexes(db):
+    await db.session_summaries.create_index([("session_id", ASCENDING)], unique=True)
+
+
+async def record_activity(db, session_id: str, kind: str, destination: Optional[str] = None):
+    """Bump the session's counter for ``kind`` and its activity timestamps.
+
+    Like the global counters this is best-effort; ``backfill`` recomputes
+    summaries from the source collections if they ever drift.
+    """
+    counter_field, timestamp_field = ACTIVITY_FIELDS[kind]
+    now = datetime.utcnow()
+    update = {
+        "$inc": {counter_field: 1},
+        "$set": {"last_activity_at": now, timestamp_field: now},
+        "$setOnInsert": {"first_seen_at": now},
+        # New activity revives an archived session, cancelling its summary TTL.
+        "$unset": {"archived_at": ""},
+    }
+    if destination:
+        update["$push"] = {
+            "recent_destinations": {"$each": [destination], "$slice": -RECENT_DESTINATIONS_LIMIT}
+        }
+    try:
+        await db.session_summaries.update_one({"session_id": session_id}, update, upsert=True)
+    except Exception as e:
+        logger.error(f"Failed to update session summary for {session_id}: {str(e)}")
+
+
+async def get_summary(db, session_id: str) -> dict:
+    summary = await db.session_summaries.find_one({"session_id": session_id}, {"_id": 0})
+    return summary or {"session_id": session_id}
+
+
+async def backfill(db, batch_size: int = 500, chat_layout: str = "document") -> dict:
+    """Rebuild ``session_summaries`` from itineraries, chat history and route analyses.
+
+    Counts and timestamps are written with ``$set`` so the backfill is
+    idempotent and can be re-run to repair drift.
+    """
+    sources = dict(SOURCE_COLLECTIONS)
+    if chat_layout == "bucket":
+        del sources["chat_history"]
+        sources["chat_buckets"] = CHAT_BUCKET_SOURCE
+
+    processed = {}
+    for collection, (kind, count_expr, first_expr, last_expr) in sources.items():
+        counter_field, last_field = ACTIVITY_FIELDS[kind]
+        pipeline = [
+            {"$sort": {last_expr[1:]: 1}},
+            {"$group": {
+                "_id": "$session_id",
+                "count": {"$sum": count_expr},
+                "first": {"$min": first_expr},
+                "last": {"$max": last_expr},
+                **({"destinations": {"$push": "$destination"}} if kind == "itinerary" else {}),
+            }},
+        ]
+        if kind == "itinerary":
+            pipeline.append({"$set": {"destinations": {"$slice": ["$destinations", -RECENT_DESTINATIONS_LIMIT]}}})
+
+        ops = []
+        processed[collection] = 0
+        cursor = db[collection].aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
+        async for group in cursor:
+            if not group["_id"]:
+                continue
+            processed[collection] += 1
+            update = {
+                "$set": {counter_field: group["count"], last_field: group["last"]},
+                "$max": {"last_activity_at": group["last"]},
+                "$min": {"first_seen_at": group["first"]},
+            }
+            if kind == "itinerary":
+                update["$set"]["recent_destinations"] = [d for d in group["destinations"] if d]
+            ops.append(UpdateOne({"session_id": group["_id"]}, update, upsert=True))
+            if len(ops) >= batch_size:
+                await db.session_summaries.bulk_write(ops, ordered=False)
+                ops = []
+        if ops:
+            await db.session_summaries.bulk_write(ops, ordered=False)
+    return processed
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# "background" runs warmup after the worker starts serving; "off" skips it
+WARMUP = os.environ.get("STARTUP_WARMUP", "background")
+# Delay before a failed required step (a data backfill) is tried again
+REQUIRED_RETRY_SECONDS = float(os.environ.get("STARTUP_REQUIRED_RETRY_SECONDS", "10"))
+
+# Set when this module is first imported, i.e. at the top of server.py
+PROCESS_STARTED = time.perf_counter()
+
+phases: Dict[str, dict] = {}
+# Phases that must finish before the worker reports ready (see health.py)
+required: List[str] = []
+
+
+def mark(name: str, started: float = PROCESS_STARTED):
+    """Record a phase that ran from ``started`` until now."""
+    phases[name] = {"status": "done", "duration_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+async def run_phase(name: str, step: Callable[[], Awaitable[None]]) -> bool:
+    """Run and time one startup step; failures are logged, never raised."""
+    started = time.perf_counter()
+    phases[name] = {"status": "running"}
+    try:
+        await step()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        phases[name] = {
+            "status": "failed",
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "error": str(e),
+        }
+        logger.error(f"Startup step {name} failed: {str(e)}")
+        return False
+    mark(name, started)
+    return True
+
+
+def require(steps: List[Tuple[str, Callable[[], Awaitable[None]]]]):
+    """Make readiness wait for ``steps``; call before the first readiness probe can run."""
+    required.extend(name for name, _ in steps)
+
+
+async def run_required(steps: List[Tuple[str, Callable[[], Awaitable[None]]]]):
+    """Run ``steps`` in order, retrying each until it succeeds."""
+    for name, step in steps:
+        while not await run_phase(name, step):
+            await asyncio.sleep(REQUIRED_RETRY_SECONDS)
+
+
+def required_status() -> dict:
+    pending = [name for name in required if phases.get(name, {}).get("status") != "done"]
+    return {"ok": not pending, "pending": pending}
+
+
+async def run_background(steps: List[Tuple[str, Callable[[], Awaitable[None]]]]):
+    """Run ``steps`` one after another, after the worker has started serving.
+
+    Each step is its own phase, so one failing (say, an index options
+    conflict) is logged and reported without skipping the rest.
+    """
+    started = time.perf_counter()
+    results = [await run_phase(name, step) for name, step in steps]
+    logger.info(
+        f"🔥 Background startup finished in {(time.perf_counter() - started) * 1000:.0f}ms "
+        f"({sum(results)}/{len(results)} steps ok)"
+    )
+
+
+def report() -> dict:
+    return {"warmup": WARMUP, "required": required_status(), "phases": dict(phases)}
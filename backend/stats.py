@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from pymongo import ReadPreference
+
+import leases
+import lifecycle
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_ID = "global"
+SKETCH_ID = "unique_users_hll"
+
+# 2^11 registers -> ~2.3% standard error for the unique-user estimate.
+HLL_PRECISION = 11
+HLL_REGISTERS = 1 << HLL_PRECISION
+
+RECONCILE_INTERVAL_SECONDS = int(os.environ.get("STATS_RECONCILE_INTERVAL_SECONDS", "900"))
+
+COUNTER_FIELDS = ("total_itineraries", "verified_vendors", "active_offers", "upcoming_events")
+# Itineraries moved out of the hot collection by retention.archive_session.
+# They still count towards total_itineraries, so reconcile adds them back.
+ARCHIVED_ITINERARIES = "archived_itineraries"
+
+
+def _hll_position(value: str):
+    """Return the (register index, rank) pair a value contributes to the sketch."""
+    hashed = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+    index = hashed >> (64 - HLL_PRECISION)
+    remainder = hashed & ((1 << (64 - HLL_PRECISION)) - 1)
+    rank = (64 - HLL_PRECISION) - remainder.bit_length() + 1
+    return index, rank
+
+
+def hll_estimate(registers: Dict[str, int]) -> int:
+    """Estimate cardinality from a sparse ``{"index": rank}`` register map."""
+    m = HLL_REGISTERS
+    alpha = 0.7213 / (1 + 1.079 / m)
+    zeros = m - len(registers)
+    harmonic = zeros + sum(2.0 ** -rank for rank in registers.values())
+    estimate = alpha * m * m / harmonic
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
+
+def _sketch_update(session_ids: Iterable[str]) -> dict:
+    registers = {}
+    for session_id in session_ids:
+        index, rank = _hll_position(session_id)
+        key = f"registers.{index}"
+        registers[key] = max(rank, registers.get(key, 0))
+    return registers
+
+
+async def increment(db, **deltas):
+    """Atomically adjust one or more global counters.
+
+    Counter writes are best-effort: a failure is logged rather than failing
+    the request whose primary write already succeeded, and the periodic
+    reconciliation repairs any drift.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    try:
+        await db.stats_counters.update_one(
+            {"_id": COUNTERS_ID},
+            {"$inc": deltas, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.error(f"Failed to update stats counters: {str(e)}")
+
+
+async def record_itinerary(db, session_id: str):
+    await increment(db, total_itineraries=1)
+    try:
+        await db.stats_counters.update_one(
+            {"_id": SKETCH_ID},
+            {"$max": _sketch_update([session_id])},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.error(f"Failed to update unique-user sketch: {str(e)}")
+
+
+async def record_vendor(db, vendor: dict):
+    await increment(db, verified_vendors=1 if vendor.get("verified") else 0)
+
+
+async def record_offer(db, offer: dict):
+    await increment(db, active_offers=1 if offer.get("is_active") else 0)
+
+
+async def record_event(db, event: dict):
+    await increment(db, upcoming_events=1 if event.get("status") == lifecycle.EVENT_ACTIVE else 0)
+
+
+async def record_archived_itineraries(db, delta: int):
+    """Adjust the archived-itinerary tally (negative when a session is restored)."""
+    await increment(db, **{ARCHIVED_ITINERARIES: delta})
+
+
+async def reconcile(db, batch_size: int = 1000, include_sketch: bool = False) -> dict:
+    """Recount every counter from the source collections.
+
+    Counters drift when offers expire or events finish, so they are reset to
+    exact values here; archived itineraries are added back from their tally.
+    ``include_sketch`` also rebuilds the unique-user sketch
+    with a full scan of itinerary sessions, which is only needed to bootstrap
+    or repair it: the sketch is maintained incrementally and only ever merged
+    with ``$max`` since a HyperLogLog union can never lose members.
+    """
+    counts = await asyncio.gather(
+        db.itineraries.count_documents({}),
+        db.vendors.count_documents({"verified": True}),
+        db.vendor_offers.count_documents(lifecycle.ACTIVE_OFFER_FILTER),
+        db.tourism_events.count_documents(lifecycle.ACTIVE_EVENT_FILTER),
+        db.stats_counters.find_one({"_id": COUNTERS_ID}, {ARCHIVED_ITINERARIES: 1}),
+    )
+    counters = dict(zip(COUNTER_FIELDS, counts[:4]))
+    counters["total_itineraries"] += max(0, (counts[4] or {}).get(ARCHIVED_ITINERARIES, 0))
+
+    registers = {}
+    if include_sketch:
+        cursor = db.itineraries.aggregate(
+            [{"$group": {"_id": "$session_id"}}],
+            allowDiskUse=True,
+            batchSize=batch_size,
+        )
+        async for group in cursor:
+            if group["_id"]:
+                for key, rank in _sketch_update([group["_id"]]).items():
+                    registers[key] = max(rank, registers.get(key, 0))
+
+    now = datetime.utcnow()
+    await db.stats_counters.update_one(
+        {"_id": COUNTERS_ID},
+        {"$set": {**counters, "updated_at": now, "reconciled_at": now}},
+        upsert=True,
+    )
+    if registers:
+        await db.stats_counters.update_one({"_id": SKETCH_ID}, {"$max": registers}, upsert=True)
+    return counters
+
+
+async def reconcile_periodically(db):
+    while True:
+        try:
+            if await leases.claim(db, "stats_reconcile", RECONCILE_INTERVAL_SECONDS):
+                counters = await reconcile(db)
+                logger.info(f"📊 Stats reconciled: {counters}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Stats reconciliation failed: {str(e)}")
+        await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+
+
+_bootstrap: Optional[asyncio.Task] = None
+
+
+async def _bootstrap_once(db):
+    """Build counters and sketch, once per worker however many readers ask at the same time."""
+    global _bootstrap
+    if _bootstrap is None:
+        _bootstrap = asyncio.ensure_future(reconcile(db, include_sketch=True))
+        _bootstrap.add_done_callback(_clear_bootstrap)
+    await asyncio.shield(_bootstrap)
+
+
+def _clear_bootstrap(task: asyncio.Task):
+    global _bootstrap
+    _bootstrap = None
+    if not task.cancelled():
+        # Mark the exception retrieved even if every waiter has gone away.
+        task.exception()
+
+
+async def _read_stats_docs(db) -> Dict[str, dict]:
+    docs = await db.stats_counters.find({"_id": {"$in": [COUNTERS_ID, SKETCH_ID]}}).to_list(2)
+    return {doc["_id"]: doc for doc in docs}
+
+
+async def read_global_stats(db) -> dict:
+    """Read the counters and sketch documents, bootstrapping them on first use.
+
+    ``db`` may route reads to a secondary. A missing counters document is
+    bootstrapped and re-read on the primary, since a lagging secondary could
+    keep reporting it missing.
+    """
+    by_id = await _read_stats_docs(db)
+    counters: Optional[dict] = by_id.get(COUNTERS_ID)
+    if not counters or "reconciled_at" not in counters:
+        primary = db.with_options(read_preference=ReadPreference.PRIMARY)
+        await _bootstrap_once(primary)
+        by_id = await _read_stats_docs(primary)
+        counters = by_id.get(COUNTERS_ID) or {}
+
+    registers = by_id.get(SKETCH_ID, {}).get("registers", {})
+    return {
+        "total_users": hll_estimate(registers),
+        **{field: max(0, counters.get(field, 0)) for field in COUNTER_FIELDS},
+    }
@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Request lines are JSON already: give them a bare formatter and keep them out
+# of the root handler, which would wrap each one in its own text prefix
+logger = logging.getLogger(__name__)
+_handler = logging.StreamHandler()
+_handler.setFormatter(logging.Formatter("%(message)s"))
+logger.addHandler(_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+ENABLED = os.environ.get("TIMING_ENABLED", "1") == "1"
+# One JSON line per request on the "timing" logger
+LOG_REQUESTS = os.environ.get("TIMING_LOG_REQUESTS", "1") == "1"
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "1000"))
+SLOW_REQUEST_SAMPLES = int(os.environ.get("SLOW_REQUEST_SAMPLES", "100"))
+
+# Stage names used by the handlers; anything else is accepted too.
+GEOCODE = "geocode"
+LLM = "llm"
+DB_READ = "db_read"
+DB_WRITE = "db_write"
+SERIALIZE = "serialize"
+
+
+class RequestTiming:
+    """Spans recorded while serving one request, as (name, start offset, duration) in seconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def totals(self) -> Dict[str, float]:
+        """Milliseconds per stage; concurrent spans of one stage are added up."""
+        totals: Dict[str, float] = {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration * 1000
+        return totals
+
+    def breakdown(self) -> List[dict]:
+        return [
+            {"stage": name, "start_ms": round(offset * 1000, 3), "duration_ms": round(duration * 1000, 3)}
+            for name, offset, duration in self.spans
+        ]
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+slow_requests: deque = deque(maxlen=SLOW_REQUEST_SAMPLES)
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block as stage ``name`` of the current request (no-op outside one)."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.spans.append((name, started - timing.started, time.perf_counter() - started))
+
+
+def server_timing(totals: Dict[str, float], total_ms: float) -> str:
+    parts = [f"{name};dur={duration:.1f}" for name, duration in totals.items()]
+    parts.append(f"app;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+class TimingMiddleware:
+    """Server-Timing header, a structured log line and slow-request samples per request.
+
+    The header is written when the response starts, so it covers every span
+    up to then; the log line and slow samples cover the whole request,
+    including a streamed body.
+    """
+
+    def __init__(self, app, enabled: bool = ENABLED, slow_ms: float = SLOW_REQUEST_MS):
+        self.app = app
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed_ms = (time.perf_counter() - timing.started) * 1000
+                header = server_timing(timing.totals(), elapsed_ms)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._finish(scope, timing, status)
+
+    def _finish(self, scope, timing: RequestTiming, status: int):
+        duration_ms = (time.perf_counter() - timing.started) * 1000
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "stages": {name: round(value, 3) for name, value in timing.totals().items()},
+        }
+        if LOG_REQUESTS:
+            logger.info(json.dumps(record, ensure_ascii=False))
+        if duration_ms >= self.slow_ms:
+            record["query"] = scope.get("query_string", b"").decode("latin-1")
+            record["at"] = datetime.utcnow().isoformat()
+            record["spans"] = timing.breakdown()
+            slow_requests.append(record)
+            logging.warning(f"🐢 Slow request {scope['method']} {scope['path']} took {duration_ms:.0f}ms")
+
+
+def slow_samples(limit: int = SLOW_REQUEST_SAMPLES) -> List[dict]:
+    """Most recent slow requests first."""
+    return list(reversed(slow_requests))[:limit]
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from pymongo import ASCENDING
+
+from search import normalize_text
+
+logger = logging.getLogger(__name__)
+
+HALF_LIFE_HOURS = float(os.environ.get("TRENDING_HALF_LIFE_HOURS", "24"))
+TOP_K = int(os.environ.get("TRENDING_TOP_K", "20"))
+RESEED_INTERVAL_SECONDS = int(os.environ.get("TRENDING_RESEED_INTERVAL_SECONDS", "600"))
+
+# Seed from this many half-lives of history; older itineraries weigh < 0.4%.
+SEED_HALF_LIVES = 8
+# Rebase scores once the forward-decay exponent reaches this many half-lives.
+REBASE_HALF_LIVES = 64
+# Drop destinations whose decayed weight falls below this on rebase.
+PRUNE_BELOW = 0.01
+
+
+class TrendingEngine:
+    """Exponentially decayed destination counts with an incrementally kept top-K.
+
+    Uses forward decay: an event at time ``t`` adds ``2 ** ((t - epoch) / half_life)``
+    to its destination's raw score. Decay is applied only when scores are read,
+    so all raw scores share one scale, ordering never changes with time, and the
+    top-K can be maintained exactly on each update without a rescan.
+    """
+
+    def __init__(self, half_life_hours: float = HALF_LIFE_HOURS, top_k: int = TOP_K):
+        self.half_life = half_life_hours * 3600.0
+        self.top_k = top_k
+        self.epoch = time.time()
+        self.scores: Dict[str, float] = {}
+        self.names: Dict[str, str] = {}
+        self._top: List[str] = []
+
+    def _weight(self, at: float) -> float:
+        return 2.0 ** ((at - self.epoch) / self.half_life)
+
+    def _rebase(self, now: float):
+        factor = self._weight(now)
+        self.epoch = now
+        self.scores = {key: score / factor for key, score in self.scores.items() if score / factor >= PRUNE_BELOW}
+        self.names = {key: self.names[key] for key in self.scores}
+        self._top = [key for key in self._top if key in self.scores]
+
+    def record(self, destination: Optional[str], at: Optional[float] = None, count: float = 1.0):
+        key = normalize_text(destination)
+        if not key:
+            return
+        at = time.time() if at is None else at
+        if (at - self.epoch) / self.half_life > REBASE_HALF_LIVES:
+            self._rebase(at)
+        self.scores[key] = self.scores.get(key, 0.0) + count * self._weight(at)
+        self.names.setdefault(key, destination.strip())
+
+        if key not in self._top:
+            if len(self._top) < self.top_k:
+                self._top.append(key)
+            elif self.scores[key] > self.scores[self._top[-1]]:
+                self._top[-1] = key
+            else:
+                return
+        self._top.sort(key=self.scores.__getitem__, reverse=True)
+
+    def score(self, destination: str, now: Optional[float] = None) -> float:
+        raw = self.scores.get(normalize_text(destination), 0.0)
+        return raw / self._weight(time.time() if now is None else now)
+
+    def top(self, limit: int = 5) -> List[dict]:
+        decay = self._weight(time.time())
+        return [
+            {"name": self.names[key], "count": round(self.scores[key] / decay, 2)}
+            for key in self._top[:limit]
+        ]
+
+
+engine = TrendingEngine()
+
+
+async def ensure_trending_indexes(db):
+    await db.itineraries.create_index([("created_at", ASCENDING)])
+
+
+async def build_engine(db) -> TrendingEngine:
+    """Build a fresh engine from recent itineraries, bucketed by hour in Mongo."""
+    fresh = TrendingEngine(engine.half_life / 3600.0, engine.top_k)
+    since = datetime.utcnow() - timedelta(seconds=fresh.half_life * SEED_HALF_LIVES)
+    cursor = db.itineraries.aggregate([
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            "_id": {
+                "destination": "$destination",
+                "hour": {"$dateToString": {"format": "%Y-%m-%dT%H", "date": "$created_at"}},
+            },
+            "count": {"$sum": 1},
+        }},
+        {"$sort": {"_id.hour": 1}},
+    ], allowDiskUse=True)
+    async for bucket in cursor:
+        hour = datetime.strptime(bucket["_id"]["hour"], "%Y-%m-%dT%H")
+        # Naive UTC datetimes from Mongo; centre each bucket on its half hour.
+        at = (hour - datetime(1970, 1, 1)).total_seconds() + 1800
+        fresh.record(bucket["_id"]["destination"], at=at, count=bucket["count"])
+    return fresh
+
+
+async def reseed_periodically(db):
+    """Rebuild from Mongo so each worker also reflects other workers' writes."""
+    global engine
+    while True:
+        try:
+            engine = await build_engine(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to seed trending destinations: {str(e)}")
+        await asyncio.sleep(RESEED_INTERVAL_SECONDS)
+
+
+def record(destination: Optional[str]):
+    engine.record(destination)
+
+
+def top(limit: int = 5) -> List[dict]:
+    return engine.top(limit)
+
+
+def score(destination: str) -> float:
+    return engine.score(destination)
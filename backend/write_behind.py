@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("WRITE_BEHIND_ENABLED", "true").lower() == "true"
+MAX_QUEUE = int(os.environ.get("WRITE_BEHIND_MAX_QUEUE", "10000"))
+BATCH_SIZE = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", "200"))
+FLUSH_INTERVAL_MS = int(os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL_MS", "250"))
+MAX_RETRIES = 3
+
+
+class WriteBehindBuffer:
+    """Defers inserts onto a bounded queue drained by one background flusher.
+
+    The flusher groups queued documents per collection and writes them with
+    ``insert_many(ordered=False)`` once ``batch_size`` documents are waiting or
+    ``flush_interval_ms`` has passed. When the queue is full, or the buffer is
+    not running, ``insert`` falls back to a direct ``insert_one`` so memory
+    stays bounded and no write is dropped. Callers that need the document id
+    up front must set ``_id`` before enqueueing.
+    """
+
+    def __init__(
+        self,
+        db,
+        enabled: bool = ENABLED,
+        max_queue: int = MAX_QUEUE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval_ms: int = FLUSH_INTERVAL_MS,
+    ):
+        self.db = db
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Items taken off the queue but not yet written; close() flushes them.
+        self._pending = []
+        self.counters = {
+            "enqueued": 0,
+            "flushed": 0,
+            "batches": 0,
+            "direct_writes": 0,
+            "duplicate_errors": 0,
+            "failed": 0,
+        }
+        self.last_flush_ms = 0.0
+        self.last_batch_size = 0
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._closing
+
+    async def insert(self, collection: str, doc: dict):
+        if self.running:
+            try:
+                self.queue.put_nowait((collection, doc))
+                self.counters["enqueued"] += 1
+                return
+            except asyncio.QueueFull:
+                pass
+        self.counters["direct_writes"] += 1
+        await self.db[collection].insert_one(doc)
+
+    async def _fill_pending(self):
+        self._pending.append(await self.queue.get())
+        deadline = time.monotonic() + self.flush_interval
+        while len(self._pending) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                self._pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _flush(self, batch):
+        started = time.perf_counter()
+        by_collection = defaultdict(list)
+        for collection, doc in batch:
+            by_collection[collection].append(doc)
+        for collection, docs in by_collection.items():
+            await self._insert_many(collection, docs)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        self.last_batch_size = len(batch)
+        self.counters["batches"] += 1
+
+    async def _insert_many(self, collection: str, docs):
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                await self.db[collection].insert_many(docs, ordered=False)
+                self.counters["flushed"] += len(docs)
+                return
+            except BulkWriteError as e:
+                # Unordered: everything except the reported errors was written.
+                errors = e.details.get("writeErrors", [])
+                duplicates = sum(1 for error in errors if error.get("code") == 11000)
+                self.counters["flushed"] += e.details.get("nInserted", 0)
+                self.counters["duplicate_errors"] += duplicates
+                self.counters["failed"] += len(errors) - duplicates
+                if len(errors) > duplicates:
+                    logger.error(f"Write-behind insert into {collection} had {len(errors) - duplicates} errors")
+                return
+            except Exception as e:
+                if attempt == MAX_RETRIES:
+                    self.counters["failed"] += len(docs)
+                    logger.error(f"Write-behind insert into {collection} failed after {attempt} attempts: {str(e)}")
+                    return
+                # Retried documents keep their _id, so a partially applied batch only yields duplicates.
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+    async def _run(self):
+        while True:
+            await self._fill_pending()
+            await self._flush(self._pending)
+            self._pending = []
+
+    async def close(self):
+        """Stop the flusher and synchronously write everything still queued."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        # A batch interrupted mid-flush is rewritten whole; rows that already
+        # landed come back as duplicate-key errors and are skipped.
+        batch = self._pending
+        self._pending = []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if batch:
+            await self._flush(batch)
+            logger.info(f"💾 Flushed {len(batch)} buffered writes on shutdown")
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "last_batch_size": self.last_batch_size,
+            **self.counters,
+        }
@@ -0,0 +1,136 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+import bulk_import
+import catalogue
+
+
+class Event(BaseModel):
+    id: str
+    title: str
+    description: str = ""
+    event_type: str = "festival"
+    location: str
+    end_date: datetime
+    tags: List[str] = []
+    entry_fee: Optional[float] = None
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def _lines(*chunks, **kwargs):
+    async def run():
+        return [item async for item in bulk_import.iter_lines(_chunks(*chunks), **kwargs)]
+
+    return asyncio.run(run())
+
+
+def test_lines_split_across_chunks_and_crlf():
+    assert _lines(b'{"a": 1}\r\n{"b"', b': 2}\r\n{"c": 3}') == [
+        (1, b'{"a": 1}\r'),
+        (2, b'{"b": 2}\r'),
+        (3, b'{"c": 3}'),
+    ]
+    # The carriage return is JSON whitespace
+    assert json.loads(b'{"a": 1}\r') == {"a": 1}
+
+
+def test_blank_lines_keep_their_numbers():
+    assert _lines(b'{"a": 1}\n\n{"b": 2}\n\n') == [(1, b'{"a": 1}'), (2, b""), (3, b'{"b": 2}'), (4, b"")]
+
+
+def test_oversized_lines_are_reported_and_skipped():
+    long_line = b'{"x": "' + b"y" * 50 + b'"}'
+    assert _lines(b'{"a": 1}\n', long_line[:20], long_line[20:] + b"\n", b'{"b": 2}', max_line_bytes=32) == [
+        (1, b'{"a": 1}'),
+        (2, None),
+        (3, b'{"b": 2}'),
+    ]
+    assert _lines(long_line, max_line_bytes=32) == [(1, None)]
+
+
+def test_gzip_body():
+    body = gzip.compress(b'{"a": 1}\n{"b": 2}\n')
+    assert _lines(body[:10], body[10:], gzip=True) == [(1, b'{"a": 1}'), (2, b'{"b": 2}')]
+
+
+def test_upsert_keeps_explicit_fields_and_accepts_timezone_aware_dates():
+    end = datetime.now(timezone.utc) + timedelta(days=2)
+    operation = bulk_import.upsert_operation("tourism_events", Event(id="e1", title="Hornbill", location="Kohima", end_date=end))
+    update = operation._doc
+    assert operation._filter == {"id": "e1"}
+    assert update["$set"]["title"] == "Hornbill"
+    assert update["$set"]["status"] == "active"
+    assert "id" not in update["$set"]
+    # Defaults only fill new documents
+    assert update["$setOnInsert"]["tags"] == []
+    assert "tags" not in update["$set"]
+
+
+class Result:
+    def __init__(self, upserted, matched):
+        self.upserted_count = upserted
+        self.matched_count = matched
+
+
+class Collection:
+    def __init__(self):
+        self.operations = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.operations.extend(operations)
+        return Result(len(operations), 0)
+
+
+class Database(dict):
+    def __missing__(self, name):
+        self[name] = Collection()
+        return self[name]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    async def after_bulk_write(db, collections):
+        pass
+
+    monkeypatch.setattr(catalogue, "after_bulk_write", after_bulk_write)
+    return Database()
+
+
+def test_import_reports_bad_rows_by_line_and_writes_the_rest(db):
+    rows = [
+        json.dumps({"id": "e1", "title": "Hornbill", "location": "Kohima", "end_date": "2030-12-10T00:00:00.000Z"}),
+        "",
+        "not json",
+        json.dumps({"id": "e2", "location": "Goa", "end_date": "2030-12-10T00:00:00"}),
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"id": "e3", "title": "Rann Utsav", "location": "Kutch", "end_date": "2030-02-28T00:00:00+05:30"}),
+    ]
+    body = ("\r\n".join(rows) + "\r\n").encode()
+
+    report = asyncio.run(bulk_import.import_ndjson(db, "tourism_events", Event, _chunks(body), batch_size=1))
+
+    assert report["processed"] == 5
+    assert report["inserted"] == 2
+    assert report["failed"] == 3
+    assert [error["line"] for error in report["errors"]] == [3, 4, 5]
+    assert "title" in report["errors"][1]["error"]
+    assert [operation._filter["id"] for operation in db["tourism_events"].operations] == ["e1", "e3"]
+
+
+def test_import_reports_oversized_lines(db):
+    body = b'{"id": "e1", "title": "T", "location": "Goa", "end_date": "2030-01-01T00:00:00Z"}\n' + b"x" * 200 + b"\n"
+    report = asyncio.run(
+        bulk_import.import_ndjson(db, "tourism_events", Event, _chunks(body), max_line_bytes=100)
+    )
+    assert report["inserted"] == 1
+    assert report["errors"] == [{"line": 2, "error": "Line exceeds 100 bytes"}]
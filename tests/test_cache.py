@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from cache import TTLCache
+
+
+def test_hit_within_ttl_and_reload_after_invalidate():
+    cache = TTLCache("test-hit", 60, ["vendors"])
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        return len(loads)
+
+    async def run():
+        first = await cache.get_or_load("key", loader)
+        second = await cache.get_or_load("key", loader)
+        cache.invalidate()
+        third = await cache.get_or_load("key", loader)
+        return first, second, third
+
+    assert asyncio.run(run()) == (1, 1, 2)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache("test-single-flight", 60, [])
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert len(loads) == 1
+
+
+def test_load_started_before_invalidation_is_not_cached():
+    cache = TTLCache("test-generation", 60, [])
+
+    async def loader():
+        cache.invalidate()
+        return "stale"
+
+    async def run():
+        await cache.get_or_load("key", loader)
+        return cache._entries
+
+    assert asyncio.run(run()) == {}
+
+
+def test_loader_error_reaches_waiters_and_clears_inflight():
+    cache = TTLCache("test-error", 60, [])
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert cache._inflight == {}
+
+
+def test_cancelled_loader_does_not_strand_waiters():
+    cache = TTLCache("test-cancel", 60, [])
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0.05)
+        return len(loads)
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_load("key", loader))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get_or_load("key", loader)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.wait_for(asyncio.gather(*waiters), timeout=1)
+
+    assert asyncio.run(run()) == [2, 2, 2]
+    assert cache._inflight == {}
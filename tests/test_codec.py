@@ -0,0 +1,49 @@
+import pytest
+
+import codec
+
+LONG_TEXT = "🌴 Day 1: Arrive in Goa, check in and walk along Calangute beach.\n" * 40
+ALGORITHMS = ["zlib", pytest.param("zstd", marks=pytest.mark.skipif(codec.zstandard is None, reason="zstandard not installed"))]
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_text_round_trip(algorithm):
+    encoded = codec.encode_text(LONG_TEXT, algorithm)
+    assert encoded["_codec"] == codec.CODEC_VERSION
+    assert encoded["alg"] == algorithm
+    assert encoded["size"] == len(LONG_TEXT.encode("utf-8"))
+    assert len(encoded["data"]) < encoded["size"]
+    assert codec.decode_text(encoded) == LONG_TEXT
+
+
+def test_short_and_plain_values_pass_through():
+    assert codec.encode_text("short", "zlib") == "short"
+    assert codec.encode_text(None, "zlib") is None
+    assert codec.encode_text(LONG_TEXT, "none") == LONG_TEXT
+    # Documents written before the codec existed hold plain strings
+    assert codec.decode_text("legacy text") == "legacy text"
+
+
+def test_dictionary_round_trip(monkeypatch):
+    dictionary = codec.train_dictionary([LONG_TEXT, LONG_TEXT], "zlib")
+    monkeypatch.setattr(codec, "_dictionaries", {"zlib-test": ("zlib", dictionary)})
+    monkeypatch.setattr(codec, "_active_dictionary", "zlib-test")
+    encoded = codec.encode_text(LONG_TEXT, "zlib")
+    assert encoded["dict"] == "zlib-test"
+    assert codec.decode_text(encoded) == LONG_TEXT
+
+    monkeypatch.setattr(codec, "_dictionaries", {})
+    with pytest.raises(KeyError):
+        codec.decode_text(encoded)
+
+
+def test_bytes_round_trip():
+    raw = bytes(range(256)) * 8
+    assert codec.decode_bytes(codec.encode_bytes(raw, "zlib")) == raw
+
+
+def test_encode_fields_only_touches_configured_fields():
+    doc = {"generated_itinerary": LONG_TEXT, "destination": LONG_TEXT}
+    codec.encode_fields("itineraries", doc)
+    assert isinstance(doc["generated_itinerary"], dict)
+    assert doc["destination"] == LONG_TEXT
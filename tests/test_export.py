@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import export
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def test_build_query_stores_naive_utc_bounds():
+    query = export.build_query(
+        "chat_history",
+        session_id="s1",
+        since=datetime(2024, 1, 1, 5, 30, tzinfo=IST),
+        until=datetime(2024, 1, 2),
+    )
+    assert query == {
+        "session_id": "s1",
+        "timestamp": {"$gte": datetime(2024, 1, 1), "$lt": datetime(2024, 1, 2)},
+    }
+
+
+def test_build_query_rejects_bad_filters():
+    with pytest.raises(ValueError):
+        export.build_query("users")
+    with pytest.raises(ValueError):
+        export.build_query("vendors", session_id="s1")
+
+
+def test_in_window_is_half_open():
+    window = {"$gte": datetime(2024, 1, 1), "$lt": datetime(2024, 1, 2)}
+    assert export._in_window({"timestamp": datetime(2024, 1, 1)}, window)
+    assert export._in_window({"timestamp": datetime(2024, 1, 1, 23, 59)}, window)
+    assert not export._in_window({"timestamp": datetime(2024, 1, 2)}, window)
+    assert not export._in_window({"timestamp": datetime(2023, 12, 31, 23, 59)}, window)
+    assert not export._in_window({}, window)
+    assert export._in_window({}, {})
+
+
+def test_in_window_compares_aware_and_naive_in_utc():
+    window = {"$gte": datetime(2024, 1, 1, 5, 30, tzinfo=IST)}
+    assert export._in_window({"timestamp": datetime(2024, 1, 1, 0, 0)}, window)
+    assert not export._in_window({"timestamp": datetime(2023, 12, 31, 23, 59)}, window)
+    assert export._in_window({"timestamp": datetime(2024, 1, 1, tzinfo=timezone.utc)}, {"$lt": datetime(2024, 1, 1, 0, 1)})
+
+
+def test_bucket_query_selects_overlapping_buckets():
+    query = export.build_query("chat_history", since=datetime(2024, 1, 1), until=datetime(2024, 1, 2))
+    assert export._bucket_query(query) == {
+        "last_timestamp": {"$gte": datetime(2024, 1, 1)},
+        "first_timestamp": {"$lt": datetime(2024, 1, 2)},
+    }
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+import geo
+import metrics
+
+
+class Location:
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class FakeNominatim:
+    def __init__(self):
+        self.queries = []
+        self.called_at = []
+
+    def geocode(self, query):
+        self.queries.append(query)
+        self.called_at.append(time.monotonic())
+        return None if query.startswith("Nowhere") else Location(15.3, 74.1)
+
+
+@pytest.fixture
+def nominatim(monkeypatch):
+    fake = FakeNominatim()
+    monkeypatch.setattr(geo, "_geolocator", fake)
+    monkeypatch.setattr(geo, "_cache", geo.OrderedDict())
+    monkeypatch.setattr(geo, "_last_request", 0.0)
+    monkeypatch.setattr(geo, "_throttle", asyncio.Lock())
+    monkeypatch.setattr(geo, "MIN_INTERVAL_SECONDS", 0.05)
+    return fake
+
+
+def _lookups(result):
+    return metrics.geocoder_lookups._values.get((result,), 0.0)
+
+
+def test_hits_are_served_from_the_cache(nominatim):
+    hits, misses = _lookups("hit"), _lookups("miss")
+
+    async def run():
+        first = await geo.geocode("Goa, India")
+        second = await geo.geocode("  goa,   INDIA ")
+        return first, second
+
+    assert asyncio.run(run()) == ((15.3, 74.1), (15.3, 74.1))
+    assert nominatim.queries == ["Goa, India"]
+    assert (_lookups("hit") - hits, _lookups("miss") - misses) == (1, 1)
+
+
+def test_not_found_is_cached_too(nominatim):
+    async def run():
+        return [await geo.geocode("Nowhere, India") for _ in range(2)]
+
+    assert asyncio.run(run()) == [None, None]
+    assert len(nominatim.queries) == 1
+
+
+def test_misses_are_spaced_and_concurrent_lookups_share_one_request(nominatim):
+    async def run():
+        return await asyncio.gather(
+            geo.geocode("Goa, India"), geo.geocode("Goa, India"), geo.geocode("Agra, India"), geo.geocode("Leh, India")
+        )
+
+    asyncio.run(run())
+    assert sorted(nominatim.queries) == ["Agra, India", "Goa, India", "Leh, India"]
+    gaps = [later - earlier for earlier, later in zip(nominatim.called_at, nominatim.called_at[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+def test_cache_is_bounded(nominatim, monkeypatch):
+    monkeypatch.setattr(geo, "CACHE_SIZE", 2)
+    monkeypatch.setattr(geo, "MIN_INTERVAL_SECONDS", 0)
+
+    async def run():
+        for place in ("Agra", "Goa", "Leh"):
+            await geo.geocode(place)
+
+    asyncio.run(run())
+    assert list(geo._cache) == ["goa", "leh"]
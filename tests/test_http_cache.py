@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import http_cache
+from http_cache import HTTPCacheMiddleware
+
+
+def test_etag_matches_uses_weak_comparison():
+    etag = '"abc"'
+    assert http_cache.etag_matches('"abc"', etag)
+    assert http_cache.etag_matches('W/"abc"', etag)
+    assert http_cache.etag_matches('"xyz", "abc"', etag)
+    assert http_cache.etag_matches("*", etag)
+    assert not http_cache.etag_matches('"xyz"', etag)
+    assert not http_cache.etag_matches(None, etag)
+
+
+def test_version_etag_changes_with_updated_at():
+    first = http_cache.version_etag("vendor", "v1", datetime(2024, 1, 1))
+    assert first == http_cache.version_etag("vendor", "v1", datetime(2024, 1, 1))
+    assert first != http_cache.version_etag("vendor", "v1", datetime(2024, 1, 2))
+    assert first != http_cache.version_etag("offer", "v1", datetime(2024, 1, 1))
+
+
+def _client():
+    async def destinations(request):
+        return JSONResponse([{"name": "Goa"}])
+
+    async def vendor(request):
+        etag = http_cache.version_etag("vendor", request.path_params["vendor_id"], None)
+        cached = http_cache.not_modified(request, etag)
+        if cached:
+            return cached
+        return JSONResponse({"id": request.path_params["vendor_id"]}, headers={"ETag": etag})
+
+    async def missing(request):
+        return Response(status_code=404)
+
+    app = Starlette(routes=[
+        Route("/api/destinations", destinations),
+        Route("/api/vendors/{vendor_id}", vendor),
+        Route("/api/tourism-events", missing),
+    ])
+    app.add_middleware(HTTPCacheMiddleware)
+    return TestClient(app)
+
+
+def test_body_etag_and_conditional_get():
+    client = _client()
+    response = client.get("/api/destinations")
+    assert response.status_code == 200
+    assert response.headers["etag"] == http_cache.content_etag(response.content)
+    assert response.headers["cache-control"] == "public, max-age=300, stale-while-revalidate=3600"
+
+    revalidated = client.get("/api/destinations", headers={"If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == response.headers["etag"]
+
+    changed = client.get("/api/destinations", headers={"If-None-Match": '"stale"'})
+    assert changed.status_code == 200
+
+
+def test_endpoint_etag_is_kept_and_can_answer_304():
+    client = _client()
+    response = client.get("/api/vendors/v1")
+    etag = http_cache.version_etag("vendor", "v1", None)
+    assert response.headers["etag"] == etag
+    assert client.get("/api/vendors/v1", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_errors_and_uncached_routes_pass_through():
+    client = _client()
+    response = client.get("/api/tourism-events")
+    assert response.status_code == 404
+    assert "etag" not in response.headers
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta, timezone
+
+import catalogue
+import lifecycle
+
+NOW = datetime(2024, 6, 1, 12, 0)
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def test_offer_deactivated_once_valid_until_has_passed():
+    assert lifecycle.lifecycle_fields("vendor_offers", {"valid_until": NOW - timedelta(minutes=1)}, NOW) == {"is_active": False}
+    assert lifecycle.lifecycle_fields("vendor_offers", {"valid_until": NOW + timedelta(minutes=1)}, NOW) == {}
+    assert lifecycle.lifecycle_fields("vendor_offers", {}, NOW) == {}
+
+
+def test_event_status_follows_end_date():
+    assert lifecycle.lifecycle_fields("tourism_events", {"end_date": NOW - timedelta(days=1)}, NOW) == {"status": "archived"}
+    assert lifecycle.lifecycle_fields("tourism_events", {"end_date": NOW + timedelta(days=1)}, NOW) == {"status": "active"}
+
+
+def test_timezone_aware_dates_are_compared_in_utc():
+    # 17:00 IST is 11:30 UTC, half an hour before NOW
+    past = datetime(2024, 6, 1, 17, 0, tzinfo=IST)
+    future = datetime(2024, 6, 1, 12, 30, tzinfo=timezone.utc)
+    assert lifecycle.lifecycle_fields("vendor_offers", {"valid_until": past}, NOW) == {"is_active": False}
+    assert lifecycle.lifecycle_fields("vendor_offers", {"valid_until": future}, NOW) == {}
+    assert lifecycle.lifecycle_fields("tourism_events", {"end_date": past}, NOW) == {"status": "archived"}
+    assert lifecycle.lifecycle_fields("tourism_events", {"end_date": future}, NOW) == {"status": "active"}
+    # An aware "now" works against naive stored dates too
+    assert lifecycle.lifecycle_fields(
+        "tourism_events", {"end_date": NOW}, datetime(2024, 6, 1, 12, 0, 1, tzinfo=timezone.utc)
+    ) == {"status": "archived"}
+
+
+def test_derived_fields_accept_timezone_aware_dates():
+    end = datetime.now(timezone.utc) + timedelta(days=3)
+    event = {"title": "Hornbill Festival", "location": "Kohima", "event_type": "festival", "end_date": end}
+    assert catalogue.derived_fields("tourism_events", event)["status"] == lifecycle.EVENT_ACTIVE
+    offer = {"title": "Houseboat stay", "location": "Alleppey", "valid_until": datetime.now(timezone.utc) - timedelta(days=1)}
+    assert catalogue.derived_fields("vendor_offers", offer)["is_active"] is False
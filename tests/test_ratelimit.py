@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+import ratelimit
+from ratelimit import BucketPolicy, MemoryBackend
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def _take(backend, key, policy, cost=1.0):
+    return asyncio.run(backend.take(key, policy, cost))
+
+
+def test_burst_then_reject(clock):
+    backend = MemoryBackend()
+    policy = BucketPolicy("test", per_minute=60, burst=3)
+    assert [_take(backend, "ip", policy)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_tokens_refill_at_the_policy_rate(clock):
+    backend = MemoryBackend()
+    policy = BucketPolicy("test", per_minute=60, burst=2)
+    _take(backend, "ip", policy)
+    _take(backend, "ip", policy)
+    assert _take(backend, "ip", policy)[0] is False
+    clock.now += 1.0
+    allowed, tokens = _take(backend, "ip", policy)
+    assert allowed and tokens == pytest.approx(0)
+    # Refill never exceeds the burst size
+    clock.now += 3600
+    assert _take(backend, "ip", policy)[1] == pytest.approx(1)
+
+
+def test_keys_have_separate_buckets(clock):
+    backend = MemoryBackend()
+    policy = BucketPolicy("test", per_minute=60, burst=1)
+    assert _take(backend, "a", policy)[0]
+    assert _take(backend, "b", policy)[0]
+    assert not _take(backend, "a", policy)[0]
+
+
+def test_least_recently_used_buckets_are_evicted(clock):
+    backend = MemoryBackend(max_buckets=2)
+    policy = BucketPolicy("test", per_minute=60, burst=1)
+    for key in ("a", "b", "c"):
+        _take(backend, key, policy)
+    assert list(backend._buckets) == ["b", "c"]
+    # "a" was forgotten, so it starts from a full bucket again
+    assert _take(backend, "a", policy)[0]
+
+
+def test_route_classes():
+    assert ratelimit.route_class("POST", "/api/chat") == "llm"
+    assert ratelimit.route_class("GET", "/api/vendors") == "read"
+    assert ratelimit.route_class("POST", "/api/vendors") == "write"
+    assert ratelimit.route_class("GET", "/api/health") is None
+    assert ratelimit.route_class("OPTIONS", "/api/chat") is None
+
+
+def _call(middleware, session_id, ip="10.0.0.1"):
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/chat",
+        "headers": [(b"x-session-id", session_id.encode())],
+        "client": (ip, 1234),
+    }
+    asyncio.run(middleware(scope, receive, send))
+    return statuses[0]
+
+
+def test_throttled_session_does_not_drain_the_ip_bucket(clock, monkeypatch):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    monkeypatch.setattr(ratelimit, "LLM_IP_MULTIPLIER", 2)
+    policies = {"llm": BucketPolicy("llm", per_minute=1, burst=2)}
+    middleware = ratelimit.RateLimitMiddleware(app, MemoryBackend(), policies, enabled=True)
+
+    assert [_call(middleware, "busy") for _ in range(5)] == [200, 200, 429, 429, 429]
+    # The rejected requests were refunded, so the IP still has room for others
+    assert _call(middleware, "quiet") == 200
+    assert _call(middleware, "quiet") == 200
+    assert _call(middleware, "other") == 429
+    assert middleware.throttled == 4
@@ -0,0 +1,46 @@
+import search
+
+
+def test_normalize_text_folds_case_accents_and_punctuation():
+    assert search.normalize_text("  North-Goa,  INDIA! ") == "north goa india"
+    assert search.normalize_text("Café São") == "cafe sao"
+    assert search.normalize_text("Straße") == "strasse"
+    assert search.normalize_text("foo_bar") == "foo bar"
+    assert search.normalize_text("") == ""
+    assert search.normalize_text(None) == ""
+
+
+def test_normalize_text_keeps_non_latin_words_whole():
+    # Devanagari vowel signs and the anusvara are marks, not separators
+    assert search.normalize_text("हिंदी मंदिर, वाराणसी") == "हिंदी मंदिर वाराणसी"
+    assert search.normalize_text("東京 Tower") == "東京 tower"
+
+
+def test_tokenize_is_unique_and_ordered():
+    assert search.tokenize("Goa, North Goa") == ["goa", "north"]
+    assert search.tokenize(["Beach", ["sun", "Beach"], "Sun"]) == ["beach", "sun"]
+
+
+def test_location_filter_prefix_matches_every_token():
+    assert search.location_filter("goa") == {"location_tokens": {"$regex": "^goa"}}
+    assert search.location_filter("North go") == {"$and": [
+        {"location_tokens": {"$regex": "^north"}},
+        {"location_tokens": {"$regex": "^go"}},
+    ]}
+    # Punctuation never reaches the regex
+    assert search.location_filter("c++") == {"location_tokens": {"$regex": "^c"}}
+
+
+def test_location_filter_without_tokens():
+    assert search.location_filter(None) == {}
+    assert search.location_filter("   ") == {}
+    # Non-empty input with nothing searchable matches nothing rather than everything
+    assert search.location_filter("---") == {"location_tokens": {"$in": []}}
+
+
+def test_search_fields_match_the_location_filter():
+    fields = search.search_fields("vendor_offers", {"title": "Houseboat", "location": "Alleppey, Kerala", "tags": ["backwaters"]})
+    assert fields["location_tokens"] == ["alleppey", "kerala"]
+    assert fields["location_norm"] == "alleppey kerala"
+    assert "backwaters" in fields["search_keywords"]
+    assert fields["search_version"] == search.SEARCH_VERSION
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+import startup
+
+
+@pytest.fixture(autouse=True)
+def clean_phases(monkeypatch):
+    monkeypatch.setattr(startup, "phases", {})
+    monkeypatch.setattr(startup, "required", [])
+    monkeypatch.setattr(startup, "REQUIRED_RETRY_SECONDS", 0)
+
+
+def test_required_steps_are_retried_until_they_succeed():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("mongo not reachable yet")
+
+    async def run():
+        steps = [("backfill", flaky)]
+        startup.require(steps)
+        assert startup.required_status() == {"ok": False, "pending": ["backfill"]}
+        await startup.run_required(steps)
+
+    asyncio.run(run())
+    assert len(attempts) == 3
+    assert startup.required_status() == {"ok": True, "pending": []}
+
+
+def test_failed_background_step_does_not_skip_the_rest():
+    ran = []
+
+    async def broken():
+        raise RuntimeError("index options conflict")
+
+    async def fine():
+        ran.append(1)
+
+    asyncio.run(startup.run_background([("indexes_search", broken), ("indexes_sessions", fine)]))
+    assert startup.phases["indexes_search"]["status"] == "failed"
+    assert startup.phases["indexes_sessions"]["status"] == "done"
+    assert ran == [1]
@@ -0,0 +1,29 @@
+import stats
+
+
+def _registers(session_ids):
+    return {key.split(".", 1)[1]: rank for key, rank in stats._sketch_update(session_ids).items()}
+
+
+def test_empty_sketch_estimates_zero():
+    assert stats.hll_estimate({}) == 0
+
+
+def test_duplicates_do_not_change_the_sketch():
+    ids = [f"session-{i}" for i in range(500)]
+    assert _registers(ids) == _registers(ids * 3)
+
+
+def test_estimate_is_within_error_bounds():
+    for count in (100, 5000, 50000):
+        estimate = stats.hll_estimate(_registers(f"session-{i}" for i in range(count)))
+        # ~2.3% standard error at precision 11; allow about four sigma
+        assert abs(estimate - count) <= count * 0.1
+
+
+def test_register_update_keeps_the_highest_rank():
+    update = stats._sketch_update(["a", "b", "c", "a"])
+    for key, rank in update.items():
+        index = int(key.split(".", 1)[1])
+        assert 0 <= index < stats.HLL_REGISTERS
+        assert 1 <= rank <= 64 - stats.HLL_PRECISION + 1
@@ -0,0 +1,57 @@
+import pytest
+
+from trending import TrendingEngine
+
+HOUR = 3600.0
+
+
+def _engine(**kwargs):
+    engine = TrendingEngine(half_life_hours=1, **kwargs)
+    engine.epoch = 0.0
+    return engine
+
+
+def test_scores_halve_every_half_life():
+    engine = _engine()
+    engine.record("Goa", at=0.0, count=8)
+    assert engine.score("Goa", now=0.0) == pytest.approx(8)
+    assert engine.score("Goa", now=HOUR) == pytest.approx(4)
+    assert engine.score("Goa", now=3 * HOUR) == pytest.approx(1)
+
+
+def test_names_are_normalized():
+    engine = _engine()
+    engine.record("Goa", at=0.0)
+    engine.record("  goa ", at=0.0)
+    engine.record("", at=0.0)
+    engine.record(None, at=0.0)
+    assert engine.score("GOA", now=0.0) == pytest.approx(2)
+    assert list(engine.scores) == ["goa"]
+
+
+def test_recent_events_outrank_older_ones():
+    engine = _engine()
+    engine.record("Jaipur", at=0.0, count=3)
+    engine.record("Kerala", at=2 * HOUR, count=1)
+    # Jaipur decays to 0.75 by the time Kerala's single event lands
+    assert engine._top == ["kerala", "jaipur"]
+
+
+def test_top_k_is_bounded_and_ordered():
+    engine = _engine(top_k=3)
+    for count, name in enumerate(["Agra", "Delhi", "Goa", "Leh", "Ooty"], start=1):
+        engine.record(name, at=0.0, count=count)
+    assert engine._top == ["ooty", "leh", "goa"]
+    engine.record("Agra", at=0.0, count=10)
+    assert engine._top == ["agra", "ooty", "leh"]
+
+
+def test_rebase_keeps_relative_scores():
+    engine = _engine()
+    engine.record("Goa", at=0.0, count=1)
+    later = 100 * HOUR
+    engine.record("Manali", at=later, count=1)
+    assert engine.epoch == later
+    assert engine.score("Manali", now=later) == pytest.approx(1)
+    # Goa decayed below the prune threshold and was dropped
+    assert "goa" not in engine.scores